@@ -29,6 +29,7 @@ if "%1"=="search" goto :search
 if "%1"=="stats" goto :stats
 if "%1"=="test" goto :test
 if "%1"=="clean" goto :clean
+if "%1"=="migrate-cache" goto :migrate-cache
 if "%1"=="cleanup" goto :cleanup
 if "%1"=="check-space" goto :check-space
 if "%1"=="check-index" goto :check-index
@@ -55,6 +56,7 @@ echo search       - Modo búsqueda interactiva
 echo stats        - Mostrar estadísticas de la base de datos
 echo test         - Ejecutar tests unitarios
 echo clean        - Limpiar caché de embeddings
+echo migrate-cache - Migrar caché de embeddings .pkl al archivo SQLite
 echo cleanup      - LIMPIAR base de datos completa (PELIGROSO)
 echo check-space  - Verificar espacio disponible en MongoDB
 echo check-index  - Verificar configuración del índice vectorial
@@ -154,6 +156,11 @@ if "%confirm%"=="SI ELIMINAR" (
 )
 goto :end
 
+:migrate-cache
+echo Migrando caché de embeddings
+docker-compose run --rm maverik-vector-store python scripts/embedding_cache.py migrate --delete-legacy
+goto :end
+
 :check-space
 echo Verificando espacio disponible en MongoDB Atlas
 docker-compose run --rm maverik-vector-store python scripts/check_space.py
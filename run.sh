@@ -27,6 +27,7 @@ show_help() {
     echo -e "${GREEN}stats${NC}        - Mostrar estadísticas de la base de datos"
     echo -e "${GREEN}test${NC}         - Ejecutar tests unitarios"
     echo -e "${GREEN}clean${NC}        - Limpiar caché de embeddings"
+    echo -e "${GREEN}migrate-cache${NC} - Migrar caché de embeddings .pkl al archivo SQLite"
     echo -e "${GREEN}cleanup${NC}      - LIMPIAR base de datos completa (PELIGROSO)"
     echo -e "${GREEN}check-space${NC}  - Verificar espacio disponible en MongoDB"
     echo -e "${GREEN}check-index${NC}  - Verificar configuración del índice vectorial"
@@ -119,6 +120,13 @@ clean() {
     echo -e "${GREEN}✅ Caché limpiado${NC}"
 }
 
+# Migrar caché legado
+migrate_cache() {
+    echo -e "${BLUE}📦 Migrando caché de embeddings${NC}"
+    docker-compose run --rm maverik-vector-store python scripts/embedding_cache.py migrate --delete-legacy
+    echo -e "${GREEN}✅ Caché migrado${NC}"
+}
+
 # Mostrar logs
 show_logs() {
     echo -e "${BLUE}📄 Mostrando logs${NC}"
@@ -196,6 +204,9 @@ main() {
         "clean")
             clean
             ;;
+        "migrate-cache")
+            migrate_cache
+            ;;
         "cleanup")
             cleanup
             ;;
@@ -0,0 +1,191 @@
+"""
+Script para comparar los extractores de texto de PDFs.
+
+Cada extractor corre en su propio proceso sobre los mismos PDFs, de modo
+que la memoria pico de uno no se mezcla con la de otro ni con la de este
+proceso.
+"""
+import multiprocessing
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from src.config import get_settings
+from src.loaders.extractors import available_pdf_extractors, create_pdf_extractor
+from src.utils.logger import get_logger
+
+try:
+    import resource
+except ImportError:
+    # Windows: solo se mide la memoria de objetos de Python
+    resource = None
+
+settings = get_settings()
+logger = get_logger()
+
+
+def _peak_memory_mb() -> float:
+    """Memoria pico del proceso actual (MB)."""
+    if resource is None:
+        import tracemalloc
+
+        return tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _run_extractor(name: str, paths: List[str], max_pages: Optional[int], conn) -> None:
+    """Extrae el texto de ``paths`` con ``name`` y envía las métricas."""
+    if resource is None:
+        import tracemalloc
+
+        tracemalloc.start()
+    try:
+        extractor = create_pdf_extractor(name)
+    except ImportError as e:
+        conn.send({'extractor': name, 'error': str(e)})
+        return
+
+    result = {
+        'extractor': name,
+        'version': extractor.version,
+        'files': 0,
+        'failed_files': 0,
+        'pages': 0,
+        'empty_pages': 0,
+        'chars': 0,
+        'baseline_memory_mb': _peak_memory_mb()
+    }
+    start_time = time.perf_counter()
+    for path in paths:
+        try:
+            for _, text in extractor.iter_pages(path, 0, max_pages):
+                result['pages'] += 1
+                result['chars'] += len(text)
+                result['empty_pages'] += not text.strip()
+            result['files'] += 1
+        except Exception as e:
+            result['failed_files'] += 1
+            logger.log_event(
+                'extractor_benchmark_file_error',
+                level='WARNING',
+                extractor=name,
+                filename=Path(path).name,
+                error=str(e)
+            )
+    result['duration_seconds'] = time.perf_counter() - start_time
+    result['peak_memory_mb'] = _peak_memory_mb()
+    conn.send(result)
+
+
+def benchmark_extractor(name: str, paths: List[Path], max_pages: Optional[int] = None) -> dict:
+    """Mide un extractor en un proceso nuevo."""
+    context = multiprocessing.get_context("spawn")
+    parent_conn, child_conn = context.Pipe(duplex=False)
+    process = context.Process(
+        target=_run_extractor,
+        args=(name, [str(path) for path in paths], max_pages, child_conn)
+    )
+    process.start()
+    child_conn.close()
+    try:
+        result = parent_conn.recv()
+    except EOFError:
+        result = {'extractor': name, 'error': "Benchmark process exited unexpectedly"}
+    process.join()
+
+    if 'error' not in result:
+        duration = result['duration_seconds']
+        result['pages_per_second'] = result['pages'] / duration if duration > 0 else None
+    return result
+
+
+def print_results(results: List[dict]) -> None:
+    """Muestra los resultados, del extractor más rápido al más lento."""
+    measured = [result for result in results if 'error' not in result]
+    measured.sort(key=lambda result: result['pages_per_second'] or 0, reverse=True)
+    reference = next(
+        (result['chars'] for result in measured if result['extractor'] == 'pypdf'),
+        None
+    )
+
+    print(
+        f"{'Extractor':<14} {'Páginas':>8} {'Pág/s':>9} {'Caracteres':>12} "
+        f"{'vs pypdf':>9} {'Vacías':>7} {'Pico MB':>9} {'Base MB':>8} {'Errores':>8}"
+    )
+    print("-" * 92)
+    for result in measured:
+        relative = (
+            f"{result['chars'] / reference:.0%}" if reference else "-"
+        )
+        pages_per_second = result['pages_per_second']
+        print(
+            f"{result['extractor']:<14} {result['pages']:>8,} "
+            f"{pages_per_second if pages_per_second is not None else 0:>9.1f} "
+            f"{result['chars']:>12,} {relative:>9} {result['empty_pages']:>7,} "
+            f"{result['peak_memory_mb']:>9.1f} {result['baseline_memory_mb']:>8.1f} "
+            f"{result['failed_files']:>8}"
+        )
+
+    for result in results:
+        if 'error' in result:
+            print(f"{result['extractor']}: no disponible ({result['error']})")
+
+
+def main():
+    """Función principal del benchmark de extractores."""
+    args = sys.argv[1:]
+    if "--help" in args or "-h" in args:
+        print("Maverik Vector Store - Benchmark de extractores de PDF")
+        print("")
+        print("Uso: python scripts/benchmark_extractors.py [extractor ...] [opciones]")
+        print("")
+        print("Opciones:")
+        print("  --dir DIRECTORIO   - PDFs a procesar (por defecto, FILES_DIR)")
+        print("  --max-pages N      - Páginas por archivo (por defecto, todas)")
+        print("")
+        print(f"Extractores: {', '.join(available_pdf_extractors())}")
+        return
+
+    directory = settings.files_path
+    max_pages = None
+    names = []
+    index = 0
+    while index < len(args):
+        if args[index] == "--dir":
+            directory = Path(args[index + 1])
+            index += 2
+        elif args[index] == "--max-pages":
+            max_pages = int(args[index + 1])
+            index += 2
+        else:
+            names.append(args[index])
+            index += 1
+    names = names or available_pdf_extractors()
+    unknown = [name for name in names if name not in available_pdf_extractors()]
+    if unknown:
+        print(f"Extractores desconocidos: {', '.join(unknown)}")
+        print(f"Disponibles: {', '.join(available_pdf_extractors())}")
+        sys.exit(1)
+
+    paths = sorted(directory.rglob("*.pdf"))
+    if not paths:
+        print(f"No se encontraron PDFs en {directory}")
+        sys.exit(1)
+
+    print(f"Comparando {len(names)} extractores sobre {len(paths)} PDFs de {directory}")
+    results = []
+    for name in names:
+        print(f"  {name}...")
+        result = benchmark_extractor(name, paths, max_pages)
+        logger.log_event('pdf_extractor_benchmark', **result)
+        results.append(result)
+
+    print("")
+    print_results(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Script para administrar el caché local de embeddings.
+"""
+import sys
+
+from src.embedding.openai_embeddings import OpenAIEmbeddingManager
+
+
+def main():
+    """Función principal del administrador de caché."""
+    if len(sys.argv) < 2:
+        print("Maverik Vector Store - Caché de embeddings")
+        print("")
+        print("Uso: python scripts/embedding_cache.py [comando]")
+        print("")
+        print("Comandos:")
+        print("  stats                      - Estadísticas del caché")
+        print("  migrate [--delete-legacy]  - Importar archivos .pkl del formato anterior")
+        print("  namespaces                 - Listar namespaces (modelo@dimensión:versión)")
+        print("  prune [namespace ...]      - Eliminar namespaces salvo el actual y los indicados")
+        print("  clear                      - Eliminar todos los embeddings en caché")
+        print("")
+        return
+
+    command = sys.argv[1]
+    manager = OpenAIEmbeddingManager()
+
+    if command == "stats":
+        stats = manager.get_cache_stats()
+        print("Estadísticas del caché:")
+        for key, value in stats.items():
+            print(f"  {key}: {value}")
+
+    elif command == "migrate":
+        delete_legacy = "--delete-legacy" in sys.argv[2:]
+        result = manager.migrate_legacy_cache(delete_legacy=delete_legacy)
+        print(f"Embeddings importados: {result['imported']:,}")
+        print(f"Archivos con error: {result['failed']:,}")
+        if delete_legacy:
+            print("Archivos .pkl importados eliminados")
+
+    elif command == "namespaces":
+        namespaces = manager.list_cache_namespaces()
+        if not namespaces:
+            print("El caché está vacío")
+        for info in namespaces:
+            marker = "*" if info['current'] else " "
+            size_mb = info['payload_bytes'] / (1024 * 1024)
+            print(
+                f" {marker} {info['namespace']}: {info['entries']:,} entradas, "
+                f"{size_mb:.2f} MB"
+            )
+
+    elif command == "prune":
+        removed = manager.prune_cache_namespaces(keep=sys.argv[2:])
+        if not removed:
+            print("No hay namespaces obsoletos")
+        for namespace, entries in removed.items():
+            print(f"Eliminado {namespace}: {entries:,} entradas")
+
+    elif command == "clear":
+        manager.clear_cache()
+        print("Caché de embeddings eliminado")
+
+    else:
+        print(f"Comando desconocido: {command}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
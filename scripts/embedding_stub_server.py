@@ -0,0 +1,106 @@
+"""
+Servidor local compatible con la API de embeddings de OpenAI.
+
+Permite medir la ingesta (reuso de conexiones, reintentos, manejo de 429,
+timeouts) sin red ni costo. Apuntar el cliente con
+``OPENAI_BASE_URL=http://127.0.0.1:8089/v1``.
+"""
+import argparse
+
+from src.config import get_settings
+from src.embedding.stub_server import (
+    LATENCY_DISTRIBUTIONS,
+    EmbeddingStub,
+    LatencyModel,
+    create_stub_server,
+    stub_base_url,
+)
+from src.utils.logger import get_logger
+
+settings = get_settings()
+logger = get_logger()
+
+
+def parse_args() -> argparse.Namespace:
+    """Argumentos de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Stub local del endpoint /v1/embeddings")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--dimensions", type=int, default=settings.embedding_dimensions,
+                        help="Dimensión si el request no la indica")
+    parser.add_argument("--latency", choices=LATENCY_DISTRIBUTIONS, default="fixed",
+                        help="Distribución de la latencia por request")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latencia media (ms)")
+    parser.add_argument("--latency-jitter-ms", type=float, default=0.0,
+                        help="Dispersión de la latencia (ms)")
+    parser.add_argument("--ms-per-1k-tokens", type=float, default=0.0,
+                        help="Latencia adicional por cada 1000 tokens (ms)")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Probabilidad de responder 500/503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0,
+                        help="Probabilidad de responder 429 aleatoriamente")
+    parser.add_argument("--timeout-rate", type=float, default=0.0,
+                        help="Probabilidad de demorar --hang-seconds antes de responder")
+    parser.add_argument("--hang-seconds", type=float, default=30.0)
+    parser.add_argument("--rpm", type=int, default=None, help="Cuota de requests por minuto")
+    parser.add_argument("--tpm", type=int, default=None, help="Cuota de tokens por minuto")
+    parser.add_argument("--from-settings", action="store_true",
+                        help="Usar EMBEDDING_REQUESTS_PER_MINUTE y EMBEDDING_TOKENS_PER_MINUTE como cuotas")
+    parser.add_argument("--retry-after", type=float, default=1.0,
+                        help="Retry-After de los 429 aleatorios (segundos)")
+    parser.add_argument("--seed", type=int, default=None)
+    return parser.parse_args()
+
+
+def main():
+    """Inicia el servidor hasta Ctrl+C."""
+    args = parse_args()
+    rpm, tpm = args.rpm, args.tpm
+    if args.from_settings:
+        rpm = rpm or settings.embedding_requests_per_minute
+        tpm = tpm or settings.embedding_tokens_per_minute
+
+    stub = EmbeddingStub(
+        dimensions=args.dimensions,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        timeout_rate=args.timeout_rate,
+        hang_seconds=args.hang_seconds,
+        requests_per_minute=rpm,
+        tokens_per_minute=tpm,
+        retry_after_seconds=args.retry_after,
+        seed=args.seed
+    )
+    stub.latency = LatencyModel(
+        args.latency,
+        mean_ms=args.latency_ms,
+        jitter_ms=args.latency_jitter_ms,
+        ms_per_1k_tokens=args.ms_per_1k_tokens,
+        rng=stub.rng
+    )
+    server = create_stub_server(stub, args.host, args.port)
+
+    logger.log_event(
+        'embedding_stub_started',
+        base_url=stub_base_url(server),
+        requests_per_minute=rpm,
+        tokens_per_minute=tpm,
+        latency=args.latency,
+        latency_ms=args.latency_ms,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate
+    )
+    print(f"Stub de embeddings en {stub_base_url(server)}")
+    print(f"Usar OPENAI_BASE_URL={stub_base_url(server)} (estadísticas en /stats)")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        logger.log_event('embedding_stub_stopped', **stub.get_stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,12 @@
 """
 Script principal para la ingesta de documentos.
 """
+import itertools
 import sys
+import time
+from collections import defaultdict
 from pathlib import Path
-from typing import List
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from langchain_core.documents import Document
 
@@ -11,8 +14,12 @@ from src.config import get_settings
 from src.embedding.openai_embeddings import OpenAIEmbeddingManager
 from src.loaders.json_loader import JSONDocumentLoader
 from src.loaders.pdf_loader import PDFDocumentLoader
+from src.utils.checkpoint import IngestCheckpoint
+from src.utils.hashing import document_chunk_id
 from src.utils.logger import get_logger, measure_time
-from src.utils.splitter import DocumentSplitter
+from src.utils.manifest import IngestManifest, IngestPlan
+from src.utils.pipeline import Pipeline, Stage
+from src.utils.splitter import DocumentSplitter, PageLinker
 from src.vectorstore.mongodb_vectorstore import MongoDBVectorStore
 
 # Configuración global
@@ -30,24 +37,313 @@ class DocumentProcessor:
         self.splitter = DocumentSplitter()
         self.embedding_manager = OpenAIEmbeddingManager()
         self.vector_store = MongoDBVectorStore(self.embedding_manager)
+        state_dir = settings.get_absolute_path(settings.ingest_state_dir)
+        self.manifest = IngestManifest(state_dir, self._ingest_config())
+        self.checkpoint = IngestCheckpoint(state_dir, self._ingest_config())
         
         logger.log_event('document_processor_initialized')
     
+    def _ingest_config(self) -> dict:
+        """Configuración que, si cambia, obliga a reingestar todo."""
+        return {
+            'chunk_size': self.splitter.chunk_size,
+            'chunk_overlap': self.splitter.chunk_overlap,
+            'chunking_strategy': self.splitter.strategy,
+            'embedding_provider': self.embedding_manager.provider,
+            'embedding_model': self.embedding_manager.model,
+            'embedding_dimensions': self.embedding_manager.dimensions,
+            'db_name': settings.db_name,
+            'collection_name': settings.collection_name
+        }
+    
+    def list_pdf_files(self) -> Dict[str, Path]:
+        """PDFs del directorio files principal, por ruta relativa."""
+        if not settings.files_path.exists():
+            raise FileNotFoundError(f"Directory not found: {settings.files_path}")
+        return {
+            path.relative_to(settings.files_path).as_posix(): path
+            for path in sorted(settings.files_path.glob("*.pdf"))
+        }
+    
+    @staticmethod
+    def _pdf_metadata() -> Dict[str, str]:
+        """Metadatos comunes de los PDFs del directorio files principal."""
+        return {
+            "idioma": "mixed",
+            "description": "Documentos de finanzas y estrategias de inversión (conjunto simplificado para pruebas)"
+        }
+    
     @measure_time
-    def process_all_files(self) -> List[Document]:
-        """Procesa todos los archivos PDF del directorio files principal."""
+    def process_all_files(
+        self,
+        pdf_files: Optional[List[Path]] = None,
+        on_loaded: Optional[Callable[[Path, List[Document]], None]] = None
+    ) -> Dict[Path, List[Document]]:
+        """Procesa los archivos PDF del directorio files principal.
+
+        ``pdf_files`` limita el procesamiento a esos archivos. Retorna los
+        documentos de cada archivo cargado correctamente; ``on_loaded`` se
+        invoca al cargar cada uno.
+        """
         logger.log_event('processing_all_files_started')
         
-        metadata = {
-            "idioma": "mixed",
-            "description": "Documentos de finanzas y estrategias de inversión (conjunto simplificado para pruebas)"
+        metadata = self._pdf_metadata()
+        
+        if pdf_files is None:
+            pdf_files = list(self.list_pdf_files().values())
+        
+        return self.pdf_loader.load_pdf_files(pdf_files, metadata, on_loaded)
+    
+    def _load_pdf_files(self, plan: IngestPlan, files: Dict[str, Path]) -> Dict[Path, List[Document]]:
+        """Documentos de cada archivo a procesar, en el orden del plan.
+
+        Los archivos que el checkpoint registra como parseados se leen de
+        él, sin parsearlos; los demás se cargan y se registran en el
+        checkpoint. Los archivos que no se pudieron cargar se omiten.
+        """
+        parsed = set(self.checkpoint.parsed_files({key: files[key] for key in plan.to_process}))
+        keys_by_path = {path: key for key, path in files.items()}
+        loaded = self.process_all_files(
+            [files[key] for key in plan.to_process if key not in parsed],
+            on_loaded=lambda path, documents: self.checkpoint.record_parsed(
+                keys_by_path[path], path, documents
+            )
+        )
+        
+        documents_by_file = {}
+        for key in plan.to_process:
+            path = files[key]
+            if key in parsed:
+                documents_by_file[path] = self.checkpoint.load_parsed(key)
+            elif path in loaded:
+                documents_by_file[path] = loaded[path]
+        
+        if parsed:
+            logger.log_event('ingest_checkpoint_files_loaded', files=len(parsed))
+        return documents_by_file
+    
+    def _update_manifest(
+        self,
+        plan: IngestPlan,
+        files: Dict[str, Path],
+        file_hashes: Dict[Path, Optional[str]],
+        ids_by_source: Dict[str, List[str]]
+    ) -> None:
+        """Registra los archivos ingestados y elimina los chunks obsoletos.
+
+        ``file_hashes`` contiene los archivos cargados (con el hash de su
+        contenido, si se conoce) e ``ids_by_source`` los ids de chunk de
+        cada archivo. Los archivos que no se pudieron cargar no se
+        registran, de modo que se reintentan en la próxima ejecución y
+        conservan sus chunks.
+        """
+        stale = set()
+        for key in plan.to_process:
+            path = files[key]
+            if path not in file_hashes:
+                continue
+            chunk_ids = ids_by_source.get(path.name, [])
+            stale.update(set(self.manifest.chunk_ids(key)) - set(chunk_ids))
+            self.manifest.record(key, path, chunk_ids, file_hash=file_hashes[path])
+        
+        for key in plan.deleted:
+            stale.update(self.manifest.chunk_ids(key))
+            self.manifest.remove(key)
+        
+        # Un chunk puede seguir en uso por otro archivo con el mismo contenido
+        live = {
+            chunk_id
+            for entry in self.manifest.files.values()
+            for chunk_id in entry['chunk_ids']
         }
+        stale -= live
         
-        return self.pdf_loader.load_pdfs_from_directory(
-            settings.files_path,
-            metadata
+        deleted = self.vector_store.delete_documents(sorted(stale)) if stale else 0
+        self.manifest.save()
+        
+        logger.log_event(
+            'ingest_manifest_updated',
+            files=len(self.manifest.files),
+            stale_chunks=len(stale),
+            deleted_chunks=deleted
         )
     
+    def _iter_streaming_pages(
+        self,
+        plan: IngestPlan,
+        files: Dict[str, Path],
+        file_hashes: Dict[Path, Optional[str]]
+    ) -> Iterator[Document]:
+        """Páginas de los archivos a procesar, a medida que se parsean.
+
+        Los archivos se entregan en el orden del plan. Cada archivo cargado
+        se registra en ``file_hashes`` y en el checkpoint al terminar (lo que
+        retiene en memoria las páginas de un solo archivo). Los archivos que
+        el checkpoint registra como parseados se leen de él, sin parsearlos.
+        """
+        parsed = set(self.checkpoint.parsed_files({key: files[key] for key in plan.to_process}))
+        keys_by_path = {path: key for key, path in files.items()}
+        pending = [files[key] for key in plan.to_process if key not in parsed]
+        metadata = self._pdf_metadata()
+        
+        def record(path: Path, documents: List[Document]) -> None:
+            file_hashes[path] = documents[0].metadata.get('file_hash') if documents else None
+        
+        def from_checkpoint(key: str) -> List[Document]:
+            documents = self.checkpoint.load_parsed(key)
+            record(files[key], documents)
+            return documents
+        
+        def loaded(path: Path, documents: List[Document]) -> None:
+            record(path, documents)
+            self.checkpoint.record_parsed(keys_by_path[path], path, documents)
+        
+        if settings.pdf_parse_workers > 1:
+            # Procesos en paralelo: se entregan archivos completos, en orden
+            # (los que fallan se omiten)
+            loaded_files = self.pdf_loader.iter_pdf_files(pending, metadata)
+            current = None
+            try:
+                for key in plan.to_process:
+                    if key in parsed:
+                        yield from from_checkpoint(key)
+                        continue
+                    if current is None:
+                        current = next(loaded_files, None)
+                    if current is not None and current[0] == files[key]:
+                        path, documents = current
+                        current = None
+                        loaded(path, documents)
+                        yield from documents
+            finally:
+                loaded_files.close()
+            return
+        
+        for key in plan.to_process:
+            if key in parsed:
+                yield from from_checkpoint(key)
+                continue
+            path = files[key]
+            documents = []
+            try:
+                for doc in self.pdf_loader.iter_pdf_pages(path, dict(metadata, source=path.name)):
+                    documents.append(doc)
+                    yield doc
+            except Exception as e:
+                logger.log_document_processing(
+                    filename=path.name,
+                    status='error',
+                    error=str(e)
+                )
+                continue
+            loaded(path, documents)
+    
+    def _run_streaming(
+        self,
+        plan: IngestPlan,
+        files: Dict[str, Path],
+        resumed: bool
+    ) -> Tuple[Dict[Path, Optional[str]], Dict[str, List[str]]]:
+        """Ingesta en streaming: páginas -> split -> embed -> write.
+
+        Cada etapa corre en sus propios hilos y las colas entre etapas
+        admiten ``INGEST_STREAM_WINDOW`` elementos, de modo que la memoria
+        no depende del tamaño del corpus y los primeros chunks se escriben
+        mientras se siguen parseando los PDFs. Con ``SPLIT_WORKERS`` mayor
+        que 1 las páginas se dividen en procesos separados, en orden (ver
+        ``DocumentSplitter.iter_split_pages``). Los chunks cuyo id ya está
+        en la colección o en el checkpoint no se embeben.
+
+        Retorna los archivos cargados (con su hash) y los ids de chunk de
+        cada archivo, para el manifest.
+        """
+        start_time = time.time()
+        committed = self.checkpoint.committed_ids() if resumed else set()
+        file_hashes: Dict[Path, Optional[str]] = {}
+        ids_by_source = defaultdict(list)
+        batch_numbers = itertools.count(1)
+        pending: List[Document] = []
+        first_commit = []
+        
+        source = self._iter_streaming_pages(plan, files, file_hashes)
+        split_workers = settings.split_workers
+        if split_workers > 1:
+            source = self.splitter.iter_split_pages(source, split_workers)
+        
+        # Retiene cada página hasta enlazarla con la siguiente
+        linker = PageLinker()
+        
+        def add_chunks(chunks: List[Document]) -> None:
+            for doc in chunks:
+                ids_by_source[doc.metadata.get('source')].append(doc.id)
+            pending.extend(doc for doc in chunks if doc.id not in committed)
+        
+        def split(item) -> List[tuple]:
+            # Con varios procesos la fuente ya entrega los chunks enlazados
+            if split_workers > 1:
+                add_chunks(item)
+            else:
+                for chunks in linker.add(self.splitter.split_page(item)):
+                    add_chunks(chunks)
+            batches = []
+            while len(pending) >= settings.batch_size:
+                batches.append((next(batch_numbers), pending[:settings.batch_size]))
+                del pending[:settings.batch_size]
+            return batches
+        
+        def flush() -> List[tuple]:
+            for chunks in linker.flush():
+                add_chunks(chunks)
+            batches = []
+            while pending:
+                batches.append((next(batch_numbers), pending[:settings.batch_size]))
+                del pending[:settings.batch_size]
+            return batches
+        
+        def on_commit(ids: List[str]) -> None:
+            self.checkpoint.record_committed(ids)
+            if not first_commit:
+                first_commit.append(time.time() - start_time)
+                logger.log_event(
+                    'streaming_first_commit',
+                    seconds_since_start=first_commit[0],
+                    chunks=len(ids)
+                )
+        
+        pipeline = Pipeline(
+            [
+                Stage('split', split, flush=flush),
+                *self.vector_store.ingestion_stages(
+                    settings.mongodb_bulk_load,
+                    on_commit=on_commit,
+                    filter_existing=True
+                ),
+            ],
+            queue_size=settings.ingest_stream_window
+        )
+        try:
+            written = pipeline.run(source)
+        finally:
+            self.vector_store.last_pipeline_stats = pipeline.stats
+            logger.log_event('ingestion_pipeline_stats', stages=pipeline.stats)
+        
+        chunk_count = sum(len(ids) for ids in ids_by_source.values())
+        logger.log_event(
+            'streaming_ingestion_complete',
+            files_loaded=len(file_hashes),
+            chunks=chunk_count,
+            chunks_written=sum(len(ids) for _, ids in written),
+            committed_in_checkpoint=len(committed),
+            first_commit_seconds=first_commit[0] if first_commit else None,
+            duration_seconds=time.time() - start_time
+        )
+        print(
+            f"Procesados {len(file_hashes)} archivos PDF en streaming: "
+            f"{chunk_count} chunks desde {settings.files_path}"
+        )
+        
+        return file_hashes, ids_by_source
+    
     # Métodos originales comentados para referencia futura
     # @measure_time
     # def process_books(self) -> List[Document]:
@@ -104,9 +400,100 @@ class DocumentProcessor:
         )
     
     @measure_time
-    def run_full_ingestion(self) -> None:
-        """Ejecuta la ingesta completa de documentos."""
-        logger.log_event('full_ingestion_started')
+    def ingest_json_documents(self, documents: Iterable[Document], source: str) -> int:
+        """Ingesta en streaming de documentos JSON (un documento por registro).
+
+        Los documentos se agrupan en lotes de ``JSON_BATCH_SIZE`` a medida
+        que se leen y pasan por las etapas ``embed`` y ``write`` del vector
+        store, con colas de ``INGEST_STREAM_WINDOW`` elementos: la memoria
+        no depende del tamaño del archivo. Cada registro recibe un id
+        determinista (ver ``document_chunk_id``), de modo que reingestar
+        el mismo archivo no vuelve a embeberlo.
+
+        Retorna la cantidad de documentos leídos.
+        """
+        start_time = time.time()
+        batch_size = max(1, settings.json_batch_size)
+        doc_count = [0]
+        
+        def batches() -> Iterator[tuple]:
+            iterator = iter(documents)
+            for batch_num in itertools.count(1):
+                batch = list(itertools.islice(iterator, batch_size))
+                if not batch:
+                    return
+                for doc in batch:
+                    doc.id = doc.id or document_chunk_id(doc)
+                doc_count[0] += len(batch)
+                yield batch_num, batch
+        
+        pipeline = Pipeline(
+            self.vector_store.ingestion_stages(
+                settings.mongodb_bulk_load,
+                filter_existing=True
+            ),
+            queue_size=settings.ingest_stream_window
+        )
+        try:
+            written = pipeline.run(batches())
+        finally:
+            self.vector_store.last_pipeline_stats = pipeline.stats
+            logger.log_event('ingestion_pipeline_stats', stages=pipeline.stats)
+        
+        logger.log_event(
+            'json_ingestion_complete',
+            source=source,
+            documents=doc_count[0],
+            documents_written=sum(len(ids) for _, ids in written),
+            batch_size=batch_size,
+            duration_seconds=time.time() - start_time
+        )
+        print(f"Procesados {doc_count[0]} registros JSON desde {source}")
+        return doc_count[0]
+    
+    def ingest_json_file(self, file_path: Path) -> int:
+        """Ingesta en streaming de un archivo JSON o JSON Lines."""
+        if file_path.resolve() == settings.warren_buffet_faq_path.resolve():
+            documents = self.json_loader.iter_warren_buffet_faq(file_path)
+        else:
+            documents = self.json_loader.iter_json_documents(file_path)
+        return self.ingest_json_documents(documents, file_path.name)
+    
+    @measure_time
+    def run_full_ingestion(
+        self,
+        pipelined: Optional[bool] = None,
+        incremental: Optional[bool] = None,
+        resume: bool = False,
+        streaming: Optional[bool] = None
+    ) -> None:
+        """Ejecuta la ingesta completa de documentos.
+
+        ``pipelined`` superpone la generación de embeddings con las
+        escrituras a MongoDB (por defecto, ``INGEST_PIPELINED``). Con
+        ``incremental`` (por defecto, ``INGEST_INCREMENTAL``) solo se
+        procesan los archivos nuevos o modificados según el manifest; los
+        chunks de archivos eliminados o modificados se borran en bloque.
+
+        El progreso se registra en un checkpoint (ver ``IngestCheckpoint``).
+        Con ``resume`` se retoma la ejecución interrumpida: se conserva su
+        plan, no se vuelven a parsear los PDFs ya cargados y se omiten los
+        chunks ya escritos, sin llamar a la API de embeddings por ellos.
+
+        Con ``streaming`` (por defecto, ``INGEST_STREAMING``) las páginas
+        fluyen por un pipeline acotado en lugar de cargarse todas en memoria
+        (ver ``_run_streaming``).
+        """
+        pipelined = settings.ingest_pipelined if pipelined is None else pipelined
+        streaming = settings.ingest_streaming if streaming is None else streaming
+        incremental = settings.ingest_incremental if incremental is None else incremental
+        logger.log_event(
+            'full_ingestion_started',
+            pipelined=pipelined,
+            incremental=incremental,
+            resume=resume,
+            streaming=streaming
+        )
         
         try:
             # Verificar conexión a MongoDB
@@ -123,22 +510,61 @@ class DocumentProcessor:
                 )
                 raise ConnectionError(error_msg)
             
-            # 1. Procesar PDFs desde directorio files principal (simplificado)
+            # 1. Procesar PDFs nuevos o modificados del directorio files principal
             logger.log_event('processing_pdfs_started')
             all_documents = []
+            split_docs = []
             
             try:
-                # Procesar todos los archivos PDF del directorio files
-                all_docs = self.process_all_files()
-                all_documents.extend(all_docs)
+                files = self.list_pdf_files()
+                resumed = resume and self.checkpoint.load()
+                collection_empty = False
+                if resumed:
+                    plan = self.checkpoint.plan
+                    # Archivos del plan que ya no existen: se tratan como eliminados
+                    for key in plan.to_process:
+                        if key not in files:
+                            plan.deleted.append(key)
+                    plan.new = [key for key in plan.new if key in files]
+                    plan.changed = [key for key in plan.changed if key in files]
+                else:
+                    if resume:
+                        logger.log_event('ingest_checkpoint_not_found', level='WARNING')
+                        print("No hay una ingesta interrumpida para reanudar; se inicia una nueva")
+                    plan = self.manifest.plan(files)
+                    # Un manifest sin colección (por ejemplo, tras cleanup_db) no sirve
+                    collection_empty = (
+                        bool(self.manifest.files)
+                        and self.vector_store.collection.estimated_document_count() == 0
+                    )
+                    if not incremental or collection_empty:
+                        plan.reprocess_all()
+                    self.checkpoint.start(plan)
                 
                 logger.log_event(
-                    'pdf_processing_complete',
-                    total_documents=len(all_documents),
-                    files_processed=len(all_docs)
+                    'ingest_plan',
+                    incremental=incremental,
+                    resumed=resumed,
+                    collection_empty=collection_empty,
+                    **plan.as_dict()
+                )
+                print(
+                    f"Archivos: {len(plan.new)} nuevos, {len(plan.changed)} modificados, "
+                    f"{len(plan.unchanged)} sin cambios, {len(plan.deleted)} eliminados"
                 )
                 
-                print(f"Procesados {len(all_documents)} documentos PDF desde {settings.files_path}")
+                if not streaming:
+                    documents_by_file = self._load_pdf_files(plan, files)
+                    for documents in documents_by_file.values():
+                        all_documents.extend(documents)
+                
+                    logger.log_event(
+                        'pdf_processing_complete',
+                        total_documents=len(all_documents),
+                        files_processed=len(documents_by_file)
+                    )
+                
+                    print(f"Procesados {len(all_documents)} documentos PDF desde {settings.files_path}")
                 
             except Exception as e:
                 logger.log_critical_error(
@@ -151,32 +577,73 @@ class DocumentProcessor:
                 )
                 raise
             
-            # 2. Dividir documentos
-            if all_documents:
-                logger.log_event('splitting_documents_started')
+            if streaming:
+                # 2-3. Parsear, dividir, embeber y escribir en un pipeline acotado
                 try:
-                    split_docs = self.splitter.split_documents(all_documents)
-                    
-                    # 3. Añadir documentos divididos al vector store
-                    logger.log_event('adding_split_documents_started')
-                    self.vector_store.add_documents(
-                        split_docs, 
-                        batch_size=settings.batch_size
-                    )
-                    
+                    file_hashes, ids_by_source = self._run_streaming(plan, files, resumed)
                 except Exception as e:
                     logger.log_critical_error(
                         error_type="VectorStoreError",
-                        error_message=f"Error añadiendo documentos al vector store: {str(e)}",
+                        error_message=f"Error en la ingesta en streaming: {str(e)}",
                         context={
-                            "total_documents": len(all_documents),
-                            "split_documents": len(split_docs) if 'split_docs' in locals() else 0,
-                            "batch_size": settings.batch_size
+                            "files_to_process": len(plan.to_process),
+                            "window": settings.ingest_stream_window
                         }
                     )
                     raise
+            else:
+                # 2. Dividir documentos
+                if all_documents:
+                    logger.log_event('splitting_documents_started')
+                    try:
+                        split_docs = self.splitter.split_documents(all_documents)
+                    
+                        # 3. Añadir al vector store los chunks aún no escritos
+                        committed = self.checkpoint.committed_ids() if resumed else set()
+                        pending_docs = [doc for doc in split_docs if doc.id not in committed]
+                        logger.log_event(
+                            'adding_split_documents_started',
+                            split_documents=len(split_docs),
+                            committed_in_checkpoint=len(split_docs) - len(pending_docs)
+                        )
+                        if resumed:
+                            print(
+                                f"Reanudando: {len(split_docs) - len(pending_docs)} de "
+                                f"{len(split_docs)} chunks ya escritos"
+                            )
+                        if pending_docs:
+                            self.vector_store.add_documents(
+                                pending_docs,
+                                batch_size=settings.batch_size,
+                                pipelined=pipelined,
+                                on_commit=self.checkpoint.record_committed
+                            )
+                    
+                    except Exception as e:
+                        logger.log_critical_error(
+                            error_type="VectorStoreError",
+                            error_message=f"Error añadiendo documentos al vector store: {str(e)}",
+                            context={
+                                "total_documents": len(all_documents),
+                                "split_documents": len(split_docs),
+                                "batch_size": settings.batch_size
+                            }
+                        )
+                        raise
+            
+                file_hashes = {
+                    path: pages[0].metadata.get('file_hash') if pages else None
+                    for path, pages in documents_by_file.items()
+                }
+                ids_by_source = defaultdict(list)
+                for doc in split_docs:
+                    ids_by_source[doc.metadata.get('source')].append(doc.id)
+            
+            # 4. Actualizar el manifest y eliminar chunks obsoletos
+            self._update_manifest(plan, files, file_hashes, ids_by_source)
+            self.checkpoint.clear()
             
-            # 4. Procesar JSON (Warren Buffet FAQ) - COMENTADO PARA SIMPLIFICAR PRUEBAS
+            # 5. Procesar JSON (Warren Buffet FAQ) - COMENTADO PARA SIMPLIFICAR PRUEBAS
             # logger.log_event('processing_json_started')
             # 
             # # Importar función de monitoreo de espacio
@@ -227,7 +694,7 @@ class DocumentProcessor:
             print(f"Procesamiento JSON omitido para simplificar pruebas")
             logger.log_event('json_processing_skipped', reason='simplified_testing')
             
-            # 5. Estadísticas finales
+            # 6. Estadísticas finales
             try:
                 collection_stats = self.vector_store.get_collection_stats()
                 cache_stats = self.embedding_manager.get_cache_stats()
@@ -235,7 +702,12 @@ class DocumentProcessor:
                 logger.log_event(
                     'full_ingestion_complete',
                     **collection_stats,
-                    **cache_stats
+                    **cache_stats,
+                    embedding_cache_usage=self.vector_store.get_embedding_cache_stats(),
+                    pipeline_stats=(
+                        self.vector_store.last_pipeline_stats
+                        if pipelined or streaming else None
+                    )
                 )
                 
             except Exception as e:
@@ -323,6 +795,14 @@ def main():
                 processor.test_search(query)
                 return
             
+            elif sys.argv[1] == "--json":
+                file_path = (
+                    Path(sys.argv[2]) if len(sys.argv) > 2
+                    else settings.warren_buffet_faq_path
+                )
+                processor.ingest_json_file(file_path)
+                return
+            
             elif sys.argv[1] == "--stats":
                 try:
                     collection_stats = processor.vector_store.get_collection_stats()
@@ -353,7 +833,12 @@ def main():
         print(f"Logs: {settings.project_root / 'logs'}")
         print("-" * 60)
         
-        processor.run_full_ingestion()
+        processor.run_full_ingestion(
+            pipelined=True if "--pipelined" in sys.argv[1:] else None,
+            incremental=False if "--full" in sys.argv[1:] else None,
+            resume="--resume" in sys.argv[1:],
+            streaming=True if "--streaming" in sys.argv[1:] else None
+        )
         print("Ingesta completada exitosamente!")
         print(f"Revisa los logs en: {settings.project_root / 'logs'}")
         
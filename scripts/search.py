@@ -29,9 +29,14 @@ class SearchEngine:
         k: int = 5, 
         language: Optional[str] = None,
         source: Optional[str] = None,
-        with_scores: bool = False
+        with_scores: bool = False,
+        expand_neighbors: Optional[bool] = None
     ) -> None:
-        """Realiza una búsqueda y muestra los resultados."""
+        """Realiza una búsqueda y muestra los resultados.
+
+        Con ``expand_neighbors`` (por defecto, ``SEARCH_EXPAND_NEIGHBORS``)
+        cada resultado incluye sus chunks anterior y siguiente.
+        """
         try:
             # Construir filtros
             filters = {}
@@ -45,13 +50,15 @@ class SearchEngine:
                 results = self.vector_store.similarity_search_with_score(
                     query=query,
                     k=k,
-                    filter_dict=filters if filters else None
+                    filter_dict=filters if filters else None,
+                    expand_neighbors=expand_neighbors
                 )
             else:
                 results = self.vector_store.similarity_search(
                     query=query,
                     k=k,
-                    filter_dict=filters if filters else None
+                    filter_dict=filters if filters else None,
+                    expand_neighbors=expand_neighbors
                 )
             
             # Mostrar resultados
@@ -104,6 +111,7 @@ class SearchEngine:
         print("  --source=texto  : Filtrar por fuente")
         print("  --k=número      : Número de resultados")
         print("  --scores        : Mostrar scores")
+        print("  --context       : Incluir los chunks vecinos de cada resultado")
         print("-" * 50)
         
         while True:
@@ -123,6 +131,7 @@ class SearchEngine:
                 language = None
                 source = None
                 with_scores = False
+                expand_neighbors = None
                 
                 for part in parts:
                     if part.startswith('--lang='):
@@ -133,13 +142,15 @@ class SearchEngine:
                         k = int(part.split('=')[1])
                     elif part == '--scores':
                         with_scores = True
+                    elif part == '--context':
+                        expand_neighbors = True
                     else:
                         query_parts.append(part)
                 
                 query = ' '.join(query_parts)
                 
                 if query:
-                    self.search(query, k, language, source, with_scores)
+                    self.search(query, k, language, source, with_scores, expand_neighbors)
                 else:
                     print("Por favor ingresa una consulta válida")
                     
@@ -174,6 +185,7 @@ def main():
                 print("\nEjemplos:")
                 print("  python search.py 'estrategias de inversión'")
                 print("  python search.py 'warren buffett' --lang=en --k=3")
+                print("  python search.py 'margen de seguridad' --context")
                 return
             
             # Extraer parámetros
@@ -181,6 +193,7 @@ def main():
             language = None
             source = None
             with_scores = False
+            expand_neighbors = None
             
             query_parts = []
             for arg in sys.argv[1:]:
@@ -192,13 +205,15 @@ def main():
                     k = int(arg.split('=')[1])
                 elif arg == '--scores':
                     with_scores = True
+                elif arg == '--context':
+                    expand_neighbors = True
                 else:
                     query_parts.append(arg)
             
             query = ' '.join(query_parts)
             
             if query:
-                engine.search(query, k, language, source, with_scores)
+                engine.search(query, k, language, source, with_scores, expand_neighbors)
             else:
                 print("Por favor proporciona una consulta")
                 
@@ -21,22 +21,66 @@ class Settings(BaseSettings):
 
     # OpenAI Configuration
     openai_api_key: str = Field(..., description="OpenAI API Key")
+    openai_base_url: Optional[str] = Field(default=None, description="Base URL de la API de OpenAI (por ejemplo, el stub local de embeddings)")
+    embedding_request_timeout_seconds: Optional[float] = Field(default=None, description="Timeout de cada request de embeddings (segundos)")
     
     # MongoDB Configuration
     mongodb_uri: str = Field(..., description="MongoDB Atlas connection URI")
     db_name: str = Field(default="langchain_db", description="Database name")
     collection_name: str = Field(default="langchain_vectorstores", description="Collection name")
     atlas_vector_search_index_name: str = Field(default="vector_index", description="Vector search index name")
+    mongodb_bulk_batch_bytes: int = Field(default=8 * 1024 * 1024, description="Bytes BSON estimados por lote de insert_many")
+    mongodb_bulk_write_workers: int = Field(default=4, description="Lotes de insert_many enviados en paralelo")
+    mongodb_bulk_load: bool = Field(default=False, description="Carga masiva sin confirmación de escritura (w=0) con verificación final")
     
     # Embedding Configuration
+    embedding_provider: str = Field(default="openai", description="Proveedor de embeddings: openai, deterministic (offline) o local")
     embedding_model: str = Field(default="text-embedding-3-small", description="OpenAI embedding model")
     embedding_dimensions: int = Field(default=1024, description="Embedding dimensions")
+    embedding_batch_size: int = Field(default=256, description="Textos por request al endpoint de embeddings (máximo 2048)")
+    embedding_max_tokens_per_request: int = Field(default=300000, description="Tokens máximos por request de embeddings")
+    embedding_max_input_tokens: int = Field(default=8191, description="Tokens máximos por input del modelo de embeddings")
+    embedding_oversize_strategy: str = Field(default="truncate", description="Inputs demasiado largos: truncate o split (promedio ponderado)")
+    embedding_concurrency: int = Field(default=4, description="Requests de embeddings simultáneos")
+    embedding_requests_per_minute: int = Field(default=3000, description="Límite de requests por minuto del tier de OpenAI")
+    embedding_tokens_per_minute: int = Field(default=1000000, description="Límite de tokens por minuto del tier de OpenAI")
+    embedding_max_retries: int = Field(default=6, description="Reintentos ante errores transitorios (429, 5xx, red)")
+    embedding_backoff_base_seconds: float = Field(default=1.0, description="Espera base del backoff exponencial (segundos)")
+    embedding_backoff_max_seconds: float = Field(default=60.0, description="Espera máxima entre reintentos (segundos)")
+    embedding_memory_cache_enabled: bool = Field(default=True, description="Activar caché LRU en memoria delante del caché en disco")
+    embedding_memory_cache_mb: float = Field(default=64.0, description="Tamaño máximo del caché LRU en memoria (MB)")
+    embedding_cache_dtype: str = Field(default="float32", description="Tipo de los vectores en caché: float32 o float16")
+    embedding_cache_mmap_mb: int = Field(default=256, description="Ventana de I/O mapeada en memoria del caché SQLite (MB)")
+    deterministic_embedding_latency_ms: float = Field(default=0.0, description="Latencia simulada por request del proveedor deterministic (ms)")
+    deterministic_embedding_ms_per_1k_tokens: float = Field(default=0.0, description="Latencia simulada adicional por cada 1000 tokens (ms)")
+    local_embedding_model: str = Field(default="sentence-transformers/all-MiniLM-L6-v2", description="Modelo de sentence-transformers del proveedor local")
+    local_embedding_device: Optional[str] = Field(default=None, description="Dispositivo del modelo local (cpu, cuda); autodetectado si se omite")
     
     # Processing Configuration (optimizada para espacio y monitoreo)
     chunk_size: int = Field(default=512, description="Text chunk size for splitting (reducido para optimizar espacio)")
     chunk_overlap: int = Field(default=100, description="Text chunk overlap (reducido para optimizar espacio)")
+    chunk_size_tokens: int = Field(default=256, description="Tamaño máximo de cada chunk en tokens (CHUNKING_STRATEGY=token)")
+    chunk_overlap_tokens: int = Field(default=32, description="Solapamiento entre chunks en tokens (CHUNKING_STRATEGY=token)")
+    pdf_extractor: str = Field(default="pypdf", description="Extractor de texto de PDFs: pypdf, pypdf_layout, pymupdf o pdfminer")
+    pdf_extractor_rules: str = Field(default="", description="Extractor por archivo o directorio: 'patrón=extractor' separados por ';' (rutas relativas a FILES_DIR)")
+    pdf_parse_workers: int = Field(default=1, description="Procesos para parsear PDFs en paralelo (1 = secuencial)")
+    pdf_parse_timeout_seconds: float = Field(default=300.0, description="Tiempo máximo de parseo de cada rango de páginas de un PDF (segundos)")
+    pdf_parse_pages_per_task: int = Field(default=100, description="Páginas por tarea al parsear PDFs grandes en paralelo")
+    pdf_text_cache_enabled: bool = Field(default=True, description="Guardar el texto extraído de los PDFs en caché por hash de contenido")
+    pdf_text_cache_dir: str = Field(default="parsed_cache", description="Directorio del caché de texto extraído de PDFs")
+    pdf_text_cache_max_mb: float = Field(default=512.0, description="Tamaño máximo del caché de texto (MB comprimidos); se desalojan las entradas menos usadas")
+    chunking_strategy: str = Field(default="recursive", description="División en chunks: recursive, content_defined (límites estables ante ediciones) o token (tamaños en tokens)")
+    split_workers: int = Field(default=1, description="Procesos para dividir documentos en chunks (1 = en el proceso principal)")
+    split_batch_pages: int = Field(default=64, description="Páginas por tarea al dividir en procesos separados")
+    search_expand_neighbors: bool = Field(default=False, description="Agregar a cada resultado de búsqueda sus chunks anterior y siguiente (permite reducir CHUNK_OVERLAP)")
     batch_size: int = Field(default=25, description="Batch size for processing documents (reducido para mejor monitoreo)")
-    json_batch_size: int = Field(default=1, description="Batch size for JSON documents")
+    json_batch_size: int = Field(default=100, description="Batch size for JSON documents")
+    ingest_incremental: bool = Field(default=True, description="Procesar solo archivos nuevos o modificados según el manifest")
+    ingest_state_dir: str = Field(default="ingest_state", description="Directorio del manifest de ingesta incremental")
+    ingest_pipelined: bool = Field(default=False, description="Superponer embeddings y escrituras a MongoDB durante la ingesta")
+    ingest_pipeline_queue_size: int = Field(default=2, description="Capacidad de las colas entre etapas del pipeline de ingesta")
+    ingest_streaming: bool = Field(default=False, description="Ingesta en streaming (páginas, split, embed y escritura en un pipeline acotado)")
+    ingest_stream_window: int = Field(default=4, description="Elementos en vuelo entre etapas de la ingesta en streaming")
     
     # Space Management Configuration (nueva configuración)
     space_check_interval: int = Field(default=100, description="Intervalo de documentos para verificar espacio")
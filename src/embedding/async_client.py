@@ -0,0 +1,271 @@
+"""
+Cliente asíncrono de embeddings con concurrencia acotada y rate limiting.
+"""
+import asyncio
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Coroutine, List, Optional, Sequence, TypeVar
+
+import openai
+
+from src.utils.logger import get_logger
+
+logger = get_logger()
+
+T = TypeVar('T')
+
+EmbedBatchFn = Callable[[List[str]], Awaitable[List[List[float]]]]
+BatchCallback = Callable[[int, List[str], List[List[float]], float], None]
+
+# Códigos HTTP que justifican reintentar
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class AsyncTokenBucket:
+    """Token bucket asíncrono con recarga continua expresada por minuto."""
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        """Inicializa el bucket lleno; ``capacity`` por defecto es un minuto."""
+        self.rate_per_second = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else float(per_minute)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        """Agrega los tokens acumulados desde la última actualización."""
+        now = time.monotonic()
+        elapsed = now - self._updated_at
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate_per_second)
+        self._updated_at = now
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """Espera hasta poder consumir ``amount`` tokens; retorna la espera total.
+
+        Un pedido mayor que la capacidad se limita a la capacidad para que
+        no quede bloqueado indefinidamente.
+        """
+        amount = min(amount, self.capacity)
+        waited = 0.0
+
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return waited
+
+                delay = (amount - self._tokens) / self.rate_per_second
+                waited += delay
+                await asyncio.sleep(delay)
+
+
+class _BackgroundLoop:
+    """Event loop persistente en un hilo propio.
+
+    Los clientes HTTP asíncronos quedan ligados al loop donde se usan por
+    primera vez, así que todas las llamadas síncronas reutilizan este loop
+    en lugar de crear uno nuevo por llamada.
+    """
+
+    _instance: Optional["_BackgroundLoop"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        """Inicia el loop en un hilo daemon."""
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self.loop.run_forever,
+            name="embedding-event-loop",
+            daemon=True
+        )
+        self._thread.start()
+
+    @classmethod
+    def get(cls) -> "_BackgroundLoop":
+        """Obtiene el loop compartido, creándolo si hace falta."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+
+def run_sync(coro: Coroutine[Any, Any, T]) -> T:
+    """Ejecuta una corrutina desde código síncrono y espera su resultado.
+
+    Funciona también si el llamador ya está dentro de un event loop (por
+    ejemplo, en un notebook), ya que la corrutina corre en otro hilo.
+    """
+    background = _BackgroundLoop.get()
+    future = asyncio.run_coroutine_threadsafe(coro, background.loop)
+    return future.result()
+
+
+def estimate_tokens(texts: Sequence[str]) -> int:
+    """Estimación rápida de tokens (~4 caracteres por token)."""
+    return sum(len(text) // 4 + 1 for text in texts)
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    """Extrae ``Retry-After`` (o ``retry-after-ms``) de la respuesta, si existe."""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get('retry-after-ms')
+    if retry_after_ms is not None:
+        try:
+            return float(retry_after_ms) / 1000.0
+        except ValueError:
+            pass
+
+    retry_after = headers.get('retry-after')
+    if retry_after is not None:
+        try:
+            return float(retry_after)
+        except ValueError:
+            return None
+
+    return None
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Indica si un error de la API es transitorio."""
+    if isinstance(error, (openai.APIConnectionError, asyncio.TimeoutError)):
+        return True
+    return getattr(error, 'status_code', None) in RETRYABLE_STATUS_CODES
+
+
+class AsyncEmbeddingClient:
+    """Envía lotes de embeddings en paralelo respetando los límites de la API.
+
+    Limita la concurrencia con un semáforo, aplica token buckets de requests
+    y tokens por minuto, y reintenta con backoff exponencial (respetando
+    ``Retry-After``) los errores transitorios como 429.
+    """
+
+    def __init__(
+        self,
+        embed_batch: EmbedBatchFn,
+        concurrency: int,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_retries: int,
+        backoff_base: float,
+        backoff_max: float,
+        count_tokens: Callable[[Sequence[str]], int] = estimate_tokens
+    ):
+        """Inicializa el cliente."""
+        self.embed_batch = embed_batch
+        self.concurrency = max(1, concurrency)
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.count_tokens = count_tokens
+
+        # Se crean dentro del event loop en el primer uso y se comparten
+        # entre llamadas, de modo que los límites son globales al cliente.
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._request_bucket: Optional[AsyncTokenBucket] = None
+        self._token_bucket: Optional[AsyncTokenBucket] = None
+
+    def _ensure_limiters(self) -> None:
+        """Crea el semáforo y los token buckets si aún no existen."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._request_bucket = AsyncTokenBucket(self.requests_per_minute)
+            self._token_bucket = AsyncTokenBucket(self.tokens_per_minute)
+
+    def _backoff_delay(self, attempt: int, error: Exception) -> float:
+        """Calcula la espera antes del siguiente intento."""
+        retry_after = _retry_after_seconds(error)
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _embed_with_retries(
+        self,
+        texts: List[str],
+        token_count: int
+    ) -> List[List[float]]:
+        """Envía un lote, reintentando los errores transitorios."""
+        attempt = 0
+        while True:
+            async with self._semaphore:
+                await self._request_bucket.acquire(1)
+                await self._token_bucket.acquire(token_count)
+                try:
+                    return await self.embed_batch(texts)
+                except Exception as e:
+                    if not _is_retryable(e) or attempt >= self.max_retries:
+                        raise
+                    error = e
+
+            delay = self._backoff_delay(attempt, error)
+            attempt += 1
+            logger.log_event(
+                'embedding_request_retry',
+                level='WARNING',
+                attempt=attempt,
+                delay_seconds=delay,
+                status_code=getattr(error, 'status_code', None),
+                error=str(error)
+            )
+            await asyncio.sleep(delay)
+
+    async def embed_batches(
+        self,
+        batches: List[List[str]],
+        on_batch_complete: Optional[BatchCallback] = None,
+        token_counts: Optional[List[int]] = None
+    ) -> List[List[List[float]]]:
+        """Genera embeddings para varios lotes en paralelo, en orden.
+
+        ``on_batch_complete(indice, textos, embeddings, duracion)`` se invoca a
+        medida que termina cada lote, en un hilo del executor del loop (puede
+        bloquear, p. ej. escribir en el caché). ``token_counts`` permite pasar los
+        tokens ya contados de cada lote. Si un lote falla definitivamente, se
+        cancelan los pendientes y se propaga el error.
+        """
+        self._ensure_limiters()
+
+        async def run_batch(index: int, texts: List[str]) -> List[List[float]]:
+            start_time = time.time()
+            embeddings = await self._embed_with_retries(
+                texts,
+                token_counts[index] if token_counts else self.count_tokens(texts)
+            )
+            if on_batch_complete is not None:
+                # En un hilo aparte: el callback escribe en el caché y no debe
+                # detener las demás requests del event loop compartido
+                await asyncio.to_thread(
+                    on_batch_complete, index, texts, embeddings, time.time() - start_time
+                )
+            return embeddings
+
+        tasks = [
+            asyncio.ensure_future(run_batch(index, batch))
+            for index, batch in enumerate(batches)
+        ]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    def embed_batches_sync(
+        self,
+        batches: List[List[str]],
+        on_batch_complete: Optional[BatchCallback] = None,
+        token_counts: Optional[List[int]] = None
+    ) -> List[List[List[float]]]:
+        """Versión síncrona de ``embed_batches`` para llamadores no asíncronos."""
+        return run_sync(self.embed_batches(batches, on_batch_complete, token_counts))
@@ -0,0 +1,53 @@
+"""
+Empaquetado de inputs en requests de embeddings según tokens e inputs.
+"""
+from typing import List, Sequence
+
+import numpy as np
+
+
+def pack_batches(
+    token_counts: Sequence[int],
+    max_tokens: int,
+    max_inputs: int
+) -> List[List[int]]:
+    """Agrupa índices de inputs en lotes, en orden y de forma greedy.
+
+    Cada lote respeta a la vez ``max_tokens`` tokens totales y ``max_inputs``
+    inputs. Un input que por sí solo supera ``max_tokens`` va en un lote
+    propio (debe truncarse o dividirse antes de llegar aquí).
+    """
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+
+    for index, tokens in enumerate(token_counts):
+        if current and (
+            current_tokens + tokens > max_tokens or len(current) >= max_inputs
+        ):
+            batches.append(current)
+            current = []
+            current_tokens = 0
+
+        current.append(index)
+        current_tokens += tokens
+
+    if current:
+        batches.append(current)
+    return batches
+
+
+def combine_piece_embeddings(
+    embeddings: Sequence[Sequence[float]],
+    weights: Sequence[int]
+) -> List[float]:
+    """Combina los embeddings de los fragmentos de un texto dividido.
+
+    Promedia ponderando por tokens y normaliza el resultado, igual que hace
+    el cliente de OpenAI de LangChain con textos más largos que el contexto.
+    """
+    average = np.average(np.asarray(embeddings, dtype=np.float64), axis=0, weights=weights)
+    norm = np.linalg.norm(average)
+    if norm > 0:
+        average = average / norm
+    return average.tolist()
@@ -0,0 +1,310 @@
+"""
+Almacenamiento de embeddings en caché sobre un único archivo SQLite.
+"""
+import pickle
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# Límite conservador de parámetros por sentencia en SQLite
+_MAX_SQL_VARIABLES = 500
+
+# Versión del formato de los vectores almacenados (forma parte del namespace).
+# v1: lista pickleada; v2: arreglo contiguo float32/float16.
+CACHE_FORMAT_VERSION = 2
+
+# Tipos admitidos para almacenar los vectores
+SUPPORTED_DTYPES = ("float32", "float16")
+
+# Versión del esquema del archivo SQLite (PRAGMA user_version)
+SCHEMA_VERSION = 2
+
+# Namespace asignado a entradas anteriores al esquema con namespaces
+LEGACY_NAMESPACE = "legacy"
+
+
+def build_cache_namespace(
+    model: str,
+    dimensions: int,
+    dtype: str = "float32",
+    provider: str = "openai"
+) -> str:
+    """Construye el namespace de caché para un modelo, dimensión y tipo.
+
+    Los proveedores distintos de OpenAI llevan su nombre como prefijo, de
+    modo que sus vectores nunca se mezclan con los de la API.
+    """
+    namespace = f"{model}@{dimensions}:v{CACHE_FORMAT_VERSION}/{dtype}"
+    if provider != "openai":
+        namespace = f"{provider}:{namespace}"
+    return namespace
+
+
+class SQLiteEmbeddingCache:
+    """Caché de embeddings en un único archivo SQLite.
+
+    Usa modo WAL para permitir lectores concurrentes (incluso desde otros
+    procesos) mientras un escritor inserta, y cada escritura es una
+    transacción atómica. Las entradas se agrupan por namespace (modelo,
+    dimensión y versión de formato), de modo que varios namespaces conviven
+    en el mismo archivo; lecturas y escrituras operan sobre el namespace
+    de la instancia.
+
+    Los vectores se guardan como arreglos contiguos ``float32`` (u
+    ``float16``). ``mmap_size_mb`` habilita la I/O mapeada en memoria de
+    SQLite para leer sus páginas; cada lectura copia el blob en un ``bytes``
+    y lo decodifica sin otra copia en un ``np.ndarray`` de solo lectura, sin
+    crear un objeto ``float`` por componente.
+    """
+
+    DB_FILENAME = "embeddings.sqlite3"
+
+    def __init__(
+        self,
+        db_path: Path,
+        namespace: str,
+        dtype: str = "float32",
+        mmap_size_mb: int = 256
+    ):
+        """Inicializa el almacenamiento y crea o actualiza el esquema."""
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported cache dtype: {dtype}")
+
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.namespace = namespace
+        self.dtype = np.dtype(dtype)
+        self.mmap_size = int(mmap_size_mb) * 1024 * 1024
+        self._local = threading.local()
+        self._init_schema()
+
+    def _init_schema(self) -> None:
+        """Crea el esquema o migra el esquema sin namespaces."""
+        conn = self._connection()
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version == SCHEMA_VERSION:
+            return
+
+        with conn:
+            legacy_table = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'embeddings'"
+            ).fetchone()
+            if legacy_table:
+                conn.execute("ALTER TABLE embeddings RENAME TO embeddings_v1")
+
+            conn.execute(
+                """
+                CREATE TABLE embeddings (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    embedding BLOB NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                ) WITHOUT ROWID
+                """
+            )
+
+            # Sin información de modelo, las entradas previas quedan aisladas
+            if legacy_table:
+                conn.execute(
+                    "INSERT INTO embeddings (namespace, key, embedding, created_at) "
+                    "SELECT ?, key, embedding, created_at FROM embeddings_v1",
+                    (LEGACY_NAMESPACE,)
+                )
+                conn.execute("DROP TABLE embeddings_v1")
+
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _connection(self) -> sqlite3.Connection:
+        """Obtiene la conexión del hilo actual (una por hilo)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA mmap_size={self.mmap_size}")
+            self._local.conn = conn
+        return conn
+
+    def _encode(self, embedding: Union[Sequence[float], np.ndarray]) -> bytes:
+        """Serializa un embedding como arreglo contiguo del tipo configurado."""
+        return np.asarray(embedding, dtype=self.dtype).tobytes()
+
+    def _decode(self, blob: bytes) -> np.ndarray:
+        """Deserializa un embedding (vista de solo lectura sobre la copia del blob)."""
+        return np.frombuffer(blob, dtype=self.dtype)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Obtiene un embedding por clave."""
+        row = self._connection().execute(
+            "SELECT embedding FROM embeddings WHERE namespace = ? AND key = ?",
+            (self.namespace, key)
+        ).fetchone()
+        return self._decode(row[0]) if row else None
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, np.ndarray]:
+        """Obtiene varios embeddings; las claves ausentes se omiten."""
+        keys = list(dict.fromkeys(keys))
+        conn = self._connection()
+        found = {}
+
+        for start in range(0, len(keys), _MAX_SQL_VARIABLES):
+            batch = keys[start:start + _MAX_SQL_VARIABLES]
+            placeholders = ",".join("?" * len(batch))
+            rows = conn.execute(
+                "SELECT key, embedding FROM embeddings "
+                f"WHERE namespace = ? AND key IN ({placeholders})",
+                [self.namespace, *batch]
+            )
+            for key, blob in rows:
+                found[key] = self._decode(blob)
+
+        return found
+
+    def put(self, key: str, embedding: Union[Sequence[float], np.ndarray]) -> None:
+        """Guarda un embedding."""
+        self.put_many([(key, embedding)])
+
+    def put_many(
+        self,
+        items: Iterable[Tuple[str, Union[Sequence[float], np.ndarray]]]
+    ) -> int:
+        """Guarda varios embeddings en una única transacción."""
+        now = time.time()
+        rows = [
+            (self.namespace, key, self._encode(embedding), now)
+            for key, embedding in items
+        ]
+        if not rows:
+            return 0
+
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings "
+                "(namespace, key, embedding, created_at) VALUES (?, ?, ?, ?)",
+                rows
+            )
+        return len(rows)
+
+    def count(self, all_namespaces: bool = False) -> int:
+        """Número de embeddings del namespace actual (o de todos)."""
+        if all_namespaces:
+            query, params = "SELECT COUNT(*) FROM embeddings", ()
+        else:
+            query = "SELECT COUNT(*) FROM embeddings WHERE namespace = ?"
+            params = (self.namespace,)
+        return self._connection().execute(query, params).fetchone()[0]
+
+    def list_namespaces(self) -> List[Dict[str, object]]:
+        """Lista los namespaces presentes con su tamaño y última escritura."""
+        rows = self._connection().execute(
+            """
+            SELECT namespace, COUNT(*), SUM(LENGTH(embedding)), MAX(created_at)
+            FROM embeddings
+            GROUP BY namespace
+            ORDER BY namespace
+            """
+        )
+        return [
+            {
+                'namespace': namespace,
+                'entries': entries,
+                'payload_bytes': payload_bytes or 0,
+                'last_written': last_written,
+                'current': namespace == self.namespace
+            }
+            for namespace, entries, payload_bytes, last_written in rows
+        ]
+
+    def prune_namespaces(self, keep: Iterable[str]) -> Dict[str, int]:
+        """Elimina todos los namespaces excepto los indicados en ``keep``.
+
+        Retorna el número de entradas eliminadas por namespace.
+        """
+        keep = set(keep)
+        removed = {}
+        conn = self._connection()
+
+        with conn:
+            for info in self.list_namespaces():
+                namespace = info['namespace']
+                if namespace in keep:
+                    continue
+                conn.execute(
+                    "DELETE FROM embeddings WHERE namespace = ?", (namespace,)
+                )
+                removed[namespace] = info['entries']
+
+        if removed:
+            conn.execute("VACUUM")
+        return removed
+
+    def size_bytes(self) -> int:
+        """Tamaño en disco del archivo de caché (incluye el WAL)."""
+        total = 0
+        for suffix in ("", "-wal", "-shm"):
+            path = Path(f"{self.db_path}{suffix}")
+            if path.exists():
+                total += path.stat().st_size
+        return total
+
+    def clear(self) -> None:
+        """Elimina los embeddings de todos los namespaces y compacta el archivo."""
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM embeddings")
+        conn.execute("VACUUM")
+
+    def import_pickle_dir(
+        self,
+        directory: Path,
+        delete_source: bool = False,
+        batch_size: int = 1000
+    ) -> Tuple[int, int]:
+        """Importa archivos ``<clave>.pkl`` del formato de caché anterior.
+
+        Las entradas se importan en el namespace actual, por lo que deben
+        haberse generado con el mismo modelo y dimensión. Retorna la tupla
+        ``(importados, fallidos)``.
+        """
+        imported = 0
+        failed = 0
+        pending: List[Tuple[str, List[float]]] = []
+        pending_files: List[Path] = []
+
+        def flush() -> None:
+            nonlocal imported
+            imported += self.put_many(pending)
+            if delete_source:
+                for path in pending_files:
+                    path.unlink(missing_ok=True)
+            pending.clear()
+            pending_files.clear()
+
+        for pkl_file in Path(directory).glob("*.pkl"):
+            try:
+                with open(pkl_file, 'rb') as f:
+                    embedding = pickle.load(f)
+            except Exception:
+                failed += 1
+                continue
+
+            pending.append((pkl_file.stem, embedding))
+            pending_files.append(pkl_file)
+            if len(pending) >= batch_size:
+                flush()
+
+        flush()
+        return imported, failed
+
+    def close(self) -> None:
+        """Cierra la conexión del hilo actual."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
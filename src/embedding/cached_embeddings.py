@@ -0,0 +1,64 @@
+"""
+Adaptador de embeddings compatible con LangChain que usa el caché local.
+"""
+import threading
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from src.embedding.openai_embeddings import OpenAIEmbeddingManager
+
+
+class CachedEmbeddings(Embeddings):
+    """Implementación de ``Embeddings`` respaldada por ``OpenAIEmbeddingManager``.
+
+    Permite que ``MongoDBAtlasVectorSearch`` genere embeddings de ingesta y
+    de consulta a través del caché en lugar de llamar directamente a la API.
+    """
+
+    def __init__(self, embedding_manager: OpenAIEmbeddingManager):
+        """Inicializa el adaptador."""
+        self.embedding_manager = embedding_manager
+        self._lock = threading.Lock()
+        self._totals = {
+            'calls': 0,
+            'texts': 0,
+            'cache_hits': 0,
+            'cache_misses': 0,
+            'api_calls': 0
+        }
+
+    @property
+    def last_call_stats(self) -> dict:
+        """Hits y misses de caché de la última llamada de este hilo."""
+        return self.embedding_manager.last_call_stats
+
+    def get_stats(self) -> dict:
+        """Contadores acumulados de hits y misses de caché."""
+        with self._lock:
+            stats = dict(self._totals)
+
+        stats['cache_hit_rate'] = (
+            stats['cache_hits'] / stats['texts'] if stats['texts'] else 0
+        )
+        return stats
+
+    def _accumulate(self) -> None:
+        """Suma las estadísticas de la última llamada a los acumulados."""
+        call_stats = self.embedding_manager.last_call_stats
+        with self._lock:
+            self._totals['calls'] += 1
+            for key in ('texts', 'cache_hits', 'cache_misses', 'api_calls'):
+                self._totals[key] += call_stats.get(key, 0)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Genera embeddings para documentos usando el caché."""
+        embeddings = self.embedding_manager.embed_documents(texts)
+        self._accumulate()
+        return embeddings
+
+    def embed_query(self, text: str) -> List[float]:
+        """Genera el embedding de una consulta usando el caché."""
+        embedding = self.embedding_manager.embed_query(text)
+        self._accumulate()
+        return embedding
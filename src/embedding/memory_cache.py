@@ -0,0 +1,109 @@
+"""
+Caché LRU en memoria para embeddings, acotado por bytes.
+"""
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+# Overhead aproximado por entrada (clave, nodo del OrderedDict)
+_ENTRY_OVERHEAD_BYTES = 200
+
+
+def estimate_embedding_size(embedding: Any) -> int:
+    """Estima los bytes que ocupa un embedding en memoria."""
+    nbytes = getattr(embedding, 'nbytes', None)
+    if nbytes is not None:
+        return int(nbytes) + sys.getsizeof(embedding) + _ENTRY_OVERHEAD_BYTES
+
+    # Lista de floats: la lista más un objeto float por elemento
+    float_size = sys.getsizeof(0.0)
+    return sys.getsizeof(embedding) + float_size * len(embedding) + _ENTRY_OVERHEAD_BYTES
+
+
+class LRUMemoryCache:
+    """Caché LRU en memoria con límite de tamaño en bytes.
+
+    Se ubica delante del caché persistente: las consultas repetidas y los
+    chunks idénticos dentro de un mismo proceso no vuelven a disco.
+    """
+
+    def __init__(self, max_bytes: int):
+        """Inicializa el caché con un tamaño máximo en bytes."""
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._current_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Obtiene un embedding y lo marca como usado recientemente."""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Obtiene varios embeddings; las claves ausentes se omiten."""
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    found[key] = self._entries[key]
+                    self.hits += 1
+                else:
+                    self.misses += 1
+        return found
+
+    def put(self, key: str, embedding: Any) -> None:
+        """Guarda un embedding, desalojando los menos usados si hace falta."""
+        size = estimate_embedding_size(embedding)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._current_bytes -= self._sizes[key]
+            self._entries[key] = embedding
+            self._entries.move_to_end(key)
+            self._sizes[key] = size
+            self._current_bytes += size
+
+            while self._current_bytes > self.max_bytes:
+                evicted_key, _ = self._entries.popitem(last=False)
+                self._current_bytes -= self._sizes.pop(evicted_key)
+                self.evictions += 1
+
+    def put_many(self, items: Dict[str, Any]) -> None:
+        """Guarda varios embeddings."""
+        for key, embedding in items.items():
+            self.put(key, embedding)
+
+    def clear(self) -> None:
+        """Vacía el caché (los contadores se conservan)."""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._current_bytes = 0
+
+    def get_stats(self) -> dict:
+        """Contadores de uso del caché en memoria."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'memory_cache_entries': len(self._entries),
+                'memory_cache_bytes': self._current_bytes,
+                'memory_cache_max_bytes': self.max_bytes,
+                'memory_cache_hits': self.hits,
+                'memory_cache_misses': self.misses,
+                'memory_cache_evictions': self.evictions,
+                'memory_cache_hit_rate': self.hits / lookups if lookups else 0
+            }
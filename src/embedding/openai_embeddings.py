@@ -2,69 +2,190 @@
 Manejador de embeddings de OpenAI.
 """
 import hashlib
-import pickle
+import threading
 import time
+from collections import Counter
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional, Tuple, Union
 
-from langchain_openai import OpenAIEmbeddings
+import numpy as np
 
 from src.config import get_settings
+from src.embedding.async_client import AsyncEmbeddingClient
+from src.embedding.batching import combine_piece_embeddings, pack_batches
+from src.embedding.cache_store import SQLiteEmbeddingCache, build_cache_namespace
+from src.embedding.memory_cache import LRUMemoryCache
+from src.embedding.providers import create_embedding_provider
+from src.embedding.single_flight import SingleFlight
 from src.utils.logger import get_logger, measure_time
+from src.utils.tokenizer import get_token_counter
 
 settings = get_settings()
 logger = get_logger()
 
+Vector = Union[List[float], np.ndarray]
+
+# Tratamiento de los inputs que superan ``embedding_max_input_tokens``
+OVERSIZE_STRATEGIES = ("truncate", "split")
+
+
+def as_float_list(embedding: Vector) -> List[float]:
+    """Convierte un embedding (lista o arreglo NumPy) en lista de floats."""
+    if isinstance(embedding, np.ndarray):
+        return embedding.tolist()
+    return embedding
+
 
 class OpenAIEmbeddingManager:
-    """Manejador de embeddings de OpenAI con caché local."""
-    
-    def __init__(self, cache_dir: Optional[str] = None):
-        """Inicializa el manejador de embeddings."""
-        self.embeddings = OpenAIEmbeddings(
-            model=settings.embedding_model,
-            dimensions=settings.embedding_dimensions,
-            openai_api_key=settings.openai_api_key
+    """Manejador de embeddings con caché local.
+
+    Por defecto usa la API de OpenAI; ``EMBEDDING_PROVIDER`` permite elegir
+    otro proveedor registrado en ``src.embedding.providers``.
+    """
+    
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        model: Optional[str] = None,
+        dimensions: Optional[int] = None,
+        provider: Optional[str] = None
+    ):
+        """Inicializa el manejador de embeddings.
+
+        ``model``, ``dimensions`` y ``provider`` permiten sobrescribir la
+        configuración, por ejemplo para comparar variantes que comparten el
+        mismo caché.
+        """
+        if settings.embedding_oversize_strategy not in OVERSIZE_STRATEGIES:
+            raise ValueError(
+                f"Unknown embedding oversize strategy '{settings.embedding_oversize_strategy}'. "
+                f"Available: {', '.join(OVERSIZE_STRATEGIES)}"
+            )
+        
+        self.provider = provider or settings.embedding_provider
+        self.embeddings = create_embedding_provider(
+            self.provider,
+            model or settings.embedding_model,
+            dimensions or settings.embedding_dimensions
+        )
+        # El proveedor puede fijar su propio modelo y dimensión (modelo local)
+        self.model = self.embeddings.model
+        self.dimensions = self.embeddings.dimensions
+        self.token_counter = get_token_counter(self.model)
+        self.single_flight = SingleFlight()
+        self.async_client = AsyncEmbeddingClient(
+            self._aembed_batch,
+            concurrency=settings.embedding_concurrency,
+            requests_per_minute=settings.embedding_requests_per_minute,
+            tokens_per_minute=settings.embedding_tokens_per_minute,
+            max_retries=settings.embedding_max_retries,
+            backoff_base=settings.embedding_backoff_base_seconds,
+            backoff_max=settings.embedding_backoff_max_seconds
         )
         
         # Configurar directorio de caché
         self.cache_dir = Path(cache_dir) if cache_dir else Path("./embedding_cache")
         self.cache_dir.mkdir(exist_ok=True)
+        self.cache_namespace = build_cache_namespace(
+            self.model,
+            self.dimensions,
+            settings.embedding_cache_dtype,
+            provider=self.provider
+        )
+        self.cache_store = SQLiteEmbeddingCache(
+            self.cache_dir / SQLiteEmbeddingCache.DB_FILENAME,
+            namespace=self.cache_namespace,
+            dtype=settings.embedding_cache_dtype,
+            mmap_size_mb=settings.embedding_cache_mmap_mb
+        )
+        
+        # Nivel en memoria delante del caché persistente
+        self.memory_cache = (
+            LRUMemoryCache(int(settings.embedding_memory_cache_mb * 1024 * 1024))
+            if settings.embedding_memory_cache_enabled
+            else None
+        )
+        
+        # Estadísticas de la última llamada (por hilo)
+        self._call_stats = threading.local()
         
         logger.log_event(
             'embedding_manager_initialized',
-            model=settings.embedding_model,
-            dimensions=settings.embedding_dimensions,
-            cache_dir=str(self.cache_dir)
+            provider=self.provider,
+            model=self.model,
+            dimensions=self.dimensions,
+            cache_dir=str(self.cache_dir),
+            cache_file=str(self.cache_store.db_path),
+            cache_namespace=self.cache_namespace
         )
     
+    async def _aembed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Envía un único request de embeddings para ``texts``."""
+        return await self.embeddings.aembed_documents(texts, chunk_size=len(texts))
+    
+    @property
+    def last_call_stats(self) -> dict:
+        """Hits, misses y requests de la última llamada de este hilo."""
+        return getattr(self._call_stats, 'value', {})
+    
+    def _record_call_stats(
+        self,
+        texts: int,
+        cache_hits: int,
+        cache_misses: int,
+        api_calls: int,
+        tokens: int = 0,
+        coalesced: int = 0
+    ) -> None:
+        """Registra las estadísticas de la llamada en curso."""
+        self._call_stats.value = {
+            'texts': texts,
+            'cache_hits': cache_hits,
+            'cache_misses': cache_misses,
+            'api_calls': api_calls,
+            'api_tokens': tokens,
+            'coalesced': coalesced
+        }
+    
     def _get_cache_key(self, text: str) -> str:
-        """Genera una clave de caché para el texto."""
+        """Genera una clave de caché para el texto.
+
+        La clave solo depende del texto; el modelo, la dimensión y la versión
+        de formato se aíslan mediante ``cache_namespace``.
+        """
         return hashlib.sha256(text.encode()).hexdigest()
     
     def _get_cache_file(self, cache_key: str) -> Path:
-        """Obtiene la ruta del archivo de caché."""
+        """Obtiene la ruta del archivo de caché legado (un pickle por embedding)."""
         return self.cache_dir / f"{cache_key}.pkl"
     
-    def _load_from_cache(self, text: str) -> Optional[List[float]]:
-        """Carga un embedding desde caché."""
+    def _to_array(self, embedding: Vector) -> np.ndarray:
+        """Convierte un embedding al tipo compacto del caché."""
+        return np.asarray(embedding, dtype=self.cache_store.dtype)
+    
+    def _load_from_cache(self, text: str) -> Optional[np.ndarray]:
+        """Carga un embedding desde caché (arreglo NumPy de solo lectura)."""
         try:
             cache_key = self._get_cache_key(text)
-            cache_file = self._get_cache_file(cache_key)
             
-            if cache_file.exists():
-                with open(cache_file, 'rb') as f:
-                    embedding = pickle.load(f)
+            if self.memory_cache is not None:
+                embedding = self.memory_cache.get(cache_key)
+                if embedding is not None:
+                    return embedding
+            
+            embedding = self.cache_store.get(cache_key)
+            
+            if embedding is not None:
+                if self.memory_cache is not None:
+                    self.memory_cache.put(cache_key, embedding)
                 
                 logger.log_event(
                     'embedding_cache_hit',
                     text_length=len(text),
                     cache_key=cache_key[:16]
                 )
-                
-                return embedding
             
-            return None
+            return embedding
             
         except Exception as e:
             logger.log_event(
@@ -75,14 +196,46 @@ class OpenAIEmbeddingManager:
             )
             return None
     
-    def _save_to_cache(self, text: str, embedding: List[float]) -> None:
+    def _load_many_from_cache(self, texts: List[str]) -> Dict[str, np.ndarray]:
+        """Carga varios embeddings desde caché en una sola consulta."""
+        try:
+            keys = {text: self._get_cache_key(text) for text in texts}
+            found = {}
+            
+            if self.memory_cache is not None:
+                found = self.memory_cache.get_many(keys.values())
+            
+            missing = [key for key in keys.values() if key not in found]
+            if missing:
+                from_disk = self.cache_store.get_many(missing)
+                if self.memory_cache is not None:
+                    self.memory_cache.put_many(from_disk)
+                found.update(from_disk)
+            
+            return {
+                text: found[key]
+                for text, key in keys.items()
+                if key in found
+            }
+            
+        except Exception as e:
+            logger.log_event(
+                'embedding_cache_error',
+                level='WARNING',
+                text_count=len(texts),
+                error=str(e)
+            )
+            return {}
+    
+    def _save_to_cache(self, text: str, embedding: Vector) -> None:
         """Guarda un embedding en caché."""
         try:
             cache_key = self._get_cache_key(text)
-            cache_file = self._get_cache_file(cache_key)
+            array = self._to_array(embedding)
+            self.cache_store.put(cache_key, array)
             
-            with open(cache_file, 'wb') as f:
-                pickle.dump(embedding, f)
+            if self.memory_cache is not None:
+                self.memory_cache.put(cache_key, array)
             
             logger.log_event(
                 'embedding_cached',
@@ -98,22 +251,56 @@ class OpenAIEmbeddingManager:
                 error=str(e)
             )
     
+    def _save_many_to_cache(self, items: Dict[str, Vector]) -> None:
+        """Guarda varios embeddings en caché en una única transacción."""
+        try:
+            keyed = {
+                self._get_cache_key(text): self._to_array(embedding)
+                for text, embedding in items.items()
+            }
+            saved = self.cache_store.put_many(keyed.items())
+            
+            if self.memory_cache is not None:
+                self.memory_cache.put_many(keyed)
+            
+            logger.log_event('embeddings_cached', count=saved)
+            
+        except Exception as e:
+            logger.log_event(
+                'embedding_cache_save_error',
+                level='WARNING',
+                text_count=len(items),
+                error=str(e)
+            )
+    
     @measure_time
     def embed_query(self, text: str) -> List[float]:
         """Genera embedding para una consulta."""
         # Intentar cargar desde caché
         cached_embedding = self._load_from_cache(text)
         if cached_embedding is not None:
-            return cached_embedding
+            self._record_call_stats(1, cache_hits=1, cache_misses=0, api_calls=0)
+            return as_float_list(cached_embedding)
         
         # Generar nuevo embedding
         try:
             start_time = time.time()
-            embedding = self.embeddings.embed_query(text)
+            embeddings, request_stats = self._embed_coalesced(
+                [text],
+                batch_size=1,
+                save=lambda items: self._save_to_cache(text, items[text])
+            )
+            embedding = as_float_list(embeddings[0])
             duration = time.time() - start_time
             
-            # Guardar en caché
-            self._save_to_cache(text, embedding)
+            self._record_call_stats(
+                1,
+                cache_hits=0,
+                cache_misses=1,
+                api_calls=request_stats['requests'],
+                tokens=request_stats['tokens'],
+                coalesced=request_stats['coalesced']
+            )
             
             logger.log_embedding_generation(
                 text_length=len(text),
@@ -131,64 +318,274 @@ class OpenAIEmbeddingManager:
             )
             raise
     
+    def _embed_coalesced(
+        self,
+        texts: List[str],
+        batch_size: int,
+        save: Callable[[Dict[str, List[float]]], None]
+    ) -> Tuple[List[Vector], dict]:
+        """Genera embeddings sin duplicar requests concurrentes.
+
+        Solo se llama a la API para las claves que este llamador reclama en
+        ``single_flight``; las que ya están en curso en otro hilo se esperan
+        y reciben el mismo resultado. ``texts`` no debe tener duplicados.
+        """
+        keys = {text: self._get_cache_key(text) for text in texts}
+        owned_keys, waiting = self.single_flight.claim(keys.values())
+        owned = set(owned_keys)
+        results: Dict[str, Vector] = {}
+        request_stats = {'requests': 0, 'tokens': 0}
+        
+        try:
+            # Otro llamador pudo terminar entre la consulta al caché y el claim
+            owned_texts = [text for text in texts if keys[text] in owned]
+            cached = self._load_many_from_cache(owned_texts) if owned_texts else {}
+            late_hits = {text: cached[text] for text in owned_texts if text in cached}
+            for text, embedding in late_hits.items():
+                results[text] = embedding
+                self.single_flight.resolve(keys[text], embedding)
+            
+            to_embed = [text for text in owned_texts if text not in late_hits]
+            if to_embed:
+                def save_and_publish(items: Dict[str, List[float]]) -> None:
+                    save(items)
+                    for text, embedding in items.items():
+                        self.single_flight.resolve(keys[text], embedding)
+                
+                embeddings, request_stats = self._embed_uncached(
+                    to_embed,
+                    batch_size=batch_size,
+                    save=save_and_publish
+                )
+                results.update(zip(to_embed, embeddings))
+                
+        except BaseException as e:
+            # Libera las claves pendientes y propaga el error a quienes esperan
+            self.single_flight.fail(owned_keys, e)
+            raise
+        
+        for text in texts:
+            if text not in results:
+                results[text] = waiting[keys[text]].result()
+        
+        if waiting:
+            logger.log_event('embedding_requests_coalesced', count=len(waiting))
+        
+        return (
+            [results[text] for text in texts],
+            {**request_stats, 'coalesced': len(waiting)}
+        )
+    
+    def _prepare_inputs(self, texts: List[str]) -> List[Tuple[int, str, int]]:
+        """Convierte textos en inputs ``(dueño, texto, tokens)`` para la API.
+
+        Los textos que superan ``embedding_max_input_tokens`` se truncan o se
+        dividen en fragmentos según ``embedding_oversize_strategy``.
+        """
+        max_input_tokens = settings.embedding_max_input_tokens
+        inputs = []
+        
+        for owner, (text, tokens) in enumerate(
+            zip(texts, self.token_counter.count_many(texts))
+        ):
+            if tokens <= max_input_tokens:
+                inputs.append((owner, text, tokens))
+                continue
+            
+            if settings.embedding_oversize_strategy == 'split':
+                pieces = self.token_counter.split(text, max_input_tokens)
+            else:
+                pieces = [self.token_counter.truncate(text, max_input_tokens)]
+            
+            logger.log_event(
+                'embedding_input_oversized',
+                level='WARNING',
+                tokens=tokens,
+                max_input_tokens=max_input_tokens,
+                strategy=settings.embedding_oversize_strategy,
+                pieces=len(pieces)
+            )
+            
+            for piece in pieces:
+                inputs.append((owner, piece, self.token_counter.count(piece)))
+        
+        return inputs
+    
+    def _embed_uncached(
+        self,
+        texts: List[str],
+        batch_size: int,
+        save: Callable[[Dict[str, List[float]]], None]
+    ) -> Tuple[List[List[float]], dict]:
+        """Genera embeddings vía API para textos sin caché.
+
+        Empaqueta los inputs por tokens e inputs por request, guarda cada
+        texto con ``save`` en cuanto su embedding está completo y retorna los
+        embeddings junto con el número de requests y tokens enviados.
+        """
+        inputs = self._prepare_inputs(texts)
+        pieces_per_owner = Counter(owner for owner, _, _ in inputs)
+        batches = pack_batches(
+            [tokens for _, _, tokens in inputs],
+            max_tokens=settings.embedding_max_tokens_per_request,
+            max_inputs=batch_size
+        )
+        batch_tokens = [sum(inputs[i][2] for i in batch) for batch in batches]
+        
+        def on_batch_complete(
+            batch_index: int,
+            batch: List[str],
+            batch_embeddings: List[List[float]],
+            duration: float
+        ) -> None:
+            # Guardar en caché a medida que termina cada lote (los textos
+            # divididos se guardan al combinar sus fragmentos)
+            complete = {
+                texts[inputs[i][0]]: embedding
+                for i, embedding in zip(batches[batch_index], batch_embeddings)
+                if pieces_per_owner[inputs[i][0]] == 1
+            }
+            if complete:
+                save(complete)
+            
+            logger.log_embedding_generation(
+                text_length=sum(len(text) for text in batch),
+                status='success',
+                duration=duration
+            )
+            logger.log_event(
+                'embedding_batch_complete',
+                batch_index=batch_index,
+                batch_size=len(batch),
+                batch_tokens=batch_tokens[batch_index],
+                duration_seconds=duration
+            )
+        
+        results = self.async_client.embed_batches_sync(
+            [[inputs[i][1] for i in batch] for batch in batches],
+            on_batch_complete=on_batch_complete,
+            token_counts=batch_tokens
+        )
+        
+        # Reagrupar embeddings por texto original
+        pieces: Dict[int, List[Tuple[List[float], int]]] = {}
+        for batch, batch_embeddings in zip(batches, results):
+            for i, embedding in zip(batch, batch_embeddings):
+                owner, _, tokens = inputs[i]
+                pieces.setdefault(owner, []).append((embedding, tokens))
+        
+        embeddings = []
+        combined = {}
+        for owner, text in enumerate(texts):
+            owner_pieces = pieces[owner]
+            if len(owner_pieces) == 1:
+                embeddings.append(owner_pieces[0][0])
+                continue
+            
+            embedding = combine_piece_embeddings(
+                [embedding for embedding, _ in owner_pieces],
+                [tokens for _, tokens in owner_pieces]
+            )
+            embeddings.append(embedding)
+            combined[text] = embedding
+        
+        if combined:
+            save(combined)
+        
+        return embeddings, {'requests': len(batches), 'tokens': sum(batch_tokens)}
+    
     @measure_time
-    def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        """Genera embeddings para múltiples documentos."""
-        embeddings_result = []
+    def embed_documents(
+        self,
+        texts: List[str],
+        batch_size: Optional[int] = None,
+        as_numpy: bool = False
+    ) -> Union[List[List[float]], np.ndarray]:
+        """Genera embeddings para múltiples documentos.
+
+        Los textos que no están en caché se empaquetan en requests de hasta
+        ``batch_size`` inputs y ``embedding_max_tokens_per_request`` tokens,
+        se envían en paralelo dentro de los límites de la API, y los
+        resultados se reubican en el orden original junto con los hits de
+        caché. Con ``as_numpy=True`` retorna una matriz ``float32`` en lugar
+        de listas.
+        """
+        batch_size = batch_size or settings.embedding_batch_size
+        embeddings_result: List[Optional[Vector]] = [None] * len(texts)
         cache_hits = 0
-        api_calls = 0
         
-        for text in texts:
-            # Intentar cargar desde caché
-            cached_embedding = self._load_from_cache(text)
+        # Separar hits de caché y textos pendientes (sin duplicados)
+        cached = self._load_many_from_cache(texts)
+        pending: Dict[str, List[int]] = {}
+        for index, text in enumerate(texts):
+            cached_embedding = cached.get(text)
             if cached_embedding is not None:
-                embeddings_result.append(cached_embedding)
+                embeddings_result[index] = cached_embedding
                 cache_hits += 1
-                continue
-            
-            # Generar nuevo embedding
+            else:
+                pending.setdefault(text, []).append(index)
+        
+        pending_texts = list(pending)
+        request_stats = {'requests': 0, 'tokens': 0, 'coalesced': 0}
+        
+        if pending_texts:
             try:
-                start_time = time.time()
-                embedding = self.embeddings.embed_query(text)
-                duration = time.time() - start_time
-                
-                # Guardar en caché
-                self._save_to_cache(text, embedding)
-                
-                embeddings_result.append(embedding)
-                api_calls += 1
-                
-                logger.log_embedding_generation(
-                    text_length=len(text),
-                    status='success',
-                    duration=duration
+                new_embeddings, request_stats = self._embed_coalesced(
+                    pending_texts,
+                    batch_size=batch_size,
+                    save=self._save_many_to_cache
                 )
                 
-                # Rate limiting básico
-                if api_calls % 100 == 0:
-                    time.sleep(1)
-                
             except Exception as e:
                 logger.log_embedding_generation(
-                    text_length=len(text),
+                    text_length=sum(len(text) for text in pending_texts),
                     status='error',
                     error=str(e)
                 )
                 raise
+            
+            for text, embedding in zip(pending_texts, new_embeddings):
+                for index in pending[text]:
+                    embeddings_result[index] = embedding
+        
+        api_calls = request_stats['requests']
+        
+        self._record_call_stats(
+            len(texts),
+            cache_hits=cache_hits,
+            cache_misses=len(texts) - cache_hits,
+            api_calls=api_calls,
+            tokens=request_stats['tokens'],
+            coalesced=request_stats['coalesced']
+        )
         
         logger.log_event(
             'batch_embedding_complete',
             total_texts=len(texts),
             cache_hits=cache_hits,
             api_calls=api_calls,
+            api_tokens=request_stats['tokens'],
+            coalesced_texts=request_stats['coalesced'],
+            embedded_texts=len(pending_texts),
             cache_hit_rate=cache_hits / len(texts) if texts else 0
         )
         
-        return embeddings_result
+        if as_numpy:
+            if not texts:
+                return np.empty((0, self.dimensions), dtype=np.float32)
+            return np.vstack(embeddings_result).astype(np.float32, copy=False)
+        
+        return [as_float_list(embedding) for embedding in embeddings_result]
     
     def clear_cache(self) -> None:
         """Limpia el caché de embeddings."""
         try:
+            self.cache_store.clear()
+            
+            if self.memory_cache is not None:
+                self.memory_cache.clear()
+            
+            # Eliminar también archivos del formato anterior, si quedaran
             for cache_file in self.cache_dir.glob("*.pkl"):
                 cache_file.unlink()
             
@@ -202,19 +599,76 @@ class OpenAIEmbeddingManager:
             )
             raise
     
+    def migrate_legacy_cache(self, delete_legacy: bool = False) -> dict:
+        """Importa los archivos ``.pkl`` del caché anterior al almacenamiento SQLite."""
+        try:
+            imported, failed = self.cache_store.import_pickle_dir(
+                self.cache_dir,
+                delete_source=delete_legacy
+            )
+            
+            result = {
+                'imported': imported,
+                'failed': failed,
+                'legacy_deleted': delete_legacy
+            }
+            
+            logger.log_event('legacy_cache_migrated', **result)
+            
+            return result
+            
+        except Exception as e:
+            logger.log_event(
+                'legacy_cache_migration_error',
+                level='ERROR',
+                error=str(e)
+            )
+            raise
+    
+    def list_cache_namespaces(self) -> List[dict]:
+        """Lista los namespaces del caché; ``current`` marca el activo."""
+        return self.cache_store.list_namespaces()
+    
+    def prune_cache_namespaces(self, keep: Optional[List[str]] = None) -> dict:
+        """Elimina los namespaces obsoletos, conservando el actual y ``keep``."""
+        try:
+            keep_namespaces = {self.cache_namespace, *(keep or [])}
+            removed = self.cache_store.prune_namespaces(keep_namespaces)
+            
+            logger.log_event(
+                'cache_namespaces_pruned',
+                kept=sorted(keep_namespaces),
+                removed=removed
+            )
+            
+            return removed
+            
+        except Exception as e:
+            logger.log_event(
+                'cache_prune_error',
+                level='ERROR',
+                error=str(e)
+            )
+            raise
+    
     def get_cache_stats(self) -> dict:
         """Obtiene estadísticas del caché."""
         try:
-            cache_files = list(self.cache_dir.glob("*.pkl"))
-            total_size = sum(f.stat().st_size for f in cache_files)
+            total_size = self.cache_store.size_bytes()
             
             stats = {
-                'cache_files': len(cache_files),
+                'cache_namespace': self.cache_namespace,
+                'cache_entries': self.cache_store.count(),
+                'cache_entries_all_namespaces': self.cache_store.count(all_namespaces=True),
                 'total_size_bytes': total_size,
                 'total_size_mb': total_size / (1024 * 1024),
-                'cache_dir': str(self.cache_dir)
+                'cache_dir': str(self.cache_dir),
+                'cache_file': str(self.cache_store.db_path)
             }
             
+            if self.memory_cache is not None:
+                stats.update(self.memory_cache.get_stats())
+            
             logger.log_event('cache_stats_retrieved', **stats)
             
             return stats
@@ -225,4 +679,4 @@ class OpenAIEmbeddingManager:
                 level='ERROR',
                 error=str(e)
             )
-            raise
\ No newline at end of file
+            raise
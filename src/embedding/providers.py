@@ -0,0 +1,214 @@
+"""
+Proveedores de embeddings intercambiables.
+
+Cada proveedor es una implementación de ``Embeddings`` de LangChain que
+expone ``model`` y ``dimensions``. ``OpenAIEmbeddingManager`` envuelve al
+proveedor elegido con el mismo caché, batching, rate limiting y logging.
+"""
+import asyncio
+import hashlib
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_openai import OpenAIEmbeddings
+
+from src.config import get_settings
+from src.embedding.async_client import estimate_tokens
+from src.utils.logger import get_logger
+
+settings = get_settings()
+logger = get_logger()
+
+ProviderFactory = Callable[[str, int], Embeddings]
+
+
+class DeterministicEmbeddings(Embeddings):
+    """Embeddings sintéticos deterministas, sin red ni costo de API.
+
+    Cada texto se convierte en un vector normal aleatorio sembrado con el
+    SHA-256 del modelo y el texto, normalizado a norma 1. Opcionalmente
+    simula la latencia de un request (fija más un costo por cada 1000
+    tokens) para que los benchmarks de ingesta y búsqueda sean realistas.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        dimensions: int,
+        latency_ms: float = 0.0,
+        ms_per_1k_tokens: float = 0.0
+    ):
+        """Inicializa el proveedor."""
+        self.model = model
+        self.dimensions = dimensions
+        self.latency_ms = latency_ms
+        self.ms_per_1k_tokens = ms_per_1k_tokens
+
+    def _latency_seconds(self, texts: List[str]) -> float:
+        """Latencia simulada de un request con ``texts``."""
+        tokens = estimate_tokens(texts)
+        return (self.latency_ms + self.ms_per_1k_tokens * tokens / 1000.0) / 1000.0
+
+    def embed_vector(self, text: str) -> np.ndarray:
+        """Vector determinista (``float32``, norma 1) de un texto."""
+        digest = hashlib.sha256(f"{self.model}\0{text}".encode()).digest()
+        rng = np.random.default_rng(int.from_bytes(digest[:8], 'little'))
+        vector = rng.standard_normal(self.dimensions, dtype=np.float32)
+        return vector / np.linalg.norm(vector)
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        """Genera los vectores de ``texts``."""
+        return [self.embed_vector(text).tolist() for text in texts]
+
+    def embed_documents(
+        self,
+        texts: List[str],
+        chunk_size: Optional[int] = None
+    ) -> List[List[float]]:
+        """Genera embeddings para documentos."""
+        time.sleep(self._latency_seconds(texts))
+        return self._embed(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        """Genera el embedding de una consulta."""
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(
+        self,
+        texts: List[str],
+        chunk_size: Optional[int] = None
+    ) -> List[List[float]]:
+        """Versión asíncrona de ``embed_documents``."""
+        await asyncio.sleep(self._latency_seconds(texts))
+        return self._embed(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Versión asíncrona de ``embed_query``."""
+        return (await self.aembed_documents([text]))[0]
+
+
+class LocalModelEmbeddings(Embeddings):
+    """Embeddings de un modelo local de ``sentence-transformers``.
+
+    La dependencia es opcional: solo se importa al crear el proveedor. La
+    dimensión la fija el modelo, no ``EMBEDDING_DIMENSIONS``.
+    """
+
+    def __init__(self, model: str, device: Optional[str] = None):
+        """Carga el modelo local."""
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError(
+                "The 'local' embedding provider requires sentence-transformers: "
+                "pip install sentence-transformers"
+            ) from e
+
+        self.model = model
+        self._model = SentenceTransformer(model, device=device)
+        self.dimensions = self._model.get_sentence_embedding_dimension()
+
+    def embed_documents(
+        self,
+        texts: List[str],
+        chunk_size: Optional[int] = None
+    ) -> List[List[float]]:
+        """Genera embeddings normalizados para documentos."""
+        vectors = self._model.encode(
+            texts,
+            batch_size=chunk_size or 32,
+            normalize_embeddings=True,
+            convert_to_numpy=True
+        )
+        return vectors.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """Genera el embedding de una consulta."""
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(
+        self,
+        texts: List[str],
+        chunk_size: Optional[int] = None
+    ) -> List[List[float]]:
+        """Ejecuta la inferencia en un hilo para no bloquear el event loop."""
+        return await asyncio.to_thread(self.embed_documents, texts, chunk_size)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Versión asíncrona de ``embed_query``."""
+        return (await self.aembed_documents([text]))[0]
+
+
+def _create_openai(model: str, dimensions: int) -> Embeddings:
+    """Cliente de la API de OpenAI."""
+    return OpenAIEmbeddings(
+        model=model,
+        dimensions=dimensions,
+        openai_api_key=settings.openai_api_key,
+        openai_api_base=settings.openai_base_url,
+        request_timeout=settings.embedding_request_timeout_seconds,
+        # Los reintentos los gestiona AsyncEmbeddingClient
+        max_retries=0
+    )
+
+
+def _create_deterministic(model: str, dimensions: int) -> Embeddings:
+    """Proveedor offline determinista."""
+    return DeterministicEmbeddings(
+        model,
+        dimensions,
+        latency_ms=settings.deterministic_embedding_latency_ms,
+        ms_per_1k_tokens=settings.deterministic_embedding_ms_per_1k_tokens
+    )
+
+
+def _create_local(model: str, dimensions: int) -> Embeddings:
+    """Modelo local de sentence-transformers."""
+    provider = LocalModelEmbeddings(
+        settings.local_embedding_model,
+        device=settings.local_embedding_device
+    )
+    if provider.dimensions != dimensions:
+        logger.log_event(
+            'embedding_dimensions_overridden',
+            level='WARNING',
+            provider='local',
+            model=provider.model,
+            configured_dimensions=dimensions,
+            model_dimensions=provider.dimensions
+        )
+    return provider
+
+
+_PROVIDERS: Dict[str, ProviderFactory] = {
+    'openai': _create_openai,
+    'deterministic': _create_deterministic,
+    'local': _create_local,
+}
+
+
+def register_embedding_provider(name: str, factory: ProviderFactory) -> None:
+    """Registra (o reemplaza) un proveedor de embeddings.
+
+    ``factory(model, dimensions)`` debe retornar un ``Embeddings`` con
+    ``aembed_documents`` y los atributos ``model`` y ``dimensions``.
+    """
+    _PROVIDERS[name] = factory
+
+
+def available_embedding_providers() -> List[str]:
+    """Nombres de los proveedores registrados."""
+    return sorted(_PROVIDERS)
+
+
+def create_embedding_provider(name: str, model: str, dimensions: int) -> Embeddings:
+    """Crea el proveedor ``name`` para el modelo y la dimensión indicados."""
+    factory = _PROVIDERS.get(name)
+    if factory is None:
+        raise ValueError(
+            f"Unknown embedding provider '{name}'. "
+            f"Available: {', '.join(available_embedding_providers())}"
+        )
+    return factory(model, dimensions)
@@ -0,0 +1,61 @@
+"""
+Coalescencia de pedidos concurrentes de embeddings para la misma clave.
+"""
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, Iterable, List, Tuple
+
+
+class SingleFlight:
+    """Garantiza un único cálculo en curso por clave.
+
+    El primer llamador que reclama una clave queda como dueño y debe
+    resolverla (``resolve``) o marcarla como fallida (``fail``); los demás
+    reciben un ``Future`` que se completa con el mismo resultado.
+    """
+
+    def __init__(self):
+        """Inicializa el registro de claves en curso."""
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
+
+    def claim(self, keys: Iterable[str]) -> Tuple[List[str], Dict[str, Future]]:
+        """Reclama claves.
+
+        Retorna las claves de las que el llamador pasa a ser dueño y los
+        ``Future`` de las claves que ya calcula otro llamador.
+        """
+        owned = []
+        waiting = {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                future = self._in_flight.get(key)
+                if future is None:
+                    self._in_flight[key] = Future()
+                    owned.append(key)
+                else:
+                    waiting[key] = future
+        return owned, waiting
+
+    def resolve(self, key: str, value: Any) -> None:
+        """Publica el resultado de una clave y la libera."""
+        with self._lock:
+            future = self._in_flight.pop(key, None)
+        if future is not None:
+            future.set_result(value)
+
+    def fail(self, keys: Iterable[str], error: BaseException) -> None:
+        """Propaga un error a quienes esperan las claves y las libera."""
+        futures = []
+        with self._lock:
+            for key in keys:
+                future = self._in_flight.pop(key, None)
+                if future is not None:
+                    futures.append(future)
+        for future in futures:
+            future.set_exception(error)
+
+    def in_flight(self) -> int:
+        """Número de claves en curso."""
+        with self._lock:
+            return len(self._in_flight)
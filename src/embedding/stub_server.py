@@ -0,0 +1,342 @@
+"""
+Servidor local compatible con el endpoint de embeddings de OpenAI.
+
+Devuelve vectores deterministas (los mismos que el proveedor
+``deterministic``) y permite inyectar latencia, errores, 429 y cuotas por
+minuto para medir el comportamiento HTTP real de la ingesta sin costo.
+"""
+import base64
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.embedding.providers import DeterministicEmbeddings
+from src.utils.tokenizer import get_token_counter
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal", "exponential")
+
+Response = Tuple[int, Dict[str, str], dict]
+
+
+class LatencyModel:
+    """Distribución de la latencia simulada de cada request.
+
+    ``mean_ms`` es la media y ``jitter_ms`` la dispersión (medio ancho en
+    ``uniform``, desvío estándar en ``normal`` y ``lognormal``). Se suma un
+    costo proporcional a los tokens del request.
+    """
+
+    def __init__(
+        self,
+        distribution: str = "fixed",
+        mean_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        ms_per_1k_tokens: float = 0.0,
+        rng: Optional[random.Random] = None
+    ):
+        """Inicializa el modelo de latencia."""
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(
+                f"Unknown latency distribution '{distribution}'. "
+                f"Available: {', '.join(LATENCY_DISTRIBUTIONS)}"
+            )
+        self.distribution = distribution
+        self.mean_ms = mean_ms
+        self.jitter_ms = jitter_ms
+        self.ms_per_1k_tokens = ms_per_1k_tokens
+        self.rng = rng or random.Random()
+
+    def _sample_base_ms(self) -> float:
+        """Muestra la latencia base en milisegundos."""
+        mean, jitter = self.mean_ms, self.jitter_ms
+        if mean <= 0:
+            return 0.0
+        if self.distribution == "uniform":
+            return self.rng.uniform(mean - jitter, mean + jitter)
+        if self.distribution == "normal":
+            return self.rng.gauss(mean, jitter)
+        if self.distribution == "lognormal":
+            sigma = math.sqrt(math.log(1 + (jitter / mean) ** 2))
+            return self.rng.lognormvariate(math.log(mean) - sigma ** 2 / 2, sigma)
+        if self.distribution == "exponential":
+            return self.rng.expovariate(1.0 / mean)
+        return mean
+
+    def sample(self, tokens: int) -> float:
+        """Latencia (segundos) de un request con ``tokens`` tokens."""
+        latency_ms = self._sample_base_ms() + self.ms_per_1k_tokens * tokens / 1000.0
+        return max(0.0, latency_ms) / 1000.0
+
+
+class QuotaBucket:
+    """Cuota por minuto con reposición continua, como los límites de OpenAI."""
+
+    def __init__(self, per_minute: int):
+        """Inicializa la cuota llena."""
+        self.per_minute = per_minute
+        self._available = float(per_minute)
+        self._updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        """Repone la cuota acumulada desde la última actualización."""
+        now = time.monotonic()
+        self._available = min(
+            float(self.per_minute),
+            self._available + (now - self._updated_at) * self.per_minute / 60.0
+        )
+        self._updated_at = now
+
+    def retry_after(self, amount: int) -> float:
+        """Segundos hasta poder consumir ``amount`` (0 si ya es posible)."""
+        self._refill()
+        missing = min(amount, self.per_minute) - self._available
+        return max(0.0, missing * 60.0 / self.per_minute)
+
+    def consume(self, amount: int) -> None:
+        """Consume ``amount`` de la cuota."""
+        self._available -= amount
+
+    @property
+    def remaining(self) -> int:
+        """Cuota disponible."""
+        return max(0, int(self._available))
+
+
+def _error(message: str, error_type: str, code: Optional[str] = None) -> dict:
+    """Cuerpo de error con el formato de la API de OpenAI."""
+    return {'error': {'message': message, 'type': error_type, 'param': None, 'code': code}}
+
+
+class EmbeddingStub:
+    """Lógica del endpoint ``/v1/embeddings`` simulado, independiente de HTTP."""
+
+    def __init__(
+        self,
+        dimensions: int,
+        latency: Optional[LatencyModel] = None,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        timeout_rate: float = 0.0,
+        hang_seconds: float = 30.0,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        retry_after_seconds: float = 1.0,
+        seed: Optional[int] = None
+    ):
+        """Inicializa el stub.
+
+        ``error_rate``, ``rate_limit_rate`` y ``timeout_rate`` son
+        probabilidades por request de responder 500/503, 429 o de demorar
+        ``hang_seconds`` (para ejercitar los timeouts del cliente).
+        """
+        self.dimensions = dimensions
+        self.rng = random.Random(seed)
+        self.latency = latency or LatencyModel(rng=self.rng)
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.timeout_rate = timeout_rate
+        self.hang_seconds = hang_seconds
+        self.retry_after_seconds = retry_after_seconds
+        self.request_quota = QuotaBucket(requests_per_minute) if requests_per_minute else None
+        self.token_quota = QuotaBucket(tokens_per_minute) if tokens_per_minute else None
+
+        self._lock = threading.Lock()
+        self._stats = {
+            'requests': 0,
+            'succeeded': 0,
+            'rate_limited_quota': 0,
+            'rate_limited_injected': 0,
+            'server_errors': 0,
+            'bad_requests': 0,
+            'hangs': 0,
+            'inputs': 0,
+            'tokens': 0
+        }
+
+    def _count(self, key: str, amount: int = 1) -> None:
+        """Incrementa un contador."""
+        with self._lock:
+            self._stats[key] += amount
+
+    def get_stats(self) -> dict:
+        """Contadores de requests atendidos."""
+        with self._lock:
+            return dict(self._stats)
+
+    @staticmethod
+    def _parse_inputs(raw, model: str) -> Tuple[List[str], int]:
+        """Normaliza ``input`` (texto, textos o arrays de tokens) y cuenta tokens."""
+        if isinstance(raw, str):
+            raw = [raw]
+        if not isinstance(raw, list) or not raw:
+            raise ValueError("'input' must be a non-empty string or array")
+        # Un único array de tokens
+        if all(isinstance(item, int) for item in raw):
+            raw = [raw]
+
+        counter = get_token_counter(model)
+        texts, tokens = [], 0
+        for item in raw:
+            if isinstance(item, str):
+                texts.append(item)
+                tokens += counter.count(item)
+            elif isinstance(item, list) and item and all(isinstance(t, int) for t in item):
+                # Con tiktoken se decodifica para que el vector coincida con el
+                # del texto original; si no, se usa la secuencia de tokens.
+                if counter.exact:
+                    texts.append(counter.encoding.decode(item))
+                else:
+                    texts.append("tokens:" + ",".join(map(str, item)))
+                tokens += len(item)
+            else:
+                raise ValueError("Each input must be a string or a non-empty array of tokens")
+        return texts, tokens
+
+    def _rate_limit_headers(self) -> Dict[str, str]:
+        """Encabezados ``x-ratelimit-*`` con la cuota restante."""
+        headers = {}
+        for name, quota in (('requests', self.request_quota), ('tokens', self.token_quota)):
+            if quota is not None:
+                headers[f'x-ratelimit-limit-{name}'] = str(quota.per_minute)
+                headers[f'x-ratelimit-remaining-{name}'] = str(quota.remaining)
+        return headers
+
+    def _check_quotas(self, tokens: int) -> Optional[float]:
+        """Consume las cuotas; retorna la espera necesaria si se exceden."""
+        with self._lock:
+            waits = [
+                quota.retry_after(amount)
+                for quota, amount in ((self.request_quota, 1), (self.token_quota, tokens))
+                if quota is not None
+            ]
+            wait = max(waits, default=0.0)
+            if wait > 0:
+                return wait
+            if self.request_quota is not None:
+                self.request_quota.consume(1)
+            if self.token_quota is not None:
+                self.token_quota.consume(tokens)
+            return None
+
+    def handle(self, body: bytes) -> Response:
+        """Atiende un request; retorna estado, encabezados y cuerpo JSON."""
+        self._count('requests')
+        try:
+            request = json.loads(body or b"{}")
+            model = request.get('model') or "text-embedding-3-small"
+            texts, tokens = self._parse_inputs(request.get('input'), model)
+            dimensions = int(request.get('dimensions') or self.dimensions)
+            encoding_format = request.get('encoding_format') or "float"
+            if encoding_format not in ("float", "base64"):
+                raise ValueError("'encoding_format' must be 'float' or 'base64'")
+        except (ValueError, TypeError, AttributeError) as e:
+            self._count('bad_requests')
+            return 400, {}, _error(str(e), 'invalid_request_error')
+
+        with self._lock:
+            roll_hang, roll_limit, roll_error = (self.rng.random() for _ in range(3))
+
+        if roll_hang < self.timeout_rate:
+            self._count('hangs')
+            time.sleep(self.hang_seconds)
+
+        if roll_limit < self.rate_limit_rate:
+            self._count('rate_limited_injected')
+            return self._too_many_requests(self.retry_after_seconds, "Injected rate limit")
+
+        wait = self._check_quotas(tokens)
+        if wait is not None:
+            self._count('rate_limited_quota')
+            return self._too_many_requests(wait, "Rate limit reached for requests or tokens per minute")
+
+        if roll_error < self.error_rate:
+            self._count('server_errors')
+            status = 500 if self.rng.random() < 0.5 else 503
+            return status, {}, _error("Injected server error", 'server_error')
+
+        time.sleep(self.latency.sample(tokens))
+
+        provider = DeterministicEmbeddings(model, dimensions)
+        data = []
+        for index, text in enumerate(texts):
+            vector = provider.embed_vector(text)
+            if encoding_format == "base64":
+                embedding = base64.b64encode(vector.astype('<f4').tobytes()).decode('ascii')
+            else:
+                embedding = vector.astype(np.float64).tolist()
+            data.append({'object': 'embedding', 'index': index, 'embedding': embedding})
+
+        self._count('succeeded')
+        self._count('inputs', len(texts))
+        self._count('tokens', tokens)
+        return 200, self._rate_limit_headers(), {
+            'object': 'list',
+            'data': data,
+            'model': model,
+            'usage': {'prompt_tokens': tokens, 'total_tokens': tokens}
+        }
+
+    def _too_many_requests(self, wait: float, message: str) -> Response:
+        """Respuesta 429 con ``Retry-After``."""
+        headers = self._rate_limit_headers()
+        headers['retry-after'] = str(max(1, math.ceil(wait)))
+        headers['retry-after-ms'] = str(int(wait * 1000))
+        return 429, headers, _error(message, 'requests', 'rate_limit_exceeded')
+
+
+class _StubRequestHandler(BaseHTTPRequestHandler):
+    """Adaptador HTTP del stub (HTTP/1.1 con keep-alive)."""
+
+    protocol_version = "HTTP/1.1"
+
+    def _send_json(self, status: int, headers: Dict[str, str], payload: dict) -> None:
+        """Envía una respuesta JSON."""
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        """``POST /v1/embeddings``."""
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length)
+        if self.path.rstrip('/') not in ('/v1/embeddings', '/embeddings'):
+            self._send_json(404, {}, _error(f"Unknown path {self.path}", 'invalid_request_error'))
+            return
+        self._send_json(*self.server.stub.handle(body))
+
+    def do_GET(self):
+        """``GET /health`` y ``GET /stats``."""
+        if self.path.rstrip('/') == '/stats':
+            self._send_json(200, {}, self.server.stub.get_stats())
+        elif self.path.rstrip('/') == '/health':
+            self._send_json(200, {}, {'status': 'ok'})
+        else:
+            self._send_json(404, {}, _error(f"Unknown path {self.path}", 'invalid_request_error'))
+
+    def log_message(self, format, *args):
+        """Silencia el log por request de ``http.server``."""
+
+
+def create_stub_server(stub: EmbeddingStub, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Crea el servidor HTTP (``port=0`` elige un puerto libre)."""
+    server = ThreadingHTTPServer((host, port), _StubRequestHandler)
+    server.daemon_threads = True
+    server.stub = stub
+    return server
+
+
+def stub_base_url(server: ThreadingHTTPServer) -> str:
+    """Base URL para ``OPENAI_BASE_URL``."""
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}/v1"
@@ -0,0 +1,235 @@
+"""
+Extractores de texto de PDFs intercambiables.
+"""
+from abc import ABC, abstractmethod
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import pypdf
+
+# Páginas extraídas: (número de página, texto)
+Pages = List[Tuple[int, str]]
+
+
+class PDFExtractor(ABC):
+    """Extrae el texto de las páginas de un PDF.
+
+    Las subclases implementan ``page_count`` e ``iter_pages`` (una
+    subclase incompleta falla al crearse, no durante el parseo). ``version``
+    identifica el texto producido (clave del caché de texto): debe cambiar
+    con la versión de la biblioteca o con el modo de extracción. Las
+    instancias se envían a los procesos de parseo, de modo que no deben
+    guardar archivos abiertos.
+    """
+
+    name = ""
+    version = ""
+
+    @abstractmethod
+    def page_count(self, path: str) -> int:
+        """Total de páginas del archivo."""
+
+    @abstractmethod
+    def iter_pages(self, path: str, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+        """Genera ``(número de página, texto)`` de las páginas ``[start, end)``."""
+
+    def extract_pages(self, path: str, start: int, end: Optional[int]) -> Tuple[Pages, int]:
+        """Texto de las páginas ``[start, end)`` y total de páginas del archivo."""
+        return list(self.iter_pages(path, start, end)), self.page_count(path)
+
+    def __call__(self, path: str, start: int, end: Optional[int]) -> Tuple[Pages, int]:
+        """Permite usar el extractor como función de ``PDFParsePool``."""
+        return self.extract_pages(path, start, end)
+
+
+class PyPDFExtractor(PDFExtractor):
+    """Extractor de pypdf, el mismo que usa ``PyPDFLoader`` (por defecto).
+
+    Con ``layout`` usa el modo que conserva la disposición del texto en la
+    página (más lento, útil para tablas y columnas).
+    """
+
+    def __init__(self, layout: bool = False):
+        """Inicializa el extractor."""
+        self.mode = "layout" if layout else "plain"
+        self.name = "pypdf_layout" if layout else "pypdf"
+        self.version = f"pypdf-{pypdf.__version__}/{self.mode}/v1"
+
+    def page_count(self, path: str) -> int:
+        """Total de páginas del archivo."""
+        return len(pypdf.PdfReader(path).pages)
+
+    def iter_pages(self, path: str, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+        """Genera el texto de cada página al pedirla."""
+        reader = pypdf.PdfReader(path)
+        end = len(reader.pages) if end is None else min(end, len(reader.pages))
+        for number in range(start, end):
+            yield number, reader.pages[number].extract_text(extraction_mode=self.mode)
+
+    def extract_pages(self, path: str, start: int, end: Optional[int]) -> Tuple[Pages, int]:
+        """Texto de las páginas ``[start, end)`` leyendo el archivo una vez."""
+        reader = pypdf.PdfReader(path)
+        total = len(reader.pages)
+        end = total if end is None else min(end, total)
+        pages = [
+            (number, reader.pages[number].extract_text(extraction_mode=self.mode))
+            for number in range(start, end)
+        ]
+        return pages, total
+
+
+class PyMuPDFExtractor(PDFExtractor):
+    """Extractor de PyMuPDF (MuPDF), en general mucho más rápido que pypdf.
+
+    La dependencia es opcional: solo se importa al crear el extractor.
+    """
+
+    name = "pymupdf"
+
+    def __init__(self):
+        """Inicializa el extractor."""
+        try:
+            import pymupdf
+        except ImportError as e:
+            raise ImportError(
+                "The 'pymupdf' PDF extractor requires PyMuPDF: pip install pymupdf"
+            ) from e
+        self.version = f"pymupdf-{pymupdf.VersionBind}/text/v1"
+
+    def page_count(self, path: str) -> int:
+        """Total de páginas del archivo."""
+        import pymupdf
+
+        with pymupdf.open(path) as document:
+            return document.page_count
+
+    def iter_pages(self, path: str, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+        """Genera el texto de cada página al pedirla."""
+        import pymupdf
+
+        with pymupdf.open(path) as document:
+            end = document.page_count if end is None else min(end, document.page_count)
+            for number in range(start, end):
+                yield number, document[number].get_text()
+
+
+class PDFMinerExtractor(PDFExtractor):
+    """Extractor de pdfminer.six, más cuidadoso con el orden de lectura.
+
+    La dependencia es opcional: solo se importa al crear el extractor.
+    """
+
+    name = "pdfminer"
+
+    def __init__(self):
+        """Inicializa el extractor."""
+        try:
+            import pdfminer
+        except ImportError as e:
+            raise ImportError(
+                "The 'pdfminer' PDF extractor requires pdfminer.six: pip install pdfminer.six"
+            ) from e
+        self.version = f"pdfminer.six-{pdfminer.__version__}/v1"
+
+    def page_count(self, path: str) -> int:
+        """Total de páginas del archivo."""
+        from pdfminer.pdfpage import PDFPage
+
+        with open(path, 'rb') as f:
+            return sum(1 for _ in PDFPage.get_pages(f))
+
+    def iter_pages(self, path: str, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+        """Genera el texto de cada página al pedirla."""
+        from pdfminer.high_level import extract_pages
+        from pdfminer.layout import LTTextContainer
+
+        numbers = range(start, self.page_count(path) if end is None else end)
+        for number, layout in zip(numbers, extract_pages(path, page_numbers=numbers)):
+            yield number, "".join(
+                element.get_text()
+                for element in layout
+                if isinstance(element, LTTextContainer)
+            )
+
+
+ExtractorFactory = Callable[[], PDFExtractor]
+
+_EXTRACTORS: Dict[str, ExtractorFactory] = {
+    'pypdf': PyPDFExtractor,
+    'pypdf_layout': lambda: PyPDFExtractor(layout=True),
+    'pymupdf': PyMuPDFExtractor,
+    'pdfminer': PDFMinerExtractor,
+}
+
+
+def register_pdf_extractor(name: str, factory: ExtractorFactory) -> None:
+    """Registra (o reemplaza) un extractor de texto de PDFs.
+
+    ``factory()`` debe retornar un ``PDFExtractor`` o lanzar ``ImportError``
+    si su dependencia no está instalada.
+    """
+    _EXTRACTORS[name] = factory
+
+
+def available_pdf_extractors() -> List[str]:
+    """Nombres de los extractores registrados."""
+    return sorted(_EXTRACTORS)
+
+
+def create_pdf_extractor(name: str) -> PDFExtractor:
+    """Crea el extractor ``name``."""
+    factory = _EXTRACTORS.get(name)
+    if factory is None:
+        raise ValueError(
+            f"Unknown PDF extractor '{name}'. "
+            f"Available: {', '.join(available_pdf_extractors())}"
+        )
+    return factory()
+
+
+def parse_extractor_rules(spec: str) -> List[Tuple[str, str]]:
+    """Reglas ``patrón=extractor`` separadas por ``;`` (en orden)."""
+    rules = []
+    for rule in spec.split(';'):
+        if not rule.strip():
+            continue
+        pattern, separator, name = rule.partition('=')
+        if not separator or not pattern.strip() or not name.strip():
+            raise ValueError(f"Invalid PDF extractor rule '{rule}': expected pattern=extractor")
+        if name.strip() not in _EXTRACTORS:
+            raise ValueError(
+                f"Unknown PDF extractor '{name.strip()}' in rule '{rule}'. "
+                f"Available: {', '.join(available_pdf_extractors())}"
+            )
+        rules.append((pattern.strip(), name.strip()))
+    return rules
+
+
+def select_pdf_extractor(
+    file_path: Path,
+    rules: List[Tuple[str, str]],
+    default: str,
+    base_dir: Optional[Path] = None
+) -> str:
+    """Extractor de un archivo según la primera regla que coincide.
+
+    Los patrones glob se comparan con la ruta relativa a ``base_dir`` (con
+    ``/``) y con el nombre del archivo; un patrón terminado en ``/``
+    selecciona un directorio y todo lo que contiene.
+    """
+    relative = file_path
+    if base_dir is not None:
+        try:
+            relative = file_path.resolve().relative_to(Path(base_dir).resolve())
+        except ValueError:
+            pass
+    relative_name = relative.as_posix()
+
+    for pattern, name in rules:
+        if pattern.endswith('/'):
+            if relative_name.startswith(pattern) or f"/{pattern}" in f"/{relative_name}":
+                return name
+        elif fnmatch(relative_name, pattern) or fnmatch(file_path.name, pattern):
+            return name
+    return default
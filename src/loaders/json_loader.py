@@ -1,16 +1,124 @@
 """
 Cargador de documentos JSON.
 """
+import json
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Dict, Iterator, List, Optional, Sequence
 
 from langchain_community.document_loaders import JSONLoader
 from langchain_core.documents import Document
 
+from src.utils.hashing import compute_file_hash
 from src.utils.logger import get_logger, measure_time
 
 logger = get_logger()
 
+# Extensiones de archivos con un registro JSON por línea
+JSON_LINES_SUFFIXES = ('.jsonl', '.ndjson')
+# Caracteres leídos por iteración al recorrer un arreglo JSON
+_READ_SIZE = 64 * 1024
+
+# Metadatos de los documentos del FAQ de Warren Buffett
+WARREN_BUFFET_FAQ_METADATA = {
+    "source": "Warren Buffett FAQ",
+    "idioma": "en",
+    "description": "Preguntas y respuestas sobre warren buffett y sus estrategias financieras."
+}
+
+
+def _iter_json_array(f, first: str) -> Iterator[Any]:
+    """Elementos de un arreglo JSON cuyo ``[`` ya se leyó, de a uno.
+
+    Exige exactamente una coma entre elementos: ``[1 2]``, ``[1,,2]`` o
+    ``[1,]`` lanzan ``ValueError``.
+    """
+    decoder = json.JSONDecoder()
+    buffer = first
+    position = 0
+    eof = False
+    count = 0
+    # Si el último elemento leído aún espera su ``,`` o el ``]`` final
+    after_value = False
+    
+    while True:
+        # Saltar espacios hasta el próximo elemento o separador
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n':
+                position += 1
+            if position < len(buffer) or eof:
+                break
+            buffer, position = f.read(_READ_SIZE), 0
+            eof = not buffer
+        
+        if position >= len(buffer):
+            raise ValueError("Unterminated JSON array")
+        char = buffer[position]
+        if after_value:
+            if char == ']':
+                return
+            if char != ',':
+                raise ValueError(f"Expected ',' or ']' after JSON array element {count}")
+            position += 1
+            after_value = False
+            continue
+        if char == ']' and count == 0:
+            return
+        if char in ',]':
+            raise ValueError(f"Expected a value for JSON array element {count + 1}")
+        
+        try:
+            value, end = decoder.raw_decode(buffer, position)
+            # Un número al final del buffer puede seguir en el próximo bloque
+            complete = end < len(buffer) or eof
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            complete = False
+        
+        if not complete:
+            block = f.read(_READ_SIZE)
+            eof = not block
+            buffer, position = buffer[position:] + block, 0
+            continue
+        
+        yield value
+        count += 1
+        after_value = True
+        position = end
+        if position > _READ_SIZE:
+            buffer, position = buffer[position:], 0
+
+
+def iter_json_records(file_path: Path) -> Iterator[Any]:
+    """Registros de un archivo JSON o JSON Lines, leídos de a uno.
+
+    En JSON Lines cada línea no vacía es un registro. En JSON, si el valor
+    raíz es un arreglo se genera cada elemento sin cargar el archivo
+    completo (con ``JSONDecoder.raw_decode`` sobre un buffer acotado); de
+    lo contrario el valor raíz es el único registro.
+    """
+    with open(file_path, encoding='utf-8') as f:
+        if file_path.suffix.lower() in JSON_LINES_SUFFIXES:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+            return
+        
+        first = f.read(_READ_SIZE).lstrip('\ufeff \t\r\n')
+        if first.startswith('['):
+            yield from _iter_json_array(f, first[1:])
+        else:
+            yield json.loads(first + f.read())
+
+
+def record_text(content: Any) -> str:
+    """Texto de un registro, como el ``JSONLoader`` de langchain."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, dict):
+        return json.dumps(content) if content else ""
+    return str(content) if content is not None else ""
+
 
 class JSONDocumentLoader:
     """Cargador especializado para documentos JSON."""
@@ -36,13 +144,13 @@ class JSONDocumentLoader:
             )
             
             documents = json_loader.load()
+            file_hash = compute_file_hash(file_path)
             
             # Agregar metadatos específicos para Warren Buffet FAQ
             for doc in documents:
                 doc.metadata.update({
-                    "source": "Warren Buffett FAQ",
-                    "idioma": "en",
-                    "description": "Preguntas y respuestas sobre warren buffett y sus estrategias financieras."
+                    "file_hash": file_hash,
+                    **WARREN_BUFFET_FAQ_METADATA
                 })
             
             logger.log_document_processing(
@@ -87,12 +195,14 @@ class JSONDocumentLoader:
             )
             
             documents = json_loader.load()
+            file_hash = compute_file_hash(file_path)
             
             # Agregar metadatos si se proporcionan
-            if metadata:
-                for doc in documents:
+            for doc in documents:
+                if metadata:
                     doc.metadata.update(metadata)
                     doc.metadata['source'] = file_path.name
+                doc.metadata.update({'file_hash': file_hash})
             
             logger.log_document_processing(
                 filename=file_path.name,
@@ -108,4 +218,77 @@ class JSONDocumentLoader:
                 status='error',
                 error=str(e)
             )
-            raise
\ No newline at end of file
+            raise
+    
+    def iter_json_documents(
+        self,
+        file_path: Path,
+        content_keys: Optional[Sequence[str]] = None,
+        metadata_keys: Optional[Sequence[str]] = None,
+        metadata: Dict[str, str] = None
+    ) -> Iterator[Document]:
+        """Genera un documento por registro de un JSON o JSON Lines, sin jq.
+
+        Con ``content_keys`` el texto es el JSON de esos campos (como
+        ``jq '{a: .a, b: .b}'``); si no, el registro completo. Los campos de
+        ``metadata_keys`` se copian a los metadatos. Los documentos se leen
+        de a uno (ver ``iter_json_records``), de modo que la memoria no
+        depende del tamaño del archivo, y los metadatos (``source``
+        incluido, de modo que los ids de chunk coinciden) son los de
+        ``load_json``.
+        """
+        if not file_path.exists():
+            raise FileNotFoundError(f"File not found: {file_path}")
+        
+        if file_path.suffix.lower() not in ('.json', *JSON_LINES_SUFFIXES):
+            raise ValueError(f"File is not a JSON: {file_path}")
+        
+        file_hash = compute_file_hash(file_path)
+        # ``JSONLoader`` registra la ruta absoluta del archivo
+        source = str(file_path.resolve())
+        doc_count = 0
+        try:
+            for seq_num, record in enumerate(iter_json_records(file_path), 1):
+                fields = record if isinstance(record, dict) else {}
+                if content_keys and not isinstance(record, dict):
+                    raise ValueError(f"Record {seq_num} is not a JSON object")
+                content = (
+                    {key: fields.get(key) for key in content_keys}
+                    if content_keys else record
+                )
+                doc = Document(
+                    page_content=record_text(content),
+                    metadata={'source': source, 'seq_num': seq_num}
+                )
+                for key in metadata_keys or ():
+                    if key in fields:
+                        doc.metadata[key] = fields[key]
+                if metadata:
+                    doc.metadata.update(metadata)
+                    doc.metadata['source'] = file_path.name
+                doc.metadata.update({'file_hash': file_hash})
+                doc_count += 1
+                yield doc
+                
+        except Exception as e:
+            logger.log_document_processing(
+                filename=file_path.name,
+                status='error',
+                error=str(e)
+            )
+            raise
+        
+        logger.log_document_processing(
+            filename=file_path.name,
+            status='success',
+            doc_count=doc_count
+        )
+    
+    def iter_warren_buffet_faq(self, file_path: Path) -> Iterator[Document]:
+        """Genera los documentos del FAQ de Warren Buffet de a uno.
+
+        Mismo texto y metadatos que ``load_warren_buffet_faq``.
+        """
+        for doc in self.iter_json_documents(file_path, content_keys=('question', 'answer')):
+            doc.metadata.update(WARREN_BUFFET_FAQ_METADATA)
+            yield doc
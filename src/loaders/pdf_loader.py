@@ -2,50 +2,97 @@
 Cargador de documentos PDF.
 """
 import os
+import time
 from pathlib import Path
-from typing import Dict, List
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 
-from langchain_community.document_loaders import PyPDFLoader
 from langchain_core.documents import Document
 
+from src.config import get_settings
+from src.loaders.extractors import (
+    PDFExtractor,
+    Pages,
+    create_pdf_extractor,
+    parse_extractor_rules,
+    select_pdf_extractor,
+)
+from src.loaders.pdf_pool import PDFParsePool
+from src.loaders.text_cache import ParsedTextCache
+from src.utils.hashing import compute_file_hash
 from src.utils.logger import get_logger, measure_time
 
+settings = get_settings()
 logger = get_logger()
 
 
 class PDFDocumentLoader:
     """Cargador especializado para documentos PDF."""
     
-    def __init__(self):
-        """Inicializa el cargador de PDFs."""
-        logger.log_event('pdf_loader_initialized')
+    def __init__(self, cache_dir: Optional[str] = None):
+        """Inicializa el cargador de PDFs.
+
+        Con ``PDF_TEXT_CACHE_ENABLED`` el texto extraído se guarda en un
+        caché por hash de contenido (ver ``ParsedTextCache``), de modo que
+        los archivos sin cambios no se vuelven a parsear.
+
+        El extractor de texto es ``PDF_EXTRACTOR`` (pypdf por defecto),
+        salvo para los archivos o directorios de ``PDF_EXTRACTOR_RULES``
+        (ver ``select_pdf_extractor``).
+        """
+        self.default_extractor = settings.pdf_extractor
+        self.extractor_rules = parse_extractor_rules(settings.pdf_extractor_rules)
+        self._extractors: Dict[str, PDFExtractor] = {}
+        # Valida el extractor por defecto; los de las reglas se crean al usarlos
+        self._get_extractor_by_name(self.default_extractor)
+        
+        self.text_cache = None
+        if settings.pdf_text_cache_enabled:
+            cache_path = (
+                Path(cache_dir) if cache_dir
+                else settings.get_absolute_path(settings.pdf_text_cache_dir)
+            )
+            self.text_cache = ParsedTextCache(
+                cache_path / ParsedTextCache.DB_FILENAME,
+                max_bytes=int(settings.pdf_text_cache_max_mb * 1024 * 1024)
+            )
+        
+        logger.log_event(
+            'pdf_loader_initialized',
+            extractor=self.default_extractor,
+            extractor_rules=len(self.extractor_rules),
+            text_cache_enabled=self.text_cache is not None
+        )
+    
+    def _get_extractor_by_name(self, name: str) -> PDFExtractor:
+        """Extractor ``name``, creado una sola vez."""
+        if name not in self._extractors:
+            self._extractors[name] = create_pdf_extractor(name)
+        return self._extractors[name]
+    
+    def get_extractor(self, file_path: Path) -> PDFExtractor:
+        """Extractor de texto de un archivo según ``PDF_EXTRACTOR_RULES``."""
+        return self._get_extractor_by_name(select_pdf_extractor(
+            file_path,
+            self.extractor_rules,
+            self.default_extractor,
+            base_dir=settings.files_path
+        ))
     
     @measure_time
     def load_pdf(self, file_path: Path, metadata: Dict[str, str] = None) -> List[Document]:
         """Carga un archivo PDF y retorna documentos con metadatos."""
         try:
-            if not file_path.exists():
-                raise FileNotFoundError(f"File not found: {file_path}")
-            
-            if not file_path.suffix.lower() == '.pdf':
-                raise ValueError(f"File is not a PDF: {file_path}")
-            
-            pdf_loader = PyPDFLoader(str(file_path))
-            documents = pdf_loader.load()
-            
-            # Agregar metadatos a cada documento
-            if metadata:
-                for doc in documents:
-                    doc.metadata.update(metadata)
-                    doc.metadata['source'] = file_path.name
+            self._validate_pdf_path(file_path)
+            file_hash = compute_file_hash(file_path)
+            extractor = self.get_extractor(file_path)
             
-            logger.log_document_processing(
-                filename=file_path.name,
-                status='success',
-                doc_count=len(documents)
-            )
+            documents = self._get_cached_documents(file_path, file_hash, extractor)
+            if documents is None:
+                pages, _ = extractor.extract_pages(str(file_path), 0, None)
+                documents = self._page_documents(file_path, pages)
+                self._cache_documents(file_path, file_hash, extractor, documents)
             
-            return documents
+            return self._finish_documents(file_path, documents, metadata, file_hash)
             
         except Exception as e:
             logger.log_document_processing(
@@ -55,6 +102,348 @@ class PDFDocumentLoader:
             )
             raise
     
+    @staticmethod
+    def _validate_pdf_path(file_path: Path) -> None:
+        """Verifica que el archivo exista y sea un PDF."""
+        if not file_path.exists():
+            raise FileNotFoundError(f"File not found: {file_path}")
+        
+        if not file_path.suffix.lower() == '.pdf':
+            raise ValueError(f"File is not a PDF: {file_path}")
+    
+    @staticmethod
+    def _page_documents(file_path: Path, pages: Pages) -> List[Document]:
+        """Documentos de las páginas extraídas, con los metadatos de ``PyPDFLoader``."""
+        return [
+            Document(page_content=text, metadata={'source': str(file_path), 'page': page})
+            for page, text in pages
+        ]
+    
+    def _is_cached(self, file_path: Path, file_hash: str, extractor: PDFExtractor) -> bool:
+        """Si el texto del archivo está en el caché de texto."""
+        if self.text_cache is None:
+            return False
+        try:
+            return self.text_cache.contains(file_hash, extractor.version)
+        except Exception as e:
+            logger.log_event(
+                'pdf_text_cache_error',
+                level='WARNING',
+                filename=file_path.name,
+                error=str(e)
+            )
+            return False
+    
+    def _get_cached_documents(
+        self,
+        file_path: Path,
+        file_hash: str,
+        extractor: PDFExtractor
+    ) -> Optional[List[Document]]:
+        """Páginas del archivo desde el caché de texto, o None."""
+        if self.text_cache is None:
+            return None
+        try:
+            pages = self.text_cache.get(file_hash, extractor.version)
+        except Exception as e:
+            logger.log_event(
+                'pdf_text_cache_error',
+                level='WARNING',
+                filename=file_path.name,
+                error=str(e)
+            )
+            return None
+        if pages is None:
+            return None
+        
+        logger.log_event('pdf_text_cache_hit', filename=file_path.name, pages=len(pages))
+        return [
+            Document(page_content=text, metadata={'source': str(file_path), **page_metadata})
+            for page_metadata, text in pages
+        ]
+    
+    def _cache_documents(
+        self,
+        file_path: Path,
+        file_hash: str,
+        extractor: PDFExtractor,
+        documents: List[Document]
+    ) -> None:
+        """Guarda en el caché el texto y los metadatos del extractor."""
+        if self.text_cache is None:
+            return
+        try:
+            pages = [
+                (
+                    {key: value for key, value in doc.metadata.items() if key != 'source'},
+                    doc.page_content
+                )
+                for doc in documents
+            ]
+            evicted = self.text_cache.put(file_hash, extractor.version, pages)
+        except Exception as e:
+            logger.log_event(
+                'pdf_text_cache_save_error',
+                level='WARNING',
+                filename=file_path.name,
+                error=str(e)
+            )
+            return
+        if evicted:
+            logger.log_event('pdf_text_cache_evicted', entries=evicted)
+    
+    def get_text_cache_stats(self) -> dict:
+        """Estadísticas del caché de texto extraído."""
+        if self.text_cache is None:
+            return {'enabled': False}
+        return {'enabled': True, **self.text_cache.get_stats()}
+    
+    @staticmethod
+    def _add_metadata(
+        doc: Document,
+        file_path: Path,
+        metadata: Optional[Dict[str, str]],
+        file_hash: str
+    ) -> None:
+        """Agrega los metadatos y el hash del archivo a una página."""
+        if metadata:
+            doc.metadata.update(metadata)
+            doc.metadata['source'] = file_path.name
+        doc.metadata.update({'file_hash': file_hash})
+    
+    def _finish_documents(
+        self,
+        file_path: Path,
+        documents: List[Document],
+        metadata: Dict[str, str] = None,
+        file_hash: Optional[str] = None
+    ) -> List[Document]:
+        """Agrega los metadatos y el hash del archivo a sus páginas."""
+        file_hash = file_hash or compute_file_hash(file_path)
+        
+        # Agregar metadatos a cada documento
+        for doc in documents:
+            self._add_metadata(doc, file_path, metadata, file_hash)
+        
+        logger.log_document_processing(
+            filename=file_path.name,
+            status='success',
+            doc_count=len(documents)
+        )
+        
+        return documents
+    
+    def iter_pdf_pages(
+        self,
+        file_path: Path,
+        metadata: Dict[str, str] = None
+    ) -> Iterator[Document]:
+        """Genera las páginas de un PDF de a una, como ``load_pdf``.
+
+        El texto de cada página se extrae al pedirla. Si el archivo está en
+        el caché de texto no se parsea; si no, su texto se acumula para
+        guardarlo en el caché al terminar.
+        """
+        self._validate_pdf_path(file_path)
+        file_hash = compute_file_hash(file_path)
+        extractor = self.get_extractor(file_path)
+        
+        page_count = 0
+        cached = self._get_cached_documents(file_path, file_hash, extractor)
+        if cached is not None:
+            for doc in cached:
+                self._add_metadata(doc, file_path, metadata, file_hash)
+                page_count += 1
+                yield doc
+        else:
+            extracted = []
+            for page_number, text in extractor.iter_pages(str(file_path)):
+                doc = Document(
+                    page_content=text,
+                    metadata={'source': str(file_path), 'page': page_number}
+                )
+                if self.text_cache is not None:
+                    extracted.append(Document(page_content=doc.page_content, metadata=dict(doc.metadata)))
+                self._add_metadata(doc, file_path, metadata, file_hash)
+                page_count += 1
+                yield doc
+            self._cache_documents(file_path, file_hash, extractor, extracted)
+        
+        logger.log_document_processing(
+            filename=file_path.name,
+            status='success',
+            doc_count=page_count
+        )
+    
+    def iter_pdf_files(
+        self,
+        pdf_files: List[Path],
+        base_metadata: Dict[str, str] = None,
+        workers: Optional[int] = None
+    ) -> Iterator[Tuple[Path, List[Document]]]:
+        """Genera ``(path, documentos)`` de cada PDF a medida que se carga.
+
+        Los archivos que fallan se registran y se omiten. Con más de un
+        worker (por defecto, ``PDF_PARSE_WORKERS``) los archivos se parsean
+        en procesos separados (ver ``_iter_pdf_files_parallel``); los
+        archivos se entregan siempre en el orden de ``pdf_files``.
+        """
+        workers = settings.pdf_parse_workers if workers is None else workers
+        if workers > 1 and pdf_files:
+            yield from self._iter_pdf_files_parallel(pdf_files, base_metadata, workers)
+            return
+        
+        for pdf_file in pdf_files:
+            try:
+                # Crear metadatos específicos para cada archivo
+                file_metadata = base_metadata.copy() if base_metadata else {}
+                file_metadata['source'] = pdf_file.name
+                
+                documents = self.load_pdf(pdf_file, file_metadata)
+                
+            except Exception as e:
+                logger.log_document_processing(
+                    filename=pdf_file.name,
+                    status='error',
+                    error=str(e)
+                )
+                # Continuar con el siguiente archivo
+                continue
+            
+            yield pdf_file, documents
+    
+    def load_pdf_files(
+        self,
+        pdf_files: List[Path],
+        base_metadata: Dict[str, str] = None,
+        on_loaded: Optional[Callable[[Path, List[Document]], None]] = None,
+        workers: Optional[int] = None
+    ) -> Dict[Path, List[Document]]:
+        """Carga una lista de PDFs; retorna los documentos de cada archivo.
+
+        Los archivos que fallan se registran y se omiten del resultado, que
+        conserva el orden de ``pdf_files``. ``on_loaded(path, documents)``
+        se invoca al cargar cada archivo (ver ``iter_pdf_files``).
+        """
+        loaded = {}
+        for pdf_file, documents in self.iter_pdf_files(pdf_files, base_metadata, workers):
+            loaded[pdf_file] = documents
+            if on_loaded is not None:
+                on_loaded(pdf_file, documents)
+        
+        return {pdf_file: loaded[pdf_file] for pdf_file in pdf_files if pdf_file in loaded}
+    
+    def _iter_pdf_files_parallel(
+        self,
+        pdf_files: List[Path],
+        base_metadata: Optional[Dict[str, str]],
+        workers: int
+    ) -> Iterator[Tuple[Path, List[Document]]]:
+        """Parsea los PDFs en ``workers`` procesos, por rangos de páginas.
+
+        Un archivo que supera ``PDF_PARSE_TIMEOUT_SECONDS`` o que hace
+        terminar a su proceso se registra como fallido sin afectar a los
+        demás. Los archivos se entregan en el orden de ``pdf_files`` y las
+        páginas de cada uno, en orden; los del caché de texto se leen al
+        llegar su turno, sin parsearlos.
+        """
+        start_time = time.time()
+        files_loaded = 0
+        files_from_cache = 0
+        page_count = 0
+        file_hashes = {}
+        extractors = {}
+        cached_files = set()
+        to_parse = []
+        for pdf_file in pdf_files:
+            try:
+                self._validate_pdf_path(pdf_file)
+                file_hashes[pdf_file] = compute_file_hash(pdf_file)
+                extractors[pdf_file] = self.get_extractor(pdf_file)
+            except Exception as e:
+                logger.log_document_processing(
+                    filename=pdf_file.name,
+                    status='error',
+                    error=str(e)
+                )
+                continue
+            
+            if self._is_cached(pdf_file, file_hashes[pdf_file], extractors[pdf_file]):
+                cached_files.add(pdf_file)
+            else:
+                to_parse.append(pdf_file)
+        
+        pool = PDFParsePool(
+            workers,
+            timeout_seconds=settings.pdf_parse_timeout_seconds,
+            pages_per_task=settings.pdf_parse_pages_per_task
+        )
+        # Resultados en el orden de ``to_parse``, que sigue el de ``pdf_files``
+        parsed = pool.parse(to_parse, extract_for=extractors.get)
+        try:
+            for pdf_file in pdf_files:
+                if pdf_file not in file_hashes:
+                    continue
+                file_metadata = base_metadata.copy() if base_metadata else {}
+                file_metadata['source'] = pdf_file.name
+                
+                if pdf_file in cached_files:
+                    documents = self._get_cached_documents(
+                        pdf_file, file_hashes[pdf_file], extractors[pdf_file]
+                    )
+                    if documents is None:
+                        # Desalojado del caché después de verificarlo
+                        try:
+                            documents = self.load_pdf(pdf_file, file_metadata)
+                        except Exception as e:
+                            logger.log_document_processing(
+                                filename=pdf_file.name,
+                                status='error',
+                                error=str(e)
+                            )
+                            continue
+                    else:
+                        files_from_cache += 1
+                        documents = self._finish_documents(
+                            pdf_file, documents, file_metadata, file_hashes[pdf_file]
+                        )
+                    files_loaded += 1
+                    page_count += len(documents)
+                    yield pdf_file, documents
+                    continue
+                
+                _, pages, error = next(parsed)
+                if error is not None:
+                    logger.log_document_processing(
+                        filename=pdf_file.name,
+                        status='error',
+                        error=error
+                    )
+                    continue
+                
+                documents = self._page_documents(pdf_file, pages)
+                self._cache_documents(pdf_file, file_hashes[pdf_file], extractors[pdf_file], documents)
+                files_loaded += 1
+                page_count += len(documents)
+                yield pdf_file, self._finish_documents(
+                    pdf_file, documents, file_metadata, file_hashes[pdf_file]
+                )
+        finally:
+            # Detiene los procesos si se deja de consumir antes de terminar
+            parsed.close()
+        
+        duration = time.time() - start_time
+        logger.log_event(
+            'parallel_pdf_parsing_complete',
+            workers=workers,
+            files=len(pdf_files),
+            files_loaded=files_loaded,
+            files_from_cache=files_from_cache,
+            pages=page_count,
+            duration_seconds=duration,
+            pages_per_second=page_count / duration if duration > 0 else None
+        )
+    
     @measure_time
     def load_pdfs_from_directory(
         self, 
@@ -76,25 +465,10 @@ class PDFDocumentLoader:
                 )
                 return []
             
-            all_documents = []
-            
-            for pdf_file in pdf_files:
-                try:
-                    # Crear metadatos específicos para cada archivo
-                    file_metadata = base_metadata.copy() if base_metadata else {}
-                    file_metadata['source'] = pdf_file.name
-                    
-                    documents = self.load_pdf(pdf_file, file_metadata)
-                    all_documents.extend(documents)
-                    
-                except Exception as e:
-                    logger.log_document_processing(
-                        filename=pdf_file.name,
-                        status='error',
-                        error=str(e)
-                    )
-                    # Continuar con el siguiente archivo
-                    continue
+            documents_by_file = self.load_pdf_files(pdf_files, base_metadata)
+            all_documents = [
+                doc for documents in documents_by_file.values() for doc in documents
+            ]
             
             logger.log_event(
                 'directory_processing_complete',
@@ -0,0 +1,282 @@
+"""
+Parseo de PDFs en procesos separados, con timeout y aislamiento de fallos.
+"""
+import math
+import multiprocessing
+import time
+from collections import deque
+from multiprocessing.connection import Connection, wait
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Sequence, Tuple
+
+from src.loaders.extractors import Pages, PyPDFExtractor
+from src.utils.logger import get_logger
+
+logger = get_logger()
+
+# Función de extracción: (ruta, inicio, fin) -> (páginas, total de páginas)
+Extractor = Callable[[str, int, Optional[int]], Tuple[Pages, int]]
+
+
+def _worker_main(conn: Connection, extract: Extractor) -> None:
+    """Bucle de un proceso de parseo: recibe rangos y responde sus páginas.
+
+    Cada tarea es ``(extractor, ruta, inicio, fin)``. ``extract`` (el
+    extractor por defecto) se recibe al iniciar para que la importación de
+    su módulo no cuente en el timeout de la primera tarea.
+    """
+    # El timeout de las tareas no incluye el arranque del proceso
+    conn.send(('ready', None))
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        extract, *arguments = task
+        try:
+            conn.send(('ok', extract(*arguments)))
+        except Exception as e:
+            conn.send(('error', f"{type(e).__name__}: {e}"))
+
+
+class _Worker:
+    """Proceso de parseo con su canal de comunicación."""
+
+    def __init__(self, context, extract: Extractor):
+        """Inicia el proceso."""
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, extract),
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+        self.task: Optional[tuple] = None
+        self.deadline = 0.0
+
+    def stop(self, kill: bool = False) -> None:
+        """Detiene el proceso (de inmediato si ``kill``)."""
+        if kill:
+            self.process.kill()
+        else:
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class _FileState:
+    """Rangos pendientes y páginas recibidas de un archivo."""
+
+    def __init__(self):
+        """Inicializa el estado."""
+        self.ranges = None
+        self.pages: Dict[int, Pages] = {}
+        self.error: Optional[str] = None
+
+
+class PDFParsePool:
+    """Grupo de procesos que parsean PDFs en paralelo.
+
+    Cada archivo se parsea en rangos de ``pages_per_task`` páginas: el
+    primer rango informa el total de páginas y el resto se reparte entre
+    los procesos libres, de modo que un libro grande usa varios núcleos.
+    Un rango que supera ``timeout_seconds`` o cuyo proceso termina de forma
+    anormal (segfault, falta de memoria) hace fallar solo su archivo: el
+    proceso se reemplaza y los demás archivos siguen. Un proceso que
+    termina antes de quedar listo se descarta y el grupo sigue con los
+    restantes; si no queda ninguno, fallan los archivos pendientes.
+
+    ``extract`` (por defecto, pypdf) es el extractor de cada archivo si
+    ``parse`` no recibe ``extract_for``. Debe ser una función de nivel de
+    módulo o un ``PDFExtractor``, que se envían a los procesos.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        timeout_seconds: float,
+        pages_per_task: int,
+        extract: Optional[Extractor] = None
+    ):
+        """Inicializa el grupo (los procesos se inician en ``parse``)."""
+        self.workers = max(1, workers)
+        self.extract = extract or PyPDFExtractor()
+        self.timeout_seconds = timeout_seconds
+        self.pages_per_task = max(1, pages_per_task)
+        # spawn: los procesos no heredan hilos ni conexiones del proceso principal
+        self._context = multiprocessing.get_context("spawn")
+
+    def parse(
+        self,
+        paths: Sequence[Path],
+        extract_for: Optional[Callable[[Path], Extractor]] = None,
+        max_pending_files: Optional[int] = None
+    ) -> Iterator[Tuple[Path, Optional[Pages], Optional[str]]]:
+        """Parsea ``paths``; genera ``(path, páginas, error)`` de cada archivo.
+
+        ``extract_for(path)`` elige el extractor de cada archivo. Los
+        archivos se entregan en el orden de ``paths``; las páginas de cada
+        uno, en orden. ``páginas`` es None si el archivo falló. Se empiezan
+        a lo sumo ``max_pending_files`` archivos (por defecto, dos por
+        proceso) por delante del próximo a entregar, de modo que los
+        archivos terminados que esperan su turno no crecen sin límite.
+        """
+        names = [str(path) for path in paths]
+        positions = {name: index for index, name in enumerate(names)}
+        window = max(1, max_pending_files or self.workers * 2)
+        states = {name: _FileState() for name in names}
+        by_name = {str(path): path for path in paths}
+        extractors = {
+            str(path): extract_for(path) if extract_for else self.extract
+            for path in paths
+        }
+        # Rangos de los archivos ya empezados (tienen prioridad)
+        tasks = deque()
+        # Próximo archivo a empezar y próximo a entregar
+        next_start = 0
+        next_yield = 0
+        # Resultados terminados que esperan su turno: índice -> (páginas, error)
+        finished: Dict[int, Tuple[Optional[Pages], Optional[str]]] = {}
+        
+        def next_task() -> Optional[tuple]:
+            nonlocal next_start
+            while tasks:
+                task = tasks.popleft()
+                # Rangos de un archivo que ya falló
+                if states[task[0]].error is None:
+                    return task
+            if next_start < len(names) and next_start - next_yield < window:
+                next_start += 1
+                return names[next_start - 1], 0, self.pages_per_task
+            return None
+        
+        def has_tasks() -> bool:
+            return bool(tasks) or (next_start < len(names) and next_start - next_yield < window)
+        
+        workers = [
+            _Worker(self._context, self.extract)
+            for _ in range(min(self.workers, len(names)))
+        ]
+        
+        try:
+            while True:
+                for worker in workers:
+                    while worker.ready and worker.task is None:
+                        task = next_task()
+                        if task is None:
+                            break
+                        worker.task = task
+                        worker.deadline = time.monotonic() + self.timeout_seconds
+                        try:
+                            worker.conn.send((extractors[task[0]], *task))
+                        except (BrokenPipeError, OSError):
+                            # El proceso terminó: wait() lo detecta como caída
+                            pass
+                
+                busy = [worker for worker in workers if worker.task is not None]
+                starting = [worker for worker in workers if not worker.ready]
+                if not busy and not (has_tasks() and starting):
+                    break
+                
+                timeout = (
+                    max(0.0, min(worker.deadline for worker in busy) - time.monotonic())
+                    if busy else None
+                )
+                ready = wait([worker.conn for worker in busy + starting], timeout=timeout)
+                
+                for worker in starting:
+                    if worker.conn in ready:
+                        try:
+                            worker.conn.recv()
+                        except (EOFError, OSError):
+                            # Sin tarea asignada: el grupo sigue con un proceso menos
+                            worker.process.join(timeout=1)
+                            logger.log_event(
+                                'pdf_parse_worker_start_failed',
+                                level='WARNING',
+                                exit_code=worker.process.exitcode,
+                                workers_left=len(workers) - 1
+                            )
+                            worker.stop(kill=True)
+                            workers.remove(worker)
+                            continue
+                        worker.ready = True
+                
+                if not workers:
+                    # Ningún proceso pudo iniciar: fallan los archivos pendientes
+                    error = "No PDF parse worker could start"
+                    for position in range(next_yield, len(names)):
+                        if position not in finished and states[names[position]].error is None:
+                            states[names[position]].error = error
+                            finished[position] = (None, error)
+                    tasks.clear()
+                    next_start = len(names)
+                
+                for index, worker in enumerate(workers):
+                    if worker.task is None:
+                        continue
+                    name, start, _ = worker.task
+                    state = states[name]
+                    
+                    if worker.conn in ready:
+                        try:
+                            status, result = worker.conn.recv()
+                        except (EOFError, OSError):
+                            worker.process.join(timeout=1)
+                            status = 'crash'
+                            result = f"Worker exited with code {worker.process.exitcode}"
+                    elif time.monotonic() >= worker.deadline:
+                        status = 'timeout'
+                        result = f"Timed out after {self.timeout_seconds}s (pages from {start})"
+                    else:
+                        continue
+                    
+                    worker.task = None
+                    if status in ('crash', 'timeout'):
+                        logger.log_event(
+                            'pdf_parse_worker_replaced',
+                            level='WARNING',
+                            filename=Path(name).name,
+                            reason=status
+                        )
+                        worker.stop(kill=True)
+                        workers[index] = _Worker(self._context, self.extract)
+                    
+                    if state.error is not None:
+                        continue
+                    if status != 'ok':
+                        state.error = result
+                        finished[positions[name]] = (None, result)
+                        continue
+                    
+                    pages, total = result
+                    state.pages[start] = pages
+                    if state.ranges is None:
+                        state.ranges = max(1, math.ceil(total / self.pages_per_task))
+                        tasks.extend(
+                            (name, range_start, range_start + self.pages_per_task)
+                            for range_start in range(self.pages_per_task, total, self.pages_per_task)
+                        )
+                    if len(state.pages) == state.ranges:
+                        finished[positions[name]] = ([
+                            page for range_start in sorted(state.pages)
+                            for page in state.pages.pop(range_start)
+                        ], None)
+                
+                while next_yield in finished:
+                    pages, error = finished.pop(next_yield)
+                    yield by_name[names[next_yield]], pages, error
+                    next_yield += 1
+        finally:
+            for worker in workers:
+                worker.stop(kill=worker.task is not None)
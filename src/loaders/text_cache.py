@@ -0,0 +1,157 @@
+"""
+Caché del texto extraído de PDFs sobre un único archivo SQLite.
+"""
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# Páginas en caché: (metadatos del extractor, texto)
+CachedPages = List[Tuple[dict, str]]
+
+# Versión del esquema del archivo SQLite (PRAGMA user_version)
+SCHEMA_VERSION = 1
+
+_COMPRESSION_LEVEL = 6
+
+
+class ParsedTextCache:
+    """Texto y metadatos de página extraídos de PDFs, por hash de contenido.
+
+    La clave es el hash SHA-256 del archivo y la versión del extractor, de
+    modo que un archivo renombrado o movido sigue en caché y un cambio de
+    extractor invalida sus entradas. Las páginas se guardan como JSON
+    comprimido con zlib. Cuando el total supera ``max_bytes`` se eliminan
+    las entradas usadas hace más tiempo. Como el caché de embeddings, usa
+    modo WAL y una conexión por hilo.
+    """
+
+    DB_FILENAME = "parsed_text.sqlite3"
+
+    def __init__(self, db_path: Path, max_bytes: int):
+        """Inicializa el caché y crea el esquema."""
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._init_schema()
+
+    def _init_schema(self) -> None:
+        """Crea el esquema si no existe."""
+        conn = self._connection()
+        if conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION:
+            return
+
+        with conn:
+            conn.execute("DROP TABLE IF EXISTS parsed_files")
+            conn.execute(
+                """
+                CREATE TABLE parsed_files (
+                    file_hash TEXT NOT NULL,
+                    extractor TEXT NOT NULL,
+                    pages BLOB NOT NULL,
+                    page_count INTEGER NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (file_hash, extractor)
+                ) WITHOUT ROWID
+                """
+            )
+            conn.execute("CREATE INDEX parsed_files_last_access ON parsed_files (last_access)")
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _connection(self) -> sqlite3.Connection:
+        """Obtiene la conexión del hilo actual (una por hilo)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, file_hash: str, extractor: str) -> Optional[CachedPages]:
+        """Páginas de un archivo, o None si no están en caché."""
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT pages FROM parsed_files WHERE file_hash = ? AND extractor = ?",
+            (file_hash, extractor)
+        ).fetchone()
+        if row is None:
+            return None
+
+        with conn:
+            conn.execute(
+                "UPDATE parsed_files SET last_access = ? WHERE file_hash = ? AND extractor = ?",
+                (time.time(), file_hash, extractor)
+            )
+        return [
+            (metadata, text)
+            for metadata, text in json.loads(zlib.decompress(row[0]).decode('utf-8'))
+        ]
+
+    def contains(self, file_hash: str, extractor: str) -> bool:
+        """Si las páginas de un archivo están en caché (sin leerlas)."""
+        row = self._connection().execute(
+            "SELECT 1 FROM parsed_files WHERE file_hash = ? AND extractor = ?",
+            (file_hash, extractor)
+        ).fetchone()
+        return row is not None
+
+    def put(self, file_hash: str, extractor: str, pages: CachedPages) -> int:
+        """Guarda las páginas de un archivo; retorna las entradas desalojadas."""
+        blob = zlib.compress(
+            json.dumps([[metadata, text] for metadata, text in pages], ensure_ascii=False).encode('utf-8'),
+            _COMPRESSION_LEVEL
+        )
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO parsed_files "
+                "(file_hash, extractor, pages, page_count, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (file_hash, extractor, blob, len(pages), len(blob), now, now)
+            )
+        return self.evict()
+
+    def evict(self) -> int:
+        """Elimina las entradas menos usadas hasta respetar ``max_bytes``."""
+        conn = self._connection()
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM parsed_files").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+
+        evicted = []
+        rows = conn.execute(
+            "SELECT file_hash, extractor, size FROM parsed_files ORDER BY last_access"
+        ).fetchall()
+        for file_hash, extractor, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((file_hash, extractor))
+            total -= size
+
+        with conn:
+            conn.executemany(
+                "DELETE FROM parsed_files WHERE file_hash = ? AND extractor = ?",
+                evicted
+            )
+        return len(evicted)
+
+    def get_stats(self) -> dict:
+        """Entradas, páginas y bytes comprimidos en caché."""
+        files, pages, size = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(page_count), 0), COALESCE(SUM(size), 0) "
+            "FROM parsed_files"
+        ).fetchone()
+        return {
+            'files': files,
+            'pages': pages,
+            'size_mb': size / (1024 * 1024),
+            'max_size_mb': self.max_bytes / (1024 * 1024)
+        }
@@ -0,0 +1,161 @@
+"""
+División de texto con límites definidos por el contenido (content-defined chunking).
+"""
+import copy
+import hashlib
+import re
+from typing import List, Optional, Tuple
+
+from langchain_core.documents import Document
+from langchain_text_splitters.base import TextSplitter
+
+_MASK_64 = (1 << 64) - 1
+# Caracteres que influyen en el hash rodante (los bits altos de un gear
+# hash dependen de los últimos 64 caracteres)
+HASH_WINDOW = 64
+_WHITESPACE = re.compile(r"\s")
+
+
+def _gear_table() -> Tuple[int, ...]:
+    """Tabla de 256 enteros de 64 bits, estable entre ejecuciones y versiones."""
+    return tuple(
+        int.from_bytes(hashlib.sha256(bytes([index])).digest()[:8], 'big')
+        for index in range(256)
+    )
+
+
+_GEAR = _gear_table()
+
+
+def _high_bits_mask(bits: int) -> int:
+    """Máscara con los ``bits`` bits más altos de un entero de 64 bits."""
+    return ((1 << bits) - 1) << (64 - bits)
+
+
+class ContentDefinedTextSplitter(TextSplitter):
+    """Divide texto en chunks cuyos límites dependen solo del contenido local.
+
+    Un gear hash rodante recorre el texto y marca un ancla donde sus bits
+    altos son cero; el chunk se corta en el primer espacio en blanco desde
+    el ancla. Como el hash depende únicamente de los últimos
+    ``HASH_WINDOW`` caracteres, insertar o borrar texto solo mueve los
+    límites cercanos a la edición: los chunks siguientes se
+    resincronizan y conservan su texto (y por lo tanto sus embeddings en
+    caché). Al estilo de FastCDC, la máscara es más estricta antes del
+    tamaño promedio y más laxa después, para concentrar los tamaños.
+
+    Cada chunk mide entre ``min_size`` y ``max_size`` caracteres más un
+    prefijo de hasta ``chunk_overlap`` caracteres del chunk anterior (que
+    empieza en un límite de palabra). Sin ancla antes de ``max_size`` se
+    corta en el último espacio en blanco, o en ``max_size`` si no hay.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 4000,
+        chunk_overlap: int = 200,
+        min_size: Optional[int] = None,
+        avg_size: Optional[int] = None,
+        **kwargs
+    ):
+        """Inicializa el divisor.
+
+        Por defecto el núcleo de cada chunk (sin el solapamiento) mide como
+        máximo ``chunk_size - chunk_overlap``, como mínimo un cuarto de eso
+        y en promedio la mitad.
+        """
+        super().__init__(chunk_size=chunk_size, chunk_overlap=chunk_overlap, **kwargs)
+        self.max_size = max(1, chunk_size - chunk_overlap)
+        self.min_size = min_size if min_size is not None else self.max_size // 4
+        self.avg_size = avg_size if avg_size is not None else self.max_size // 2
+        if not 0 <= self.min_size <= self.avg_size <= self.max_size:
+            raise ValueError(
+                f"Expected min_size <= avg_size <= max_size, got "
+                f"{self.min_size}, {self.avg_size}, {self.max_size}"
+            )
+
+        bits = max(2, (max(1, self.avg_size - self.min_size)).bit_length() - 1)
+        self._mask_strict = _high_bits_mask(bits + 1)
+        self._mask_loose = _high_bits_mask(bits - 1)
+
+    def _find_cut(self, text: str, start: int) -> int:
+        """Posición (exclusiva) del fin del chunk que empieza en ``start``."""
+        end = min(len(text), start + self.max_size)
+        if end - start <= self.min_size:
+            return end
+
+        gear, mask = _GEAR, self._mask_strict
+        mask_loose, normal = self._mask_loose, start + self.avg_size
+        first = start + self.min_size
+        # El hash se inicia una ventana antes del mínimo: en ``first`` ya no
+        # depende de dónde empezó el chunk, solo del texto cercano
+        position = max(start, first - HASH_WINDOW)
+        hash_value = 0
+        while position < end:
+            hash_value = ((hash_value << 1) + gear[ord(text[position]) & 0xFF]) & _MASK_64
+            position += 1
+            if position < first:
+                continue
+            if position == normal:
+                mask = mask_loose
+            if not hash_value & mask:
+                match = _WHITESPACE.search(text, position - 1, end)
+                if match:
+                    return match.end()
+                break
+
+        if end == len(text):
+            return end
+        # Sin ancla: último espacio en blanco dentro de los límites
+        for index in range(end - 1, first - 1, -1):
+            if text[index].isspace():
+                return index + 1
+        return end
+
+    def split_spans(self, text: str) -> List[Tuple[int, str]]:
+        """Chunks de ``text`` con su posición de inicio."""
+        spans = []
+        start = 0
+        previous_start = 0
+        while start < len(text):
+            cut = self._find_cut(text, start)
+
+            chunk_start = start
+            if self._chunk_overlap and spans:
+                overlap_start = max(previous_start, start - self._chunk_overlap)
+                match = _WHITESPACE.search(text, overlap_start, start)
+                if overlap_start > previous_start and match:
+                    overlap_start = match.end()
+                chunk_start = overlap_start
+
+            chunk = text[chunk_start:cut]
+            leading = 0
+            if self._strip_whitespace:
+                leading = len(chunk) - len(chunk.lstrip())
+                chunk = chunk.strip()
+            if chunk.strip():
+                spans.append((chunk_start + leading, chunk))
+                previous_start = start
+            start = cut
+
+        return spans
+
+    def split_text(self, text: str) -> List[str]:
+        """Divide ``text`` en chunks."""
+        return [chunk for _, chunk in self.split_spans(text)]
+
+    def create_documents(
+        self,
+        texts: List[str],
+        metadatas: Optional[List[dict]] = None
+    ) -> List[Document]:
+        """Crea documentos con la posición exacta de cada chunk."""
+        metadatas = metadatas or [{}] * len(texts)
+        documents = []
+        for text, metadata in zip(texts, metadatas):
+            for start, chunk in self.split_spans(text):
+                chunk_metadata = copy.deepcopy(metadata)
+                if self._add_start_index:
+                    chunk_metadata['start_index'] = start
+                documents.append(Document(page_content=chunk, metadata=chunk_metadata))
+        return documents
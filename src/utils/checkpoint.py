@@ -0,0 +1,196 @@
+"""
+Checkpoint de una ejecución de ingesta para poder reanudarla.
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from langchain_core.documents import Document
+
+from src.utils.logger import get_logger
+from src.utils.manifest import IngestPlan
+
+logger = get_logger()
+
+
+def _read_jsonl(path: Path) -> Iterator[dict]:
+    """Líneas de un JSONL; ignora la última si quedó incompleta."""
+    if not path.exists():
+        return
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                logger.log_event(
+                    'ingest_checkpoint_line_skipped',
+                    level='WARNING',
+                    path=str(path)
+                )
+
+
+class IngestCheckpoint:
+    """Progreso de una ingesta en curso.
+
+    En ``state_dir/checkpoint/`` guarda el plan de la ejecución
+    (``run.json``), el tamaño y mtime de cada PDF ya parseado
+    (``parsed.jsonl``), sus páginas (un archivo comprimido por PDF en
+    ``pages/``) y los ids de los chunks de cada lote escrito en MongoDB
+    (``committed.jsonl``). Los JSONL solo se extienden y cada línea se
+    vuelca a disco con ``fsync``, de modo que una interrupción pierde como
+    mucho la línea en curso. Al reanudar, las páginas de los PDFs
+    registrados se leen de a un archivo y los chunks ya escritos no se
+    vuelven a embeber; la ingesta exitosa elimina el checkpoint.
+    """
+
+    DIRNAME = "checkpoint"
+    VERSION = 3
+
+    def __init__(self, state_dir: Path, config: dict):
+        """Inicializa el checkpoint (sin leerlo)."""
+        self.path = Path(state_dir) / self.DIRNAME
+        self.config = config
+        self.plan: Optional[IngestPlan] = None
+        self._lock = threading.Lock()
+
+    @property
+    def _run_path(self) -> Path:
+        return self.path / "run.json"
+
+    @property
+    def _parsed_path(self) -> Path:
+        return self.path / "parsed.jsonl"
+
+    @property
+    def _committed_path(self) -> Path:
+        return self.path / "committed.jsonl"
+
+    def _pages_path(self, key: str) -> Path:
+        name = hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
+        return self.path / "pages" / f"{name}.json.z"
+
+    def load(self) -> bool:
+        """Carga una ejecución interrumpida; False si no hay una reanudable."""
+        if not self._run_path.exists():
+            return False
+        try:
+            run = json.loads(self._run_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            logger.log_event(
+                'ingest_checkpoint_unreadable',
+                level='WARNING',
+                path=str(self._run_path),
+                error=str(e)
+            )
+            return False
+
+        if run.get('version') != self.VERSION or run.get('config') != self.config:
+            logger.log_event(
+                'ingest_checkpoint_discarded',
+                level='WARNING',
+                reason='config_changed',
+                started_at=run.get('started_at')
+            )
+            return False
+
+        self.plan = IngestPlan()
+        for name in ('new', 'changed', 'unchanged', 'deleted'):
+            setattr(self.plan, name, list(run['plan'].get(name, [])))
+        return True
+
+    def start(self, plan: IngestPlan) -> None:
+        """Descarta el checkpoint anterior e inicia uno para ``plan``."""
+        self.clear()
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.plan = plan
+        run = {
+            'version': self.VERSION,
+            'config': self.config,
+            'plan': {
+                'new': plan.new,
+                'changed': plan.changed,
+                'unchanged': plan.unchanged,
+                'deleted': plan.deleted
+            },
+            'started_at': time.time()
+        }
+        self._run_path.write_text(json.dumps(run, ensure_ascii=False), encoding='utf-8')
+
+    def parsed_files(self, files: Dict[str, Path]) -> List[str]:
+        """Claves de ``files`` ya parseadas cuyo tamaño y mtime no cambiaron."""
+        parsed = []
+        for entry in _read_jsonl(self._parsed_path):
+            path = files.get(entry['key'])
+            if path is None or not path.exists():
+                continue
+            stat = path.stat()
+            if entry['size'] != stat.st_size or entry['mtime'] != stat.st_mtime:
+                continue
+            if not self._pages_path(entry['key']).exists():
+                continue
+            parsed.append(entry['key'])
+        return parsed
+
+    def load_parsed(self, key: str) -> List[Document]:
+        """Páginas de un PDF registrado con ``record_parsed``."""
+        blob = self._pages_path(key).read_bytes()
+        return [
+            Document(page_content=text, metadata=metadata)
+            for metadata, text in json.loads(zlib.decompress(blob).decode('utf-8'))
+        ]
+
+    def record_parsed(self, key: str, path: Path, documents: Sequence[Document]) -> None:
+        """Registra un PDF parseado y guarda sus páginas."""
+        pages_path = self._pages_path(key)
+        pages_path.parent.mkdir(parents=True, exist_ok=True)
+        blob = zlib.compress(
+            json.dumps(
+                [[doc.metadata, doc.page_content] for doc in documents],
+                ensure_ascii=False,
+                default=str
+            ).encode('utf-8'),
+            1
+        )
+        # Escritura atómica: la línea de ``parsed.jsonl`` se agrega después
+        tmp_path = pages_path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, pages_path)
+
+        stat = path.stat()
+        self._append(self._parsed_path, {'key': key, 'size': stat.st_size, 'mtime': stat.st_mtime})
+
+    def committed_ids(self) -> set:
+        """Ids de chunks escritos en MongoDB durante esta ejecución."""
+        return {
+            chunk_id
+            for entry in _read_jsonl(self._committed_path)
+            for chunk_id in entry['ids']
+        }
+
+    def record_committed(self, ids: Sequence[str]) -> None:
+        """Registra un lote escrito en MongoDB (admite escritores en paralelo)."""
+        self._append(self._committed_path, {'ids': list(ids), 'committed_at': time.time()})
+
+    def _append(self, path: Path, entry: dict) -> None:
+        """Agrega una línea al JSONL y la vuelca a disco."""
+        line = json.dumps(entry, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def clear(self) -> None:
+        """Elimina el checkpoint."""
+        if self.path.exists():
+            shutil.rmtree(self.path)
+        self.plan = None
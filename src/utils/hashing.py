@@ -0,0 +1,65 @@
+"""
+Hashes de archivos y de chunks para identificar contenido de forma estable.
+"""
+import hashlib
+from pathlib import Path
+
+from langchain_core.documents import Document
+
+# Bytes leídos por iteración al calcular el hash de un archivo
+_READ_SIZE = 1024 * 1024
+# Caracteres hexadecimales de un id de chunk (128 bits)
+CHUNK_ID_LENGTH = 32
+
+
+def compute_file_hash(file_path: Path) -> str:
+    """SHA-256 del contenido de un archivo, leído por bloques."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(_READ_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def compute_chunk_id(file_hash: str, page: int, offset: int, text: str) -> str:
+    """Id determinista de un chunk.
+
+    Depende del contenido del archivo, la página, la posición del chunk en
+    la página y el texto del chunk: la misma entrada produce siempre el
+    mismo id, y cualquier cambio de contenido produce uno nuevo.
+    """
+    text_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+    key = f"{file_hash}|{page}|{offset}|{text_hash}"
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:CHUNK_ID_LENGTH]
+
+
+def document_chunk_id(document: Document) -> str:
+    """Id determinista de un chunk a partir de sus metadatos.
+
+    Usa ``file_hash`` (o ``source`` si el cargador no lo registró),
+    ``page`` (o ``seq_num`` en documentos JSON) y ``start_index``.
+    """
+    metadata = document.metadata
+    return compute_chunk_id(
+        str(metadata.get('file_hash') or metadata.get('source', '')),
+        metadata.get('page', metadata.get('seq_num', 0)),
+        metadata.get('start_index', 0),
+        document.page_content
+    )
+
+
+def content_chunk_id(document: Document, occurrence: int = 0) -> str:
+    """Id de un chunk que no depende de su posición ni del hash del archivo.
+
+    Usa ``source``, ``page`` (o ``seq_num``), el texto del chunk y
+    ``occurrence`` (cuántos chunks anteriores de la misma página tienen el
+    mismo texto). Con límites definidos por el contenido, los chunks que
+    una edición no tocó conservan su id aunque cambie su posición.
+    """
+    metadata = document.metadata
+    return compute_chunk_id(
+        str(metadata.get('source') or metadata.get('file_hash', '')),
+        metadata.get('page', metadata.get('seq_num', 0)),
+        occurrence,
+        document.page_content
+    )
@@ -0,0 +1,152 @@
+"""
+Manifest local de archivos ingestados para la ingesta incremental.
+"""
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.utils.hashing import compute_file_hash
+from src.utils.logger import get_logger
+
+logger = get_logger()
+
+
+class IngestPlan:
+    """Archivos a procesar y a eliminar en una ingesta incremental."""
+
+    def __init__(self):
+        """Inicializa el plan vacío."""
+        self.new: List[str] = []
+        self.changed: List[str] = []
+        self.unchanged: List[str] = []
+        self.deleted: List[str] = []
+
+    @property
+    def to_process(self) -> List[str]:
+        """Archivos nuevos o modificados."""
+        return self.new + self.changed
+
+    def reprocess_all(self) -> None:
+        """Marca los archivos sin cambios como modificados (ingesta completa)."""
+        self.changed.extend(self.unchanged)
+        self.unchanged = []
+
+    def as_dict(self) -> dict:
+        """Cantidad de archivos por categoría."""
+        return {
+            'new_files': len(self.new),
+            'changed_files': len(self.changed),
+            'unchanged_files': len(self.unchanged),
+            'deleted_files': len(self.deleted)
+        }
+
+
+class IngestManifest:
+    """Registro de los archivos ingestados y de sus chunks.
+
+    Por archivo guarda tamaño, mtime, hash de contenido e ids de chunk, junto
+    con la configuración de ingesta. Un archivo con el mismo tamaño y mtime
+    se considera sin cambios sin leerlo; si difieren, se compara el hash. Si
+    la configuración cambió, todos los archivos se consideran modificados.
+    """
+
+    FILENAME = "manifest.json"
+    VERSION = 1
+
+    def __init__(self, state_dir: Path, config: dict):
+        """Carga el manifest de ``state_dir`` (si existe)."""
+        self.state_dir = Path(state_dir)
+        self.path = self.state_dir / self.FILENAME
+        self.config = config
+        self.files: Dict[str, dict] = {}
+        self.config_changed = False
+
+        if self.path.exists():
+            try:
+                data = json.loads(self.path.read_text(encoding='utf-8'))
+            except (OSError, ValueError) as e:
+                logger.log_event(
+                    'ingest_manifest_unreadable',
+                    level='WARNING',
+                    path=str(self.path),
+                    error=str(e)
+                )
+                data = {}
+
+            if data.get('version') == self.VERSION:
+                self.files = data.get('files', {})
+                self.config_changed = data.get('config') != config
+                if self.config_changed and self.files:
+                    logger.log_event(
+                        'ingest_manifest_config_changed',
+                        level='WARNING',
+                        previous=data.get('config'),
+                        current=config
+                    )
+
+    def plan(self, files: Dict[str, Path]) -> IngestPlan:
+        """Clasifica ``files`` (clave relativa -> ruta) frente al manifest."""
+        plan = IngestPlan()
+
+        for key, path in files.items():
+            entry = self.files.get(key)
+            if entry is None:
+                plan.new.append(key)
+                continue
+            if self.config_changed:
+                plan.changed.append(key)
+                continue
+
+            stat = path.stat()
+            if entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+                plan.unchanged.append(key)
+                continue
+
+            # Tamaño o fecha distintos: el contenido decide
+            if compute_file_hash(path) == entry['file_hash']:
+                entry['size'] = stat.st_size
+                entry['mtime'] = stat.st_mtime
+                plan.unchanged.append(key)
+            else:
+                plan.changed.append(key)
+
+        plan.deleted = [key for key in self.files if key not in files]
+        return plan
+
+    def chunk_ids(self, key: str) -> List[str]:
+        """Ids de chunk registrados para un archivo."""
+        entry = self.files.get(key)
+        return list(entry['chunk_ids']) if entry else []
+
+    def record(
+        self,
+        key: str,
+        path: Path,
+        chunk_ids: List[str],
+        file_hash: Optional[str] = None
+    ) -> None:
+        """Registra un archivo ingestado."""
+        stat = path.stat()
+        self.files[key] = {
+            'path': str(path),
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'file_hash': file_hash or compute_file_hash(path),
+            'chunk_ids': list(chunk_ids),
+            'ingested_at': time.time()
+        }
+
+    def remove(self, key: str) -> None:
+        """Elimina un archivo del manifest."""
+        self.files.pop(key, None)
+
+    def save(self) -> None:
+        """Guarda el manifest de forma atómica."""
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        data = {'version': self.VERSION, 'config': self.config, 'files': self.files}
+        temp_path = self.path.with_suffix('.tmp')
+        temp_path.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+        os.replace(temp_path, self.path)
+        self.config_changed = False
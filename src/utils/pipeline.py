@@ -0,0 +1,239 @@
+"""
+Pipeline de etapas en hilos conectadas por colas acotadas.
+"""
+import queue
+import threading
+import time
+from typing import Any, Callable, Iterable, List, Optional, Sequence
+
+# Intervalo de sondeo para detectar la cancelación por error (segundos)
+_POLL_SECONDS = 0.1
+_END = object()
+
+
+class Stage:
+    """Etapa de un pipeline.
+
+    ``func(item)`` retorna un iterable con los elementos para la etapa
+    siguiente (puede estar vacío). ``flush()``, si se indica, se invoca al
+    agotarse la entrada y retorna los elementos pendientes; requiere un
+    único worker. ``measure(item)`` define las unidades de trabajo de cada
+    elemento de entrada (por ejemplo, documentos de un lote) para las
+    estadísticas de throughput.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[Any], Iterable[Any]],
+        workers: int = 1,
+        flush: Optional[Callable[[], Iterable[Any]]] = None,
+        measure: Optional[Callable[[Any], int]] = None
+    ):
+        """Inicializa la etapa."""
+        if flush is not None and workers != 1:
+            raise ValueError("A stage with flush() must have exactly one worker")
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.flush = flush
+        self.measure = measure
+
+
+class _StageStats:
+    """Contadores de una etapa (compartidos por sus workers)."""
+
+    def __init__(self, name: str, workers: int):
+        """Inicializa los contadores."""
+        self.name = name
+        self.workers = workers
+        self.lock = threading.Lock()
+        self.items = 0
+        self.units = 0
+        self.outputs = 0
+        self.busy_seconds = 0.0
+        self.blocked_seconds = 0.0
+        self.idle_seconds = 0.0
+        self.depth_samples = 0
+        self.depth_total = 0
+        self.depth_max = 0
+
+    def sample_depth(self, depth: int) -> None:
+        """Registra la profundidad de la cola de entrada."""
+        with self.lock:
+            self.depth_samples += 1
+            self.depth_total += depth
+            self.depth_max = max(self.depth_max, depth)
+
+    def as_dict(self, wall_seconds: float) -> dict:
+        """Estadísticas de la etapa."""
+        return {
+            'stage': self.name,
+            'workers': self.workers,
+            'items': self.items,
+            'units': self.units,
+            'outputs': self.outputs,
+            'busy_seconds': round(self.busy_seconds, 3),
+            'blocked_seconds': round(self.blocked_seconds, 3),
+            'idle_seconds': round(self.idle_seconds, 3),
+            'units_per_second': self.units / wall_seconds if wall_seconds > 0 else None,
+            'queue_depth_max': self.depth_max,
+            'queue_depth_avg': (
+                self.depth_total / self.depth_samples if self.depth_samples else 0
+            )
+        }
+
+
+class Pipeline:
+    """Ejecuta etapas en paralelo, cada una en sus propios hilos.
+
+    Las colas entre etapas tienen capacidad ``queue_size``: si una etapa es
+    lenta (por ejemplo, escrituras a Atlas), las anteriores se bloquean al
+    llenar su cola de salida en lugar de acumular trabajo en memoria. Si
+    una etapa falla se detienen todas y ``run`` propaga el error.
+    """
+
+    def __init__(self, stages: Sequence[Stage], queue_size: int = 2):
+        """Inicializa el pipeline."""
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        self.stages = list(stages)
+        self.queue_size = max(1, queue_size)
+        self.stats: List[dict] = []
+
+    def run(self, source: Iterable[Any]) -> List[Any]:
+        """Procesa ``source``; retorna las salidas de la última etapa.
+
+        Con más de un worker por etapa las salidas no conservan el orden.
+        """
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        stats = [_StageStats(stage.name, stage.workers) for stage in self.stages]
+        source_stats = _StageStats('source', 1)
+        results: List[Any] = []
+        results_lock = threading.Lock()
+        stop = threading.Event()
+        errors: List[BaseException] = []
+        remaining = [stage.workers for stage in self.stages]
+        remaining_lock = threading.Lock()
+
+        def put(index: int, item: Any, owner: _StageStats) -> bool:
+            """Envía ``item`` a la etapa ``index``; False si se canceló."""
+            if index == len(self.stages):
+                with results_lock:
+                    results.append(item)
+                return True
+            start = time.perf_counter()
+            try:
+                while not stop.is_set():
+                    try:
+                        queues[index].put(item, timeout=_POLL_SECONDS)
+                        return True
+                    except queue.Full:
+                        continue
+                return False
+            finally:
+                with owner.lock:
+                    owner.blocked_seconds += time.perf_counter() - start
+
+        def fail(error: BaseException) -> None:
+            """Registra el primer error y cancela el pipeline."""
+            errors.append(error)
+            stop.set()
+
+        def feed() -> None:
+            """Carga los elementos de ``source`` en la primera cola."""
+            try:
+                iterator = iter(source)
+                while not stop.is_set():
+                    start = time.perf_counter()
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        break
+                    source_stats.busy_seconds += time.perf_counter() - start
+                    source_stats.items += 1
+                    source_stats.units += 1
+                    if not put(0, item, source_stats):
+                        return
+                for _ in range(self.stages[0].workers):
+                    if not put(0, _END, source_stats):
+                        return
+            except BaseException as e:
+                fail(e)
+
+        def work(index: int) -> None:
+            """Worker de la etapa ``index``."""
+            stage, stage_stats = self.stages[index], stats[index]
+            try:
+                while not stop.is_set():
+                    start = time.perf_counter()
+                    try:
+                        item = queues[index].get(timeout=_POLL_SECONDS)
+                    except queue.Empty:
+                        with stage_stats.lock:
+                            stage_stats.idle_seconds += time.perf_counter() - start
+                        continue
+                    with stage_stats.lock:
+                        stage_stats.idle_seconds += time.perf_counter() - start
+                    if item is _END:
+                        break
+                    stage_stats.sample_depth(queues[index].qsize())
+
+                    start = time.perf_counter()
+                    outputs = list(stage.func(item) or ())
+                    with stage_stats.lock:
+                        stage_stats.busy_seconds += time.perf_counter() - start
+                        stage_stats.items += 1
+                        stage_stats.units += stage.measure(item) if stage.measure else 1
+                        stage_stats.outputs += len(outputs)
+                    for output in outputs:
+                        if not put(index + 1, output, stage_stats):
+                            return
+
+                if stop.is_set():
+                    return
+
+                with remaining_lock:
+                    remaining[index] -= 1
+                    last_worker = remaining[index] == 0
+                if not last_worker:
+                    return
+
+                if stage.flush is not None:
+                    for output in stage.flush() or ():
+                        with stage_stats.lock:
+                            stage_stats.outputs += 1
+                        if not put(index + 1, output, stage_stats):
+                            return
+                if index + 1 < len(self.stages):
+                    for _ in range(self.stages[index + 1].workers):
+                        if not put(index + 1, _END, stage_stats):
+                            return
+            except BaseException as e:
+                fail(e)
+
+        start_time = time.perf_counter()
+        threads = [threading.Thread(target=feed, name="pipeline-source", daemon=True)]
+        for index, stage in enumerate(self.stages):
+            threads.extend(
+                threading.Thread(
+                    target=work,
+                    args=(index,),
+                    name=f"pipeline-{stage.name}-{worker}",
+                    daemon=True
+                )
+                for worker in range(stage.workers)
+            )
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        wall_seconds = time.perf_counter() - start_time
+        self.stats = [source_stats.as_dict(wall_seconds)] + [
+            stage_stats.as_dict(wall_seconds) for stage_stats in stats
+        ]
+
+        if errors:
+            raise errors[0]
+        return results
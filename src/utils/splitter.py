@@ -1,17 +1,73 @@
 """
 Utilidades para división de texto.
 """
-from typing import List
+import itertools
+import multiprocessing
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, Optional
 
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 
 from src.config import get_settings
+from src.utils.cdc_splitter import ContentDefinedTextSplitter
+from src.utils.hashing import content_chunk_id, document_chunk_id
 from src.utils.logger import get_logger, measure_time
+from src.utils.token_splitter import TokenBoundedTextSplitter
+from src.utils.tokenizer import get_token_counter
 
 settings = get_settings()
 logger = get_logger()
 
+CHUNKING_STRATEGIES = ("recursive", "content_defined", "token")
+
+# Divisor de cada proceso de ``iter_split_pages`` (ver ``_init_split_worker``)
+_worker_splitter: Optional["DocumentSplitter"] = None
+
+
+def _init_split_worker(chunk_size: int, chunk_overlap: int, strategy: str) -> None:
+    """Crea el divisor de un proceso con la configuración del principal."""
+    global _worker_splitter
+    _worker_splitter = DocumentSplitter(chunk_size, chunk_overlap, strategy)
+
+
+def _split_batch(documents: List[Document]) -> List[List[Document]]:
+    """Chunks de cada documento de un lote (en un proceso del pool)."""
+    return [_worker_splitter.split_page(doc) for doc in documents]
+
+
+class PageLinker:
+    """Enlaza las páginas sucesivas de un flujo de chunks por página.
+
+    La última página con chunks (y las vacías que le siguen) se retiene
+    hasta la próxima página con chunks, que completa su enlace (ver
+    ``DocumentSplitter.link_pages``); las páginas salen en el orden en que
+    entraron.
+    """
+
+    def __init__(self):
+        """Inicializa el enlazador."""
+        self.held: List[List[Document]] = []
+
+    def add(self, chunks: List[Document]) -> List[List[Document]]:
+        """Agrega los chunks de una página; retorna las páginas listas."""
+        ready = []
+        if chunks and self.held:
+            DocumentSplitter.link_pages(self.held[0], chunks)
+            ready, self.held = self.held, []
+        if chunks or self.held:
+            self.held.append(chunks)
+        else:
+            ready.append(chunks)
+        return ready
+
+    def flush(self) -> List[List[Document]]:
+        """Retorna las páginas retenidas."""
+        ready, self.held = self.held, []
+        return ready
+
 
 class DocumentSplitter:
     """Clase para dividir documentos en chunks."""
@@ -19,33 +75,251 @@ class DocumentSplitter:
     def __init__(
         self, 
         chunk_size: int = None, 
-        chunk_overlap: int = None
+        chunk_overlap: int = None,
+        strategy: str = None
     ):
-        """Inicializa el divisor de documentos."""
-        self.chunk_size = chunk_size or settings.chunk_size
-        self.chunk_overlap = chunk_overlap or settings.chunk_overlap
+        """Inicializa el divisor de documentos.
+
+        ``strategy`` es ``recursive`` (separadores de párrafo, línea y
+        palabra), ``content_defined`` (límites por hash rodante, estables
+        ante ediciones; ver ``ContentDefinedTextSplitter``) o ``token``
+        (tamaños en tokens del modelo de embeddings, por defecto
+        ``CHUNK_SIZE_TOKENS`` y ``CHUNK_OVERLAP_TOKENS``; ver
+        ``TokenBoundedTextSplitter``).
+        """
+        self.strategy = strategy or settings.chunking_strategy
+        if self.strategy not in CHUNKING_STRATEGIES:
+            raise ValueError(
+                f"Unknown chunking strategy '{self.strategy}'. "
+                f"Available: {', '.join(CHUNKING_STRATEGIES)}"
+            )
         
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=self.chunk_size,
-            chunk_overlap=self.chunk_overlap
-        )
+        if self.strategy == "token":
+            self.chunk_size = chunk_size or settings.chunk_size_tokens
+            self.chunk_overlap = settings.chunk_overlap_tokens if chunk_overlap is None else chunk_overlap
+            self.text_splitter = TokenBoundedTextSplitter(
+                get_token_counter(settings.embedding_model),
+                chunk_size=self.chunk_size,
+                chunk_overlap=self.chunk_overlap,
+                add_start_index=True
+            )
+        else:
+            self.chunk_size = chunk_size or settings.chunk_size
+            self.chunk_overlap = settings.chunk_overlap if chunk_overlap is None else chunk_overlap
+            splitter_class = (
+                ContentDefinedTextSplitter
+                if self.strategy == "content_defined"
+                else RecursiveCharacterTextSplitter
+            )
+            self.text_splitter = splitter_class(
+                chunk_size=self.chunk_size,
+                chunk_overlap=self.chunk_overlap,
+                # Posición del chunk en la página, parte de su id determinista
+                add_start_index=True
+            )
         
         logger.log_event(
             'document_splitter_initialized',
             chunk_size=self.chunk_size,
-            chunk_overlap=self.chunk_overlap
+            chunk_overlap=self.chunk_overlap,
+            strategy=self.strategy
+        )
+    
+    def _assign_ids(self, split_docs: List[Document]) -> None:
+        """Asigna a cada chunk su id determinista.
+
+        Con límites definidos por el contenido el id no incluye la posición
+        ni el hash del archivo, para que los chunks no editados conserven
+        su id (y no se vuelvan a escribir) tras una edición.
+        """
+        if self.strategy != "content_defined":
+            for doc in split_docs:
+                doc.id = document_chunk_id(doc)
+            return
+        
+        occurrences = Counter()
+        for doc in split_docs:
+            key = (
+                doc.metadata.get('source'),
+                doc.metadata.get('page', doc.metadata.get('seq_num')),
+                doc.page_content
+            )
+            doc.id = content_chunk_id(doc, occurrences[key])
+            occurrences[key] += 1
+    
+    @staticmethod
+    def _link_chunks(split_docs: List[Document]) -> None:
+        """Registra la posición de cada chunk en su página y sus vecinos.
+
+        ``chunk_seq`` es el número del chunk dentro de la página,
+        ``start_index``/``end_index`` sus caracteres en la página y
+        ``prev_chunk_id``/``next_chunk_id`` los ids de los chunks contiguos,
+        que la búsqueda usa para reconstruir el contexto de cada resultado
+        (ver ``MongoDBVectorStore.expand_with_neighbors``). No forman parte
+        del id del chunk. El último chunk de una página de PDF se enlaza
+        con el primero de la página siguiente (ver ``link_pages``).
+        """
+        def page_key(doc: Document) -> tuple:
+            return (
+                doc.metadata.get('source'),
+                doc.metadata.get('page', doc.metadata.get('seq_num'))
+            )
+        
+        previous: List[Document] = []
+        for _, group in itertools.groupby(split_docs, key=page_key):
+            chunks = list(group)
+            for seq, doc in enumerate(chunks):
+                start = doc.metadata.get('start_index', 0)
+                doc.metadata.update({
+                    'chunk_seq': seq,
+                    'end_index': start + len(doc.page_content),
+                    'prev_chunk_id': chunks[seq - 1].id if seq > 0 else None,
+                    'next_chunk_id': chunks[seq + 1].id if seq + 1 < len(chunks) else None
+                })
+            DocumentSplitter.link_pages(previous, chunks)
+            previous = chunks
+    
+    @staticmethod
+    def link_pages(previous: List[Document], chunks: List[Document]) -> None:
+        """Enlaza el último chunk de ``previous`` con el primero de ``chunks``.
+
+        Solo si son páginas sucesivas del mismo PDF: los registros de un
+        JSON (``seq_num``) son independientes y no se enlazan entre sí.
+        """
+        if not previous or not chunks:
+            return
+        last, first = previous[-1].metadata, chunks[0].metadata
+        if (
+            'page' in last and 'page' in first
+            and last.get('source') == first.get('source')
+            and last.get('file_hash') == first.get('file_hash')
+            and first['page'] > last['page']
+        ):
+            last['next_chunk_id'] = chunks[0].id
+            first['prev_chunk_id'] = previous[-1].id
+    
+    def split_page(self, document: Document) -> List[Document]:
+        """Chunks de un documento, con sus ids y posiciones."""
+        chunks = self.text_splitter.split_documents([document])
+        self._assign_ids(chunks)
+        self._link_chunks(chunks)
+        return chunks
+    
+    def iter_split_pages(
+        self,
+        documents: Iterable[Document],
+        workers: Optional[int] = None
+    ) -> Iterator[List[Document]]:
+        """Genera los chunks de cada documento, en el orden de ``documents``.
+
+        Los documentos se leen a medida que se necesitan. Con más de un
+        worker (por defecto, ``SPLIT_WORKERS``) se dividen en procesos
+        separados, en lotes de ``SPLIT_BATCH_PAGES`` documentos y con a lo
+        sumo dos lotes por proceso en curso, de modo que la memoria no
+        depende del tamaño de la entrada. Los chunks de una página se
+        entregan al dividir la siguiente, para enlazarlos entre sí.
+        """
+        workers = settings.split_workers if workers is None else workers
+        linker = PageLinker()
+        for chunks in self._iter_unlinked_pages(documents, workers):
+            yield from linker.add(chunks)
+        yield from linker.flush()
+    
+    def _iter_unlinked_pages(
+        self,
+        documents: Iterable[Document],
+        workers: int
+    ) -> Iterator[List[Document]]:
+        """Chunks de cada documento, sin enlazar entre páginas."""
+        if workers <= 1:
+            for doc in documents:
+                yield self.split_page(doc)
+            return
+        
+        batch_size = max(1, settings.split_batch_pages)
+        executor = ProcessPoolExecutor(
+            workers,
+            # spawn: los procesos no heredan hilos ni conexiones del proceso principal
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_split_worker,
+            initargs=(self.chunk_size, self.chunk_overlap, self.strategy)
+        )
+        iterator = iter(documents)
+        pending = deque()
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(pending) < workers * 2:
+                    batch = list(itertools.islice(iterator, batch_size))
+                    if batch:
+                        pending.append(executor.submit(_split_batch, batch))
+                    else:
+                        exhausted = True
+                if not pending:
+                    return
+                yield from pending.popleft().result()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+    
+    def iter_split_documents(
+        self,
+        documents: Iterable[Document],
+        workers: Optional[int] = None
+    ) -> Iterator[Document]:
+        """Genera los chunks de ``documents`` en orden, como ``split_documents``.
+
+        Ver ``iter_split_pages``; los chunks de un documento se entregan en
+        cuanto se divide, sin esperar al resto.
+        """
+        start_time = time.time()
+        input_count = 0
+        output_count = 0
+        for chunks in self.iter_split_pages(documents, workers):
+            input_count += 1
+            output_count += len(chunks)
+            yield from chunks
+        
+        logger.log_event(
+            'documents_split',
+            input_count=input_count,
+            output_count=output_count,
+            workers=settings.split_workers if workers is None else workers,
+            duration_seconds=time.time() - start_time,
+            status='success'
         )
     
     @measure_time
-    def split_documents(self, documents: List[Document]) -> List[Document]:
-        """Divide una lista de documentos en chunks."""
+    def split_documents(
+        self,
+        documents: List[Document],
+        workers: Optional[int] = None
+    ) -> List[Document]:
+        """Divide una lista de documentos en chunks.
+
+        Cada chunk recibe un ``id`` determinista (ver ``_assign_ids``) que
+        se usa como ``_id`` en MongoDB y su posición en la página (ver
+        ``_link_chunks``). Con más de un worker (por defecto,
+        ``SPLIT_WORKERS``) los documentos se dividen en procesos separados
+        (ver ``iter_split_pages``), con el mismo resultado.
+        """
+        workers = settings.split_workers if workers is None else workers
         try:
-            split_docs = self.text_splitter.split_documents(documents)
+            if workers > 1:
+                split_docs = [
+                    chunk
+                    for chunks in self.iter_split_pages(documents, workers)
+                    for chunk in chunks
+                ]
+            else:
+                split_docs = self.text_splitter.split_documents(documents)
+                self._assign_ids(split_docs)
+                self._link_chunks(split_docs)
             
             logger.log_event(
                 'documents_split',
                 input_count=len(documents),
                 output_count=len(split_docs),
+                workers=workers,
                 status='success'
             )
             
@@ -0,0 +1,123 @@
+"""
+División de texto en chunks medidos en tokens del modelo de embeddings.
+"""
+import copy
+from typing import List, Optional, Tuple
+
+from langchain_core.documents import Document
+from langchain_text_splitters.base import TextSplitter
+
+from src.utils.tokenizer import TokenCounter
+
+# Fracción mínima de ``chunk_size`` que ocupa un chunk cortado en un
+# separador (si no hay separadores en ese tramo, se corta en el límite)
+MIN_FILL = 0.75
+_SENTENCE_ENDS = ".!?;:"
+
+
+def _boundary_level(text: str, position: int) -> int:
+    """Calidad de ``position`` como límite de chunk (0 = dentro de una palabra)."""
+    before = text[max(0, position - 2):position]
+    after = text[position:position + 2]
+    if "\n\n" in before + after:
+        return 4
+    if "\n" in before[-1:] + after[:1]:
+        return 3
+    if not (before[-1:].isspace() or after[:1].isspace()):
+        return 0
+    last = before.rstrip()[-1:]
+    return 2 if last and last in _SENTENCE_ENDS else 1
+
+
+class TokenBoundedTextSplitter(TextSplitter):
+    """Divide texto en chunks de como máximo ``chunk_size`` tokens.
+
+    Cada texto se codifica una sola vez (ver ``TokenCounter.offsets``): los
+    candidatos a límite se evalúan sobre las posiciones de los tokens, sin
+    volver a tokenizar el texto de cada candidato como hace un divisor con
+    ``length_function``. El chunk se corta en el mejor separador (párrafo,
+    línea, oración o espacio) entre el ``MIN_FILL`` de ``chunk_size`` y el
+    máximo, de modo que los chunks quedan cerca del límite de tokens. El
+    solapamiento son hasta ``chunk_overlap`` tokens del chunk anterior,
+    desde un inicio de palabra.
+    """
+
+    def __init__(
+        self,
+        token_counter: TokenCounter,
+        chunk_size: int = 256,
+        chunk_overlap: int = 32,
+        **kwargs
+    ):
+        """Inicializa el divisor (tamaños en tokens)."""
+        super().__init__(chunk_size=chunk_size, chunk_overlap=chunk_overlap, **kwargs)
+        self.token_counter = token_counter
+
+    def _find_cut(self, text: str, bounds: List[int], start: int, end: int) -> int:
+        """Índice del token donde termina el chunk que empieza en ``start``."""
+        lowest = start + max(1, int(self._chunk_size * MIN_FILL))
+        best, best_level = end, 0
+        for index in range(end, lowest - 1, -1):
+            level = _boundary_level(text, bounds[index])
+            if level > best_level:
+                best, best_level = index, level
+                if level == 4:
+                    break
+        return best
+
+    def _next_start(self, text: str, bounds: List[int], start: int, end: int) -> int:
+        """Primer token del chunk siguiente, con el solapamiento."""
+        if not self._chunk_overlap:
+            return end
+        for index in range(max(start + 1, end - self._chunk_overlap), end):
+            if _boundary_level(text, bounds[index]):
+                return index
+        return end
+
+    def split_spans(self, text: str) -> List[Tuple[int, str]]:
+        """Chunks de ``text`` con su posición de inicio."""
+        offsets = self.token_counter.offsets(text)
+        # El token i ocupa los caracteres [bounds[i], bounds[i + 1])
+        bounds = offsets + [len(text)]
+        token_count = len(offsets)
+
+        spans = []
+        start = 0
+        while start < token_count:
+            end = min(token_count, start + self._chunk_size)
+            if end < token_count:
+                end = self._find_cut(text, bounds, start, end)
+
+            chunk = text[bounds[start]:bounds[end]]
+            leading = 0
+            if self._strip_whitespace:
+                leading = len(chunk) - len(chunk.lstrip())
+                chunk = chunk.strip()
+            if chunk:
+                spans.append((bounds[start] + leading, chunk))
+
+            if end >= token_count:
+                break
+            start = self._next_start(text, bounds, start, end)
+
+        return spans
+
+    def split_text(self, text: str) -> List[str]:
+        """Divide ``text`` en chunks."""
+        return [chunk for _, chunk in self.split_spans(text)]
+
+    def create_documents(
+        self,
+        texts: List[str],
+        metadatas: Optional[List[dict]] = None
+    ) -> List[Document]:
+        """Crea documentos con la posición exacta de cada chunk."""
+        metadatas = metadatas or [{}] * len(texts)
+        documents = []
+        for text, metadata in zip(texts, metadatas):
+            for start, chunk in self.split_spans(text):
+                chunk_metadata = copy.deepcopy(metadata)
+                if self._add_start_index:
+                    chunk_metadata['start_index'] = start
+                documents.append(Document(page_content=chunk, metadata=chunk_metadata))
+        return documents
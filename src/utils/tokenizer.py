@@ -0,0 +1,130 @@
+"""
+Conteo de tokens con el tokenizer del modelo de embeddings.
+"""
+import math
+from functools import lru_cache
+from typing import List, Sequence
+
+from src.utils.logger import get_logger
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - depende del entorno
+    tiktoken = None
+
+logger = get_logger()
+
+# Caracteres por token usados cuando no hay tokenizer disponible
+FALLBACK_CHARS_PER_TOKEN = 4
+
+
+class TokenCounter:
+    """Cuenta, trunca y divide textos en tokens del modelo de embeddings.
+
+    Usa ``tiktoken`` con la codificación del modelo. Si ``tiktoken`` no está
+    instalado o la codificación no puede cargarse (por ejemplo, sin acceso
+    a red), usa una aproximación de ``FALLBACK_CHARS_PER_TOKEN`` caracteres
+    por token; ``exact`` indica cuál de los dos modos está activo.
+    """
+
+    def __init__(self, model: str):
+        """Inicializa el contador para el modelo indicado."""
+        self.model = model
+        self.encoding = self._load_encoding(model)
+        self.exact = self.encoding is not None
+
+    @staticmethod
+    def _load_encoding(model: str):
+        """Carga la codificación de tiktoken del modelo, si es posible."""
+        if tiktoken is None:
+            logger.log_event(
+                'tokenizer_fallback',
+                level='WARNING',
+                model=model,
+                reason='tiktoken_not_installed'
+            )
+            return None
+
+        try:
+            try:
+                return tiktoken.encoding_for_model(model)
+            except KeyError:
+                return tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            logger.log_event(
+                'tokenizer_fallback',
+                level='WARNING',
+                model=model,
+                reason='encoding_unavailable',
+                error=str(e)
+            )
+            return None
+
+    def encode(self, text: str) -> List[int]:
+        """Codifica un texto en tokens (solo en modo exacto)."""
+        if self.encoding is None:
+            raise RuntimeError("Exact tokenization requires tiktoken")
+        return self.encoding.encode_ordinary(text)
+
+    def offsets(self, text: str) -> List[int]:
+        """Posición (en caracteres) donde empieza cada token de un texto.
+
+        Codifica el texto una sola vez: los límites de cualquier fragmento
+        medido en tokens salen de estas posiciones sin volver a codificar.
+        Sin tokenizer, cada token son ``FALLBACK_CHARS_PER_TOKEN`` caracteres.
+        """
+        if self.encoding is None:
+            return list(range(0, len(text), FALLBACK_CHARS_PER_TOKEN))
+        _, offsets = self.encoding.decode_with_offsets(self.encoding.encode_ordinary(text))
+        return offsets
+
+    def count(self, text: str) -> int:
+        """Cuenta los tokens de un texto."""
+        if self.encoding is None:
+            return math.ceil(len(text) / FALLBACK_CHARS_PER_TOKEN)
+        return len(self.encoding.encode_ordinary(text))
+
+    def count_many(self, texts: Sequence[str]) -> List[int]:
+        """Cuenta los tokens de varios textos."""
+        if self.encoding is None:
+            return [self.count(text) for text in texts]
+        return [len(tokens) for tokens in self.encoding.encode_ordinary_batch(list(texts))]
+
+    def split(self, text: str, max_tokens: int) -> List[str]:
+        """Divide un texto en fragmentos de como máximo ``max_tokens`` tokens."""
+        if self.encoding is None:
+            step = max_tokens * FALLBACK_CHARS_PER_TOKEN
+            return [text[i:i + step] for i in range(0, len(text), step)] or [text]
+
+        tokens = self.encoding.encode_ordinary(text)
+        if len(tokens) <= max_tokens:
+            return [text]
+
+        # Un token puede contener parte de un carácter multibyte: los bytes
+        # incompletos al final de un fragmento pasan al siguiente. Se deja un
+        # token de margen para ese arrastre.
+        step = max(1, max_tokens - 1)
+        pieces = []
+        leftover = b""
+        for start in range(0, len(tokens), step):
+            data = leftover + self.encoding.decode_bytes(tokens[start:start + step])
+            try:
+                pieces.append(data.decode('utf-8'))
+                leftover = b""
+            except UnicodeDecodeError as e:
+                pieces.append(data[:e.start].decode('utf-8', errors='replace'))
+                leftover = data[e.start:]
+
+        if leftover:
+            pieces[-1] += leftover.decode('utf-8', errors='replace')
+        return pieces
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Trunca un texto a ``max_tokens`` tokens."""
+        return self.split(text, max_tokens)[0]
+
+
+@lru_cache(maxsize=None)
+def get_token_counter(model: str) -> TokenCounter:
+    """Obtiene un contador de tokens compartido para el modelo."""
+    return TokenCounter(model)
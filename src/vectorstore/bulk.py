@@ -0,0 +1,71 @@
+"""
+Utilidades para la carga masiva de documentos con embeddings en MongoDB.
+"""
+from functools import lru_cache
+from typing import Iterator, List, Sequence
+
+import bson
+
+# Máximo de operaciones por lote de escritura del servidor (maxWriteBatchSize)
+MAX_WRITE_BATCH_COUNT = 100000
+
+
+@lru_cache(maxsize=32)
+def _bson_array_size(length: int) -> int:
+    """Bytes de un arreglo BSON de ``length`` doubles (claves "0", "1", ...)."""
+    # Cada elemento: tipo (1) + clave decimal + terminador (1) + double (8);
+    # el arreglo agrega su longitud (4) y el terminador (1).
+    return 5 + sum(10 + len(str(index)) for index in range(length))
+
+
+def estimate_bson_size(
+    document: dict,
+    text_key: str = "text",
+    embedding_key: str = "embedding"
+) -> int:
+    """Tamaño BSON de un documento a insertar.
+
+    El texto y el vector (la mayor parte del documento) se calculan sin
+    codificarlos; el resto de los campos se codifica con ``bson``.
+    """
+    rest = {
+        key: value for key, value in document.items()
+        if key not in (text_key, embedding_key)
+    }
+    size = len(bson.encode(rest))
+
+    text = document.get(text_key)
+    if text is not None:
+        size += len(text_key) + 7 + len(text.encode('utf-8'))
+
+    embedding = document.get(embedding_key)
+    if embedding is not None:
+        size += len(embedding_key) + 2 + _bson_array_size(len(embedding))
+
+    return size
+
+
+def batch_by_bson_size(
+    documents: Sequence[dict],
+    max_bytes: int,
+    max_count: int = MAX_WRITE_BATCH_COUNT,
+    text_key: str = "text",
+    embedding_key: str = "embedding"
+) -> Iterator[List[dict]]:
+    """Agrupa documentos en lotes de como máximo ``max_bytes`` bytes BSON.
+
+    Un documento más grande que ``max_bytes`` va en un lote propio.
+    """
+    batch: List[dict] = []
+    batch_bytes = 0
+    for document in documents:
+        size = estimate_bson_size(document, text_key, embedding_key)
+        if batch and (batch_bytes + size > max_bytes or len(batch) >= max_count):
+            yield batch
+            batch = []
+            batch_bytes = 0
+        batch.append(document)
+        batch_bytes += size
+
+    if batch:
+        yield batch
@@ -1,20 +1,41 @@
 """
 Manejador de MongoDB Atlas Vector Store.
 """
-from typing import List, Optional
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence
 
+from bson import ObjectId
 from langchain_core.documents import Document
+from langchain_mongodb.utils import oid_to_str, str_to_oid
 from langchain_mongodb.vectorstores import MongoDBAtlasVectorSearch
-from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
+from pymongo import MongoClient, ReplaceOne
+from pymongo.errors import BulkWriteError, ConnectionFailure, ServerSelectionTimeoutError
+from pymongo.write_concern import WriteConcern
 
 from src.config import get_settings
-from src.embedding.openai_embeddings import OpenAIEmbeddingManager
+from src.embedding.cached_embeddings import CachedEmbeddings
+from src.embedding.openai_embeddings import OpenAIEmbeddingManager, Vector, as_float_list
 from src.utils.logger import get_logger, measure_time
+from src.utils.pipeline import Pipeline, Stage
+from src.vectorstore.bulk import batch_by_bson_size, estimate_bson_size
 
 settings = get_settings()
 logger = get_logger()
 
+# Campos usados por MongoDBAtlasVectorSearch para el texto y el vector
+TEXT_KEY = "text"
+EMBEDDING_KEY = "embedding"
+
+# Ids por consulta $in (verificación de cargas masivas y eliminaciones)
+VERIFY_CHUNK_SIZE = 10000
+# Reintentos de la verificación mientras llegan escrituras sin confirmar
+VERIFY_ATTEMPTS = 3
+DUPLICATE_KEY_ERROR = 11000
+# Caracteres descartados (espacios) admitidos entre un chunk y su vecino
+NEIGHBOR_MAX_GAP = 16
+
 
 class MongoDBVectorStore:
     """Manejador del vector store de MongoDB Atlas."""
@@ -22,6 +43,7 @@ class MongoDBVectorStore:
     def __init__(self, embedding_manager: Optional[OpenAIEmbeddingManager] = None):
         """Inicializa el vector store de MongoDB."""
         self.embedding_manager = embedding_manager or OpenAIEmbeddingManager()
+        self.embeddings = CachedEmbeddings(self.embedding_manager)
         
         # Configurar cliente MongoDB
         try:
@@ -50,11 +72,16 @@ class MongoDBVectorStore:
         # Inicializar vector store
         self.vector_store = MongoDBAtlasVectorSearch(
             collection=self.collection,
-            embedding=self.embedding_manager.embeddings,
+            embedding=self.embeddings,
             index_name=settings.atlas_vector_search_index_name,
+            text_key=TEXT_KEY,
+            embedding_key=EMBEDDING_KEY,
             relevance_score_fn="cosine",
         )
         
+        # Estadísticas por etapa de la última ingesta con pipeline
+        self.last_pipeline_stats: List[dict] = []
+        
         logger.log_event(
             'vector_store_initialized',
             db_name=settings.db_name,
@@ -66,60 +93,84 @@ class MongoDBVectorStore:
     def add_documents(
         self, 
         documents: List[Document], 
-        batch_size: Optional[int] = None
+        batch_size: Optional[int] = None,
+        bulk_load: Optional[bool] = None,
+        pipelined: bool = False,
+        on_commit: Optional[Callable[[List[str]], None]] = None
     ) -> List[str]:
-        """Añade documentos al vector store."""
+        """Añade documentos al vector store.
+
+        Los documentos con ``id`` (ids deterministas de chunk) se escriben
+        con upserts y los que ya existen en la colección se omiten sin
+        generar su embedding, de modo que reingestar contenido sin cambios
+        no hace nada. El resto se embebe en lotes de ``batch_size``
+        documentos y se acumula hasta completar lotes de escritura
+        dimensionados por bytes BSON (ver ``add_embedded_documents``). Con
+        ``pipelined`` el embedding del lote siguiente se superpone con la
+        escritura del anterior (ver ``_add_documents_pipelined``).
+        ``on_commit(ids)`` se invoca tras cada lote escrito (por ejemplo,
+        para el checkpoint de la ingesta); en modo ``pipelined`` puede
+        invocarse desde varios hilos.
+
+        Retorna los ids de todos los documentos, en orden.
+        """
         if not documents:
             logger.log_event('no_documents_to_add', level='WARNING')
             return []
         
         batch_size = batch_size or settings.batch_size
+        bulk_load = settings.mongodb_bulk_load if bulk_load is None else bulk_load
         
         try:
-            # Procesar en lotes
-            all_ids = []
-            total_batches = (len(documents) + batch_size - 1) // batch_size
+            documents = [
+                doc if doc.id else Document(
+                    page_content=doc.page_content,
+                    metadata=doc.metadata,
+                    id=str(ObjectId())
+                )
+                for doc in documents
+            ]
+            new_documents = self._filter_existing(documents)
+            batches = [
+                new_documents[i:i + batch_size]
+                for i in range(0, len(new_documents), batch_size)
+            ]
             
-            for i in range(0, len(documents), batch_size):
-                batch = documents[i:i + batch_size]
-                batch_num = (i // batch_size) + 1
-                
-                logger.log_event(
-                    'processing_batch',
-                    batch_number=batch_num,
-                    total_batches=total_batches,
-                    batch_size=len(batch)
+            if pipelined:
+                self._add_documents_pipelined(batches, bulk_load, on_commit)
+            else:
+                # Se escribe cuando hay un lote completo para cada hilo de escritura
+                flush_bytes = (
+                    settings.mongodb_bulk_batch_bytes
+                    * max(1, settings.mongodb_bulk_write_workers)
                 )
+                pending: List[dict] = []
+                pending_bytes = 0
                 
-                try:
-                    ids = self.vector_store.add_documents(
-                        documents=batch,
-                        batch_size=len(batch)
-                    )
-                    all_ids.extend(ids)
-                    
-                    logger.log_database_operation(
-                        operation='add_documents_batch',
-                        status='success',
-                        doc_count=len(batch)
-                    )
+                for batch_num, batch in enumerate(batches, 1):
+                    records = self._embed_batch(batch, batch_num, len(batches))
+                    pending.extend(records)
+                    pending_bytes += sum(estimate_bson_size(record) for record in records)
                     
-                except Exception as e:
-                    logger.log_database_operation(
-                        operation='add_documents_batch',
-                        status='error',
-                        doc_count=len(batch),
-                        error=str(e)
-                    )
-                    raise
+                    if pending_bytes >= flush_bytes:
+                        self._commit_records(pending, bulk_load, on_commit)
+                        pending = []
+                        pending_bytes = 0
+                
+                if pending:
+                    self._commit_records(pending, bulk_load, on_commit)
             
             logger.log_database_operation(
                 operation='add_documents_complete',
                 status='success',
                 doc_count=len(documents)
             )
+            logger.log_event(
+                'embedding_cache_totals',
+                **self.embeddings.get_stats()
+            )
             
-            return all_ids
+            return [doc.id for doc in documents]
             
         except Exception as e:
             logger.log_database_operation(
@@ -130,14 +181,480 @@ class MongoDBVectorStore:
             )
             raise
     
+    def _filter_existing(self, documents: List[Document]) -> List[Document]:
+        """Descarta documentos repetidos o cuyo id ya existe en la colección."""
+        unique: dict = {}
+        for doc in documents:
+            unique.setdefault(doc.id, doc)
+        
+        existing = self._find_existing_ids([str_to_oid(doc_id) for doc_id in unique])
+        new_documents = [
+            doc for doc_id, doc in unique.items()
+            if str_to_oid(doc_id) not in existing
+        ]
+        
+        logger.log_event(
+            'existing_chunks_skipped',
+            document_count=len(documents),
+            duplicates=len(documents) - len(unique),
+            existing=len(unique) - len(new_documents),
+            to_embed=len(new_documents)
+        )
+        return new_documents
+    
+    def _embed_batch(
+        self,
+        batch: List[Document],
+        batch_num: int,
+        total_batches: Optional[int]
+    ) -> List[dict]:
+        """Genera los embeddings de un lote y arma sus registros."""
+        logger.log_event(
+            'processing_batch',
+            batch_number=batch_num,
+            total_batches=total_batches,
+            batch_size=len(batch)
+        )
+        
+        try:
+            embeddings = self.embeddings.embed_documents(
+                [doc.page_content for doc in batch]
+            )
+        except Exception as e:
+            logger.log_database_operation(
+                operation='add_documents_batch',
+                status='error',
+                doc_count=len(batch),
+                error=str(e)
+            )
+            raise
+        
+        logger.log_event(
+            'batch_embedding_cache_stats',
+            batch_number=batch_num,
+            **self.embeddings.last_call_stats
+        )
+        return self._build_records(batch, embeddings)
+    
+    def ingestion_stages(
+        self,
+        bulk_load: bool,
+        on_commit: Optional[Callable[[List[str]], None]] = None,
+        total_batches: Optional[int] = None,
+        filter_existing: bool = False
+    ) -> List[Stage]:
+        """Etapas ``embed`` y ``write`` para un ``Pipeline`` de ingesta.
+
+        La entrada son tuplas ``(número de lote, documentos)``; con
+        ``filter_existing`` se descartan antes los chunks cuyo id ya está
+        en la colección. La etapa ``embed`` acumula registros hasta
+        ``MONGODB_BULK_BATCH_BYTES`` y los pasa a
+        ``MONGODB_BULK_WRITE_WORKERS`` escritores, que producen tuplas
+        ``(secuencia, ids escritos)``.
+        """
+        sequence = itertools.count()
+        pending: List[dict] = []
+        pending_bytes = [0]
+        
+        def take_pending() -> List[tuple]:
+            group = (next(sequence), list(pending))
+            pending.clear()
+            pending_bytes[0] = 0
+            return [group]
+        
+        def embed(item: tuple) -> List[tuple]:
+            batch_num, batch = item
+            if filter_existing:
+                batch = self._filter_existing(batch)
+                if not batch:
+                    return []
+            records = self._embed_batch(batch, batch_num, total_batches)
+            pending.extend(records)
+            pending_bytes[0] += sum(estimate_bson_size(record) for record in records)
+            return take_pending() if pending_bytes[0] >= settings.mongodb_bulk_batch_bytes else []
+        
+        def flush() -> List[tuple]:
+            return take_pending() if pending else []
+        
+        def write(group: tuple) -> List[tuple]:
+            index, records = group
+            return [(index, self._commit_records(records, bulk_load, on_commit))]
+        
+        return [
+            Stage('embed', embed, flush=flush, measure=lambda item: len(item[1])),
+            Stage(
+                'write',
+                write,
+                workers=settings.mongodb_bulk_write_workers,
+                measure=lambda group: len(group[1])
+            ),
+        ]
+    
+    def _add_documents_pipelined(
+        self,
+        batches: List[List[Document]],
+        bulk_load: bool,
+        on_commit: Optional[Callable[[List[str]], None]] = None
+    ) -> List[str]:
+        """Superpone embeddings y escrituras con colas acotadas.
+
+        Las colas tienen capacidad ``INGEST_PIPELINE_QUEUE_SIZE``: si Atlas
+        es lento, el embedding se detiene en lugar de acumular vectores en
+        memoria (ver ``ingestion_stages``).
+        """
+        pipeline = Pipeline(
+            self.ingestion_stages(bulk_load, on_commit, total_batches=len(batches)),
+            queue_size=settings.ingest_pipeline_queue_size
+        )
+        try:
+            written = pipeline.run(enumerate(batches, 1))
+        finally:
+            self.last_pipeline_stats = pipeline.stats
+            logger.log_event('ingestion_pipeline_stats', stages=pipeline.stats)
+        
+        # Los escritores terminan en cualquier orden
+        return [doc_id for _, ids in sorted(written, key=lambda item: item[0]) for doc_id in ids]
+    
+    @measure_time
+    def add_embedded_documents(
+        self,
+        documents: Sequence[Document],
+        embeddings: Sequence[Vector],
+        bulk_load: Optional[bool] = None
+    ) -> List[str]:
+        """Inserta documentos con embeddings ya calculados.
+
+        Usa upserts (``bulk_write`` no ordenado) por ``_id`` en lotes de hasta
+        ``MONGODB_BULK_BATCH_BYTES`` bytes BSON, enviados en paralelo por
+        ``MONGODB_BULK_WRITE_WORKERS`` hilos. En modo ``bulk_load`` las
+        escrituras no esperan confirmación (``w=0``) y al final se verifica
+        que todos los documentos existan, reinsertando los faltantes.
+        """
+        if len(documents) != len(embeddings):
+            raise ValueError(
+                f"Got {len(documents)} documents but {len(embeddings)} embeddings"
+            )
+        if not documents:
+            return []
+        
+        bulk_load = settings.mongodb_bulk_load if bulk_load is None else bulk_load
+        return self._write_records(self._build_records(documents, embeddings), bulk_load)
+    
+    @staticmethod
+    def _build_records(
+        documents: Sequence[Document],
+        embeddings: Sequence[Vector]
+    ) -> List[dict]:
+        """Documentos de MongoDB con el formato de ``MongoDBAtlasVectorSearch``.
+
+        El ``id`` del documento, si existe, se usa como ``_id``.
+        """
+        return [
+            {
+                '_id': str_to_oid(document.id) if document.id else ObjectId(),
+                TEXT_KEY: document.page_content,
+                EMBEDDING_KEY: as_float_list(embedding),
+                **document.metadata
+            }
+            for document, embedding in zip(documents, embeddings)
+        ]
+    
+    def _commit_records(
+        self,
+        records: List[dict],
+        bulk_load: bool,
+        on_commit: Optional[Callable[[List[str]], None]]
+    ) -> List[str]:
+        """Escribe los registros y notifica sus ids a ``on_commit``."""
+        ids = self._write_records(records, bulk_load)
+        if on_commit is not None:
+            on_commit(ids)
+        return ids
+    
+    def _write_records(self, records: List[dict], bulk_load: bool) -> List[str]:
+        """Escribe los registros (upsert por ``_id``) en lotes por bytes; retorna sus ids."""
+        start_time = time.time()
+        batches = list(batch_by_bson_size(records, settings.mongodb_bulk_batch_bytes))
+        collection = (
+            self.collection.with_options(write_concern=WriteConcern(w=0))
+            if bulk_load
+            else self.collection
+        )
+        
+        def insert(batch: List[dict]) -> None:
+            collection.bulk_write(
+                [ReplaceOne({'_id': record['_id']}, record, upsert=True) for record in batch],
+                ordered=False
+            )
+        
+        try:
+            workers = min(max(1, settings.mongodb_bulk_write_workers), len(batches))
+            if workers == 1:
+                for batch in batches:
+                    insert(batch)
+            else:
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    list(executor.map(insert, batches))
+            
+            repaired = self._verify_records(records) if bulk_load else 0
+            
+        except Exception as e:
+            logger.log_database_operation(
+                operation='bulk_insert',
+                status='error',
+                doc_count=len(records),
+                error=str(e)
+            )
+            raise
+        
+        duration = time.time() - start_time
+        logger.log_database_operation(
+            operation='bulk_insert',
+            status='success',
+            doc_count=len(records)
+        )
+        logger.log_event(
+            'bulk_insert_complete',
+            document_count=len(records),
+            write_batches=len(batches),
+            bulk_load=bulk_load,
+            repaired=repaired,
+            duration_seconds=duration,
+            docs_per_second=len(records) / duration if duration > 0 else None
+        )
+        return [oid_to_str(record['_id']) for record in records]
+    
+    def _find_existing_ids(self, ids: List) -> set:
+        """Ids de la lista que existen en la colección."""
+        found = set()
+        for i in range(0, len(ids), VERIFY_CHUNK_SIZE):
+            chunk = ids[i:i + VERIFY_CHUNK_SIZE]
+            found.update(
+                doc['_id'] for doc in self.collection.find({'_id': {'$in': chunk}}, {'_id': 1})
+            )
+        return found
+    
+    def _find_missing_ids(self, ids: List) -> List:
+        """Ids de la lista que no existen en la colección."""
+        found = self._find_existing_ids(ids)
+        return [doc_id for doc_id in ids if doc_id not in found]
+    
+    def _verify_records(self, records: List[dict]) -> int:
+        """Verifica una carga sin confirmación y reinserta lo que falte.
+
+        Retorna la cantidad de documentos reinsertados.
+        """
+        missing = self._find_missing_ids([record['_id'] for record in records])
+        attempt = 0
+        while missing and attempt < VERIFY_ATTEMPTS:
+            # Las escrituras con w=0 pueden seguir en curso en el servidor
+            attempt += 1
+            time.sleep(0.5 * attempt)
+            missing = self._find_missing_ids(missing)
+        
+        if not missing:
+            return 0
+        
+        logger.log_event(
+            'bulk_load_missing_documents',
+            level='WARNING',
+            missing=len(missing),
+            document_count=len(records)
+        )
+        by_id = {record['_id']: record for record in records}
+        try:
+            self.collection.bulk_write(
+                [ReplaceOne({'_id': doc_id}, by_id[doc_id], upsert=True) for doc_id in missing],
+                ordered=False
+            )
+        except BulkWriteError as e:
+            # Un duplicado indica que otra escritura del mismo _id ya llegó
+            errors = e.details.get('writeErrors', [])
+            if any(error.get('code') != DUPLICATE_KEY_ERROR for error in errors):
+                raise
+        return len(missing)
+    
+    @measure_time
+    def delete_documents(self, ids: Sequence[str]) -> int:
+        """Elimina documentos por id con ``delete_many`` por bloques.
+
+        Retorna la cantidad de documentos eliminados.
+        """
+        oids = [str_to_oid(doc_id) for doc_id in ids]
+        deleted = 0
+        try:
+            for i in range(0, len(oids), VERIFY_CHUNK_SIZE):
+                result = self.collection.delete_many({'_id': {'$in': oids[i:i + VERIFY_CHUNK_SIZE]}})
+                deleted += result.deleted_count
+        except Exception as e:
+            logger.log_database_operation(
+                operation='delete_documents',
+                status='error',
+                doc_count=len(oids),
+                error=str(e)
+            )
+            raise
+        
+        logger.log_database_operation(
+            operation='delete_documents',
+            status='success',
+            doc_count=deleted
+        )
+        return deleted
+    
+    @staticmethod
+    def _chunk_id(document: Document) -> Optional[str]:
+        """Id de un chunk (los resultados de la búsqueda lo traen en ``_id``)."""
+        return document.id or document.metadata.get('_id')
+    
+    @staticmethod
+    def _is_neighbor(hit: Document, neighbor: Document, before: bool) -> bool:
+        """Si ``neighbor`` es el chunk contiguo a ``hit``.
+
+        Los enlaces deben ser recíprocos y, en la misma página, las
+        posiciones deben coincidir. Así se descartan vecinos
+        desactualizados: con ``content_defined`` un chunk que una edición
+        no tocó conserva el id y los metadatos de la versión anterior.
+        """
+        back_link = 'next_chunk_id' if before else 'prev_chunk_id'
+        if neighbor.metadata.get(back_link) != MongoDBVectorStore._chunk_id(hit):
+            return False
+        if hit.metadata.get('source') != neighbor.metadata.get('source'):
+            return False
+        if any(
+            hit.metadata.get(key) != neighbor.metadata.get(key)
+            for key in ('page', 'seq_num')
+        ):
+            # Páginas sucesivas de un PDF (ver ``DocumentSplitter.link_pages``)
+            page, neighbor_page = hit.metadata.get('page'), neighbor.metadata.get('page')
+            if page is None or neighbor_page is None:
+                return False
+            return neighbor_page < page if before else neighbor_page > page
+        
+        hit_start = hit.metadata.get('start_index')
+        hit_end = hit.metadata.get('end_index')
+        start = neighbor.metadata.get('start_index')
+        end = neighbor.metadata.get('end_index')
+        if None in (hit_start, hit_end, start, end):
+            return False
+        if before:
+            return start < hit_start and end < hit_end and hit_start - end <= NEIGHBOR_MAX_GAP
+        return start > hit_start and end > hit_end and start - hit_end <= NEIGHBOR_MAX_GAP
+    
+    @staticmethod
+    def _stitch(chunks: List[Document]) -> str:
+        """Une chunks contiguos sin repetir su solapamiento.
+
+        Dentro de una página el solapamiento se recorta con las posiciones;
+        entre páginas los chunks se unen con un salto de línea.
+        """
+        text = chunks[0].page_content
+        previous = chunks[0].metadata
+        end = previous['end_index']
+        for chunk in chunks[1:]:
+            metadata = chunk.metadata
+            if metadata.get('page') != previous.get('page'):
+                text += "\n" + chunk.page_content
+                end = metadata['end_index']
+            else:
+                start = metadata['start_index']
+                if start < end:
+                    text += chunk.page_content[end - start:]
+                else:
+                    # Espacio entre chunks que el divisor descartó
+                    text += " " + chunk.page_content
+                end = max(end, metadata['end_index'])
+            previous = metadata
+        return text
+    
+    def expand_with_neighbors(self, documents: List[Document]) -> List[Document]:
+        """Agrega a cada resultado el texto de sus chunks anterior y siguiente.
+
+        Los vecinos de todos los resultados se leen en una sola consulta
+        ``$in`` por ``_id`` (ver ``DocumentSplitter._link_chunks``). El
+        texto de cada resultado pasa a ser el de sus chunks contiguos unidos
+        sin solapamiento, también a través de páginas sucesivas de un PDF.
+        ``context_chunk_ids`` son los chunks unidos; ``context_start_index``
+        es la posición del primero en su página (``context_start_page``) y
+        ``context_end_index`` el final del último en la suya
+        (``context_end_page``). Los chunks sin vecinos registrados (cargados
+        antes de registrar posiciones) se retornan sin cambios. Con esto
+        ``CHUNK_OVERLAP`` puede reducirse casi a cero sin perder contexto
+        en los bordes de los chunks.
+        """
+        neighbor_ids = {
+            doc.metadata[key]
+            for doc in documents
+            for key in ('prev_chunk_id', 'next_chunk_id')
+            if doc.metadata.get(key)
+        }
+        if not neighbor_ids:
+            return documents
+        
+        start_time = time.time()
+        neighbors = {}
+        for record in self.collection.find(
+            {'_id': {'$in': [str_to_oid(doc_id) for doc_id in neighbor_ids]}},
+            {EMBEDDING_KEY: 0}
+        ):
+            doc_id = oid_to_str(record.pop('_id'))
+            neighbors[doc_id] = Document(
+                id=doc_id,
+                page_content=record.pop(TEXT_KEY, ""),
+                metadata=record
+            )
+        
+        expanded = []
+        for doc in documents:
+            chunks = [doc]
+            prev_doc = neighbors.get(doc.metadata.get('prev_chunk_id'))
+            if prev_doc is not None and self._is_neighbor(doc, prev_doc, before=True):
+                chunks.insert(0, prev_doc)
+            next_doc = neighbors.get(doc.metadata.get('next_chunk_id'))
+            if next_doc is not None and self._is_neighbor(doc, next_doc, before=False):
+                chunks.append(next_doc)
+            if len(chunks) == 1:
+                expanded.append(doc)
+                continue
+            
+            expanded.append(Document(
+                id=doc.id,
+                page_content=self._stitch(chunks),
+                metadata={
+                    **doc.metadata,
+                    'context_start_page': chunks[0].metadata.get('page'),
+                    'context_start_index': chunks[0].metadata['start_index'],
+                    'context_end_page': chunks[-1].metadata.get('page'),
+                    'context_end_index': chunks[-1].metadata['end_index'],
+                    'context_chunk_ids': [self._chunk_id(chunk) for chunk in chunks]
+                }
+            ))
+        
+        logger.log_event(
+            'neighbor_chunks_fetched',
+            results_count=len(documents),
+            requested_count=len(neighbor_ids),
+            found_count=len(neighbors),
+            duration_seconds=time.time() - start_time
+        )
+        return expanded
+    
     @measure_time
     def similarity_search(
         self, 
         query: str, 
         k: int = 4,
-        filter_dict: Optional[dict] = None
+        filter_dict: Optional[dict] = None,
+        expand_neighbors: Optional[bool] = None
     ) -> List[Document]:
-        """Realiza búsqueda por similitud."""
+        """Realiza búsqueda por similitud.
+
+        Con ``expand_neighbors`` (por defecto, ``SEARCH_EXPAND_NEIGHBORS``)
+        cada resultado incluye sus chunks contiguos (ver
+        ``expand_with_neighbors``).
+        """
+        if expand_neighbors is None:
+            expand_neighbors = settings.search_expand_neighbors
         try:
             # Configurar filtros si se proporcionan
             search_kwargs = {}
@@ -149,13 +666,17 @@ class MongoDBVectorStore:
                 k=k,
                 **search_kwargs
             )
+            if expand_neighbors:
+                results = self.expand_with_neighbors(results)
             
             logger.log_event(
                 'similarity_search_complete',
                 query_length=len(query),
                 k=k,
                 results_count=len(results),
-                filter_applied=filter_dict is not None
+                filter_applied=filter_dict is not None,
+                neighbors_expanded=expand_neighbors,
+                query_cache_hit=bool(self.embeddings.last_call_stats.get('cache_hits'))
             )
             
             return results
@@ -175,9 +696,12 @@ class MongoDBVectorStore:
         self, 
         query: str, 
         k: int = 4,
-        filter_dict: Optional[dict] = None
+        filter_dict: Optional[dict] = None,
+        expand_neighbors: Optional[bool] = None
     ) -> List[tuple]:
-        """Realiza búsqueda por similitud con scores."""
+        """Realiza búsqueda por similitud con scores (ver ``similarity_search``)."""
+        if expand_neighbors is None:
+            expand_neighbors = settings.search_expand_neighbors
         try:
             search_kwargs = {}
             if filter_dict:
@@ -188,13 +712,18 @@ class MongoDBVectorStore:
                 k=k,
                 **search_kwargs
             )
+            if expand_neighbors:
+                expanded = self.expand_with_neighbors([doc for doc, _ in results])
+                results = [(doc, score) for doc, (_, score) in zip(expanded, results)]
             
             logger.log_event(
                 'similarity_search_with_score_complete',
                 query_length=len(query),
                 k=k,
                 results_count=len(results),
-                filter_applied=filter_dict is not None
+                filter_applied=filter_dict is not None,
+                neighbors_expanded=expand_neighbors,
+                query_cache_hit=bool(self.embeddings.last_call_stats.get('cache_hits'))
             )
             
             return results
@@ -209,6 +738,10 @@ class MongoDBVectorStore:
             )
             raise
     
+    def get_embedding_cache_stats(self) -> dict:
+        """Obtiene los contadores de hits y misses del caché de embeddings."""
+        return self.embeddings.get_stats()
+    
     def get_collection_stats(self) -> dict:
         """Obtiene estadísticas de la colección."""
         try:
@@ -1,12 +1,40 @@
 """
 Tests unitarios para el sistema de embeddings.
 """
+import asyncio
+import json
+import pickle
 import tempfile
+import threading
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 
-from src.embedding.openai_embeddings import OpenAIEmbeddingManager
+import numpy as np
+import openai
+
+from src.embedding.async_client import (
+    AsyncEmbeddingClient,
+    AsyncTokenBucket,
+    _retry_after_seconds,
+    run_sync,
+)
+from src.embedding.batching import pack_batches
+from src.embedding.cached_embeddings import CachedEmbeddings
+from src.embedding.memory_cache import LRUMemoryCache, estimate_embedding_size
+from src.embedding.openai_embeddings import OpenAIEmbeddingManager, settings
+from src.embedding import providers
+from src.embedding.providers import (
+    DeterministicEmbeddings,
+    available_embedding_providers,
+    create_embedding_provider,
+    register_embedding_provider,
+)
+from src.embedding.single_flight import SingleFlight
+from src.embedding.stub_server import EmbeddingStub, create_stub_server, stub_base_url
+from src.utils.tokenizer import TokenCounter
 
 
 class TestOpenAIEmbeddingManager(unittest.TestCase):
@@ -69,7 +97,8 @@ class TestOpenAIEmbeddingManager(unittest.TestCase):
         
         # Mock OpenAI embeddings
         mock_embedding = [0.1, 0.2, 0.3]
-        with patch.object(self.manager.embeddings, 'embed_query', return_value=mock_embedding):
+        with patch.object(self.manager, 'embeddings') as mock_embeddings:
+            mock_embeddings.aembed_documents = AsyncMock(return_value=[mock_embedding])
             text = "texto de prueba"
             result = self.manager.embed_query(text)
             
@@ -77,48 +106,545 @@ class TestOpenAIEmbeddingManager(unittest.TestCase):
             mock_load_cache.assert_called_once_with(text)
             mock_save_cache.assert_called_once_with(text, mock_embedding)
     
+    @patch.object(OpenAIEmbeddingManager, '_save_many_to_cache')
+    @patch.object(OpenAIEmbeddingManager, '_load_many_from_cache')
+    def test_embed_documents_batches_cache_misses(self, mock_load_cache, mock_save_cache):
+        """Test de embed_documents agrupando los misses en requests por lotes."""
+        mock_load_cache.return_value = {"b": [0.2]}
+        
+        self.manager.embeddings = Mock()
+        self.manager.embeddings.aembed_documents = AsyncMock(
+            side_effect=lambda batch, chunk_size=None: [[float(ord(t))] for t in batch]
+        )
+        
+        result = self.manager.embed_documents(["a", "b", "c", "a", "d"], batch_size=2)
+        
+        self.assertEqual(result, [[97.0], [0.2], [99.0], [97.0], [100.0]])
+        calls = self.manager.embeddings.aembed_documents.call_args_list
+        self.assertEqual([c.args[0] for c in calls], [["a", "c"], ["d"]])
+        self.assertEqual(mock_save_cache.call_count, 2)
+    
+    def _approximate_token_counter(self) -> TokenCounter:
+        """Contador de tokens aproximado (independiente de tiktoken)."""
+        with patch('src.utils.tokenizer.tiktoken', None):
+            return TokenCounter(self.manager.model)
+    
+    @patch.object(settings, 'embedding_max_tokens_per_request', 10)
+    def test_embed_documents_packs_requests_by_tokens(self):
+        """Test de empaquetado de requests según el límite de tokens."""
+        self.manager.embeddings = Mock()
+        self.manager.embeddings.aembed_documents = AsyncMock(
+            side_effect=lambda batch, chunk_size=None: [[1.0] for _ in batch]
+        )
+        self.manager.token_counter = self._approximate_token_counter()
+        texts = ["x" * 16, "y" * 16, "z" * 16]  # 4 tokens cada uno
+        
+        self.manager.embed_documents(texts, batch_size=100)
+        
+        calls = self.manager.embeddings.aembed_documents.call_args_list
+        self.assertEqual([len(c.args[0]) for c in calls], [2, 1])
+        self.assertEqual(self.manager.last_call_stats['api_tokens'], 12)
+    
+    @patch.object(settings, 'embedding_oversize_strategy', 'split')
+    @patch.object(settings, 'embedding_max_input_tokens', 4)
+    def test_embed_documents_splits_oversized_inputs(self):
+        """Test de división de inputs que superan el contexto del modelo."""
+        self.manager.embeddings = Mock()
+        self.manager.embeddings.aembed_documents = AsyncMock(
+            side_effect=lambda batch, chunk_size=None: [[3.0, 4.0] for _ in batch]
+        )
+        self.manager.token_counter = self._approximate_token_counter()
+        long_text = "palabra " * 5  # 40 caracteres, 10 tokens
+        
+        result = self.manager.embed_documents([long_text])
+        
+        sent = self.manager.embeddings.aembed_documents.call_args.args[0]
+        self.assertEqual("".join(sent), long_text)
+        self.assertTrue(all(self.manager.token_counter.count(p) <= 4 for p in sent))
+        np.testing.assert_allclose(result[0], [0.6, 0.8])
+        np.testing.assert_allclose(self.manager._load_from_cache(long_text), [0.6, 0.8], rtol=1e-6)
+
+    @patch.object(settings, 'embedding_oversize_strategy', 'splt')
+    def test_invalid_oversize_strategy_is_rejected(self):
+        """Test de validación de la estrategia para inputs demasiado largos."""
+        with self.assertRaises(ValueError):
+            OpenAIEmbeddingManager(cache_dir=self.temp_dir)
+    
+    def test_concurrent_requests_for_same_text_are_coalesced(self):
+        """Test de que hilos concurrentes comparten un único request a la API."""
+        async def slow_embed(batch, chunk_size=None):
+            await asyncio.sleep(0.2)
+            return [[0.5] for _ in batch]
+        
+        self.manager.embeddings = Mock()
+        self.manager.embeddings.aembed_documents = AsyncMock(side_effect=slow_embed)
+        
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [executor.submit(self.manager.embed_documents, ["compartido"])]
+            time.sleep(0.05)
+            futures += [executor.submit(self.manager.embed_query, "compartido") for _ in range(3)]
+            results = [future.result() for future in futures]
+        
+        self.assertEqual(results[0], [[0.5]])
+        self.assertEqual(results[1:], [[0.5]] * 3)
+        self.assertEqual(self.manager.embeddings.aembed_documents.call_count, 1)
+        self.assertEqual(self.manager.single_flight.in_flight(), 0)
+    
+    def test_coalesced_waiters_receive_owner_error(self):
+        """Test de propagación del error del dueño a quienes esperan."""
+        error = RuntimeError("fallo")
+        owned, _ = self.manager.single_flight.claim([self.manager._get_cache_key("texto")])
+        
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(self.manager.embed_query, "texto")
+            time.sleep(0.05)
+            self.manager.single_flight.fail(owned, error)
+            with self.assertRaises(RuntimeError):
+                future.result()
+    
+    def test_save_and_load_from_cache(self):
+        """Test de guardado y lectura en el caché SQLite."""
+        self.manager._save_to_cache("texto", [0.5, 0.25, 0.75])
+        
+        self.assertEqual(self.manager._load_from_cache("texto").tolist(), [0.5, 0.25, 0.75])
+        self.assertIsNone(self.manager._load_from_cache("otro texto"))
+        
+        found = self.manager._load_many_from_cache(["texto", "otro texto"])
+        self.assertEqual(list(found), ["texto"])
+        self.assertEqual(found["texto"].tolist(), [0.5, 0.25, 0.75])
+    
     def test_clear_cache(self):
         """Test de limpieza de caché."""
-        # Crear algunos archivos de caché falsos
-        cache_dir = Path(self.temp_dir)
         for i in range(3):
-            cache_file = cache_dir / f"test_cache_{i}.pkl"
-            cache_file.write_text("fake cache data")
+            self.manager._save_to_cache(f"texto {i}", [float(i)])
         
-        # Verificar que existen
-        cache_files = list(cache_dir.glob("*.pkl"))
-        self.assertEqual(len(cache_files), 3)
+        # Archivo del formato anterior
+        (Path(self.temp_dir) / "legacy.pkl").write_text("fake cache data")
+        
+        self.assertEqual(self.manager.cache_store.count(), 3)
         
         # Limpiar caché
         self.manager.clear_cache()
         
-        # Verificar que se eliminaron
-        cache_files = list(cache_dir.glob("*.pkl"))
-        self.assertEqual(len(cache_files), 0)
+        self.assertEqual(self.manager.cache_store.count(), 0)
+        self.assertEqual(list(Path(self.temp_dir).glob("*.pkl")), [])
+    
+    def test_cache_stores_compact_float32_vectors(self):
+        """Test de almacenamiento compacto y lectura como arreglo NumPy."""
+        embedding = [0.125] * 1024
+        self.manager._save_to_cache("texto", embedding)
+        self.manager.memory_cache.clear()
+        
+        cached = self.manager._load_from_cache("texto")
+        
+        self.assertIsInstance(cached, np.ndarray)
+        self.assertEqual(cached.dtype, np.float32)
+        self.assertEqual(cached.nbytes, 1024 * 4)
+        self.assertLess(cached.nbytes * 2, len(pickle.dumps(embedding)))
+    
+    @patch.object(OpenAIEmbeddingManager, '_load_many_from_cache')
+    def test_embed_documents_as_numpy(self, mock_load_cache):
+        """Test de embed_documents retornando listas o una matriz float32."""
+        mock_load_cache.return_value = {
+            "a": np.array([0.5, 0.25], dtype=np.float32),
+            "b": np.array([1.0, 2.0], dtype=np.float32)
+        }
+        
+        as_lists = self.manager.embed_documents(["a", "b"])
+        matrix = self.manager.embed_documents(["a", "b"], as_numpy=True)
+        
+        self.assertEqual(as_lists, [[0.5, 0.25], [1.0, 2.0]])
+        self.assertEqual(matrix.shape, (2, 2))
+        self.assertEqual(matrix.dtype, np.float32)
     
     def test_get_cache_stats(self):
         """Test de obtención de estadísticas de caché."""
-        # Crear algunos archivos de caché falsos
-        cache_dir = Path(self.temp_dir)
         for i in range(2):
-            cache_file = cache_dir / f"test_cache_{i}.pkl"
-            cache_file.write_text("fake cache data" * 100)
+            self.manager._save_to_cache(f"texto {i}", [0.5] * 100)
         
         # Obtener estadísticas
         stats = self.manager.get_cache_stats()
         
-        self.assertIn('cache_files', stats)
+        self.assertIn('cache_entries', stats)
         self.assertIn('total_size_bytes', stats)
         self.assertIn('total_size_mb', stats)
         self.assertIn('cache_dir', stats)
         
-        self.assertEqual(stats['cache_files'], 2)
+        self.assertEqual(stats['cache_entries'], 2)
         self.assertGreater(stats['total_size_bytes'], 0)
     
+    def test_migrate_legacy_cache(self):
+        """Test de migración de archivos .pkl al caché SQLite."""
+        text = "texto migrado"
+        legacy_file = self.manager._get_cache_file(self.manager._get_cache_key(text))
+        with open(legacy_file, 'wb') as f:
+            pickle.dump([0.25, 0.5], f)
+        (Path(self.temp_dir) / "corrupto.pkl").write_text("no es un pickle")
+        
+        result = self.manager.migrate_legacy_cache(delete_legacy=True)
+        
+        self.assertEqual(result['imported'], 1)
+        self.assertEqual(result['failed'], 1)
+        self.assertFalse(legacy_file.exists())
+        self.assertEqual(self.manager._load_from_cache(text).tolist(), [0.25, 0.5])
+    
+    def test_cache_namespaced_by_model_and_dimensions(self):
+        """Test de aislamiento del caché entre modelos y dimensiones."""
+        other = OpenAIEmbeddingManager(cache_dir=self.temp_dir, dimensions=512)
+        self.addCleanup(other.cache_store.close)
+        
+        self.manager._save_to_cache("texto", [0.5] * 4)
+        other._save_to_cache("texto", [0.25] * 2)
+        
+        self.assertNotEqual(self.manager.cache_namespace, other.cache_namespace)
+        self.assertIn("@512:v", other.cache_namespace)
+        self.assertEqual(self.manager._load_from_cache("texto").tolist(), [0.5] * 4)
+        self.assertEqual(other._load_from_cache("texto").tolist(), [0.25] * 2)
+    
+    def test_deterministic_provider_end_to_end(self):
+        """Test del proveedor offline a través del caché y el batching."""
+        manager = OpenAIEmbeddingManager(
+            cache_dir=self.temp_dir,
+            dimensions=8,
+            provider="deterministic"
+        )
+        self.addCleanup(manager.cache_store.close)
+        
+        first = manager.embed_documents(["uno", "dos"])
+        second = manager.embed_documents(["uno", "dos"])
+        
+        self.assertTrue(manager.cache_namespace.startswith("deterministic:"))
+        self.assertNotEqual(manager.cache_namespace, self.manager.cache_namespace)
+        self.assertEqual(len(first[0]), 8)
+        self.assertEqual(first, second)
+        self.assertEqual(manager.last_call_stats['cache_hits'], 2)
+        self.assertEqual(manager.last_call_stats['api_calls'], 0)
+    
+    def test_list_and_prune_cache_namespaces(self):
+        """Test de listado y eliminación de namespaces obsoletos."""
+        other = OpenAIEmbeddingManager(cache_dir=self.temp_dir, model="modelo-anterior")
+        self.addCleanup(other.cache_store.close)
+        other._save_to_cache("texto", [0.75])
+        self.manager._save_to_cache("texto", [0.5])
+        
+        namespaces = {n['namespace']: n for n in self.manager.list_cache_namespaces()}
+        self.assertEqual(len(namespaces), 2)
+        self.assertTrue(namespaces[self.manager.cache_namespace]['current'])
+        
+        removed = self.manager.prune_cache_namespaces()
+        
+        self.assertEqual(removed, {other.cache_namespace: 1})
+        self.assertEqual(self.manager._load_from_cache("texto").tolist(), [0.5])
+        self.assertIsNone(other.cache_store.get(other._get_cache_key("texto")))
+    
+    def test_memory_cache_avoids_disk_reads(self):
+        """Test de que las lecturas repetidas se sirven desde memoria."""
+        self.manager._save_to_cache("consulta repetida", [0.75])
+        
+        with patch.object(self.manager.cache_store, 'get') as mock_disk_get:
+            cached = self.manager._load_from_cache("consulta repetida")
+            self.assertEqual(cached.tolist(), [0.75])
+            mock_disk_get.assert_not_called()
+        
+        self.assertEqual(self.manager.get_cache_stats()['memory_cache_hits'], 1)
+    
     def tearDown(self):
         """Limpieza después de cada test."""
         # Limpiar directorio temporal
         import shutil
+        self.manager.cache_store.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+
+
+class TestLRUMemoryCache(unittest.TestCase):
+    """Tests para el caché LRU en memoria."""
+    
+    def test_evicts_least_recently_used_by_bytes(self):
+        """Test de desalojo según el tamaño en bytes."""
+        entry_size = estimate_embedding_size([0.0] * 10)
+        cache = LRUMemoryCache(max_bytes=entry_size * 2)
+        
+        cache.put("a", [0.0] * 10)
+        cache.put("b", [1.0] * 10)
+        cache.get("a")
+        cache.put("c", [2.0] * 10)
+        
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        
+        stats = cache.get_stats()
+        self.assertEqual(stats['memory_cache_evictions'], 1)
+        self.assertEqual(stats['memory_cache_hits'], 2)
+        self.assertEqual(stats['memory_cache_misses'], 1)
+        self.assertLessEqual(stats['memory_cache_bytes'], entry_size * 2)
+    
+    def test_skips_entries_larger_than_limit(self):
+        """Test de que no se guardan entradas mayores que el límite."""
+        cache = LRUMemoryCache(max_bytes=100)
+        cache.put("grande", [0.0] * 1000)
+        
+        self.assertIsNone(cache.get("grande"))
+
+
+class TestEmbeddingProviders(unittest.TestCase):
+    """Tests para el registro de proveedores de embeddings."""
+    
+    def test_deterministic_vectors(self):
+        """Test de vectores deterministas, normalizados y distintos por texto."""
+        provider = DeterministicEmbeddings("modelo", 16)
+        
+        a1, b = provider.embed_documents(["a", "b"])
+        a2 = run_sync(provider.aembed_documents(["a"]))[0]
+        
+        self.assertEqual(a1, a2)
+        self.assertNotEqual(a1, b)
+        self.assertAlmostEqual(float(np.linalg.norm(a1)), 1.0, places=5)
+        self.assertNotEqual(a1, DeterministicEmbeddings("otro", 16).embed_query("a"))
+    
+    def test_deterministic_simulated_latency(self):
+        """Test de la latencia simulada por request."""
+        provider = DeterministicEmbeddings("modelo", 4, latency_ms=50)
+        
+        start = time.monotonic()
+        run_sync(provider.aembed_documents(["texto"]))
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
+    
+    def test_registry(self):
+        """Test de registro y creación de proveedores."""
+        self.assertIn("deterministic", available_embedding_providers())
+        with self.assertRaises(ValueError):
+            create_embedding_provider("inexistente", "modelo", 4)
+        
+        register_embedding_provider("prueba", DeterministicEmbeddings)
+        self.addCleanup(providers._PROVIDERS.pop, "prueba")
+        provider = create_embedding_provider("prueba", "modelo", 4)
+        self.assertEqual(len(provider.embed_query("x")), 4)
+
+
+class TestEmbeddingStubServer(unittest.TestCase):
+    """Tests para el stub local del endpoint de embeddings."""
+    
+    def _start(self, stub: EmbeddingStub) -> str:
+        """Inicia el servidor en un puerto libre y retorna su base URL."""
+        server = create_stub_server(stub)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return stub_base_url(server)
+    
+    def test_openai_client_base64_vectors(self):
+        """Test de compatibilidad con el cliente oficial (encoding base64)."""
+        base_url = self._start(EmbeddingStub(dimensions=8))
+        client = openai.OpenAI(api_key="stub", base_url=base_url, max_retries=0)
+        
+        response = client.embeddings.create(model="modelo", input=["uno", "dos"])
+        
+        expected = DeterministicEmbeddings("modelo", 8).embed_vector("uno")
+        np.testing.assert_allclose(response.data[0].embedding, expected, rtol=1e-6)
+        self.assertEqual(len(response.data), 2)
+        self.assertGreater(response.usage.total_tokens, 0)
+    
+    def test_token_array_inputs(self):
+        """Test de inputs como arrays de tokens."""
+        stub = EmbeddingStub(dimensions=4)
+        
+        status, _, body = stub.handle(json.dumps({
+            'model': "modelo",
+            'input': [[1, 2, 3], [4]],
+            'encoding_format': "float"
+        }).encode())
+        
+        self.assertEqual(status, 200)
+        self.assertEqual([len(item['embedding']) for item in body['data']], [4, 4])
+        self.assertEqual(body['usage']['prompt_tokens'], 4)
+        self.assertEqual(stub.handle(b'{"input": []}')[0], 400)
+    
+    def test_per_minute_quota_returns_retry_after(self):
+        """Test de 429 con Retry-After al agotar la cuota por minuto."""
+        base_url = self._start(EmbeddingStub(dimensions=4, requests_per_minute=1))
+        client = openai.OpenAI(api_key="stub", base_url=base_url, max_retries=0)
+        client.embeddings.create(model="modelo", input="uno")
+        
+        with self.assertRaises(openai.RateLimitError) as context:
+            client.embeddings.create(model="modelo", input="dos")
+        
+        self.assertEqual(context.exception.status_code, 429)
+        self.assertAlmostEqual(_retry_after_seconds(context.exception), 60.0, delta=1.0)
+    
+    def test_injected_errors(self):
+        """Test de errores y 429 inyectados según su probabilidad."""
+        stub = EmbeddingStub(dimensions=4, error_rate=1.0)
+        self.assertIn(stub.handle(b'{"input": "x"}')[0], (500, 503))
+        
+        stub = EmbeddingStub(dimensions=4, rate_limit_rate=1.0, retry_after_seconds=2)
+        status, headers, _ = stub.handle(b'{"input": "x"}')
+        self.assertEqual((status, headers['retry-after']), (429, "2"))
+        self.assertEqual(stub.get_stats()['rate_limited_injected'], 1)
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Tests para SingleFlight."""
+    
+    def test_claim_resolve_and_wait(self):
+        """Test de reclamo de claves y espera de las que ya están en curso."""
+        flight = SingleFlight()
+        
+        owned, waiting = flight.claim(["a", "b", "a"])
+        self.assertEqual(owned, ["a", "b"])
+        self.assertEqual(waiting, {})
+        
+        owned, waiting = flight.claim(["b", "c"])
+        self.assertEqual(owned, ["c"])
+        self.assertEqual(list(waiting), ["b"])
+        
+        flight.resolve("b", [1.0])
+        self.assertEqual(waiting["b"].result(timeout=1), [1.0])
+        
+        flight.fail(["a", "c"], ValueError("error"))
+        self.assertEqual(flight.in_flight(), 0)
+
+
+class TestPackBatches(unittest.TestCase):
+    """Tests para el empaquetado de inputs por tokens."""
+    
+    def test_respects_token_and_input_limits(self):
+        """Test de límites de tokens e inputs por lote."""
+        batches = pack_batches([5, 5, 5, 1, 1, 1], max_tokens=10, max_inputs=2)
+        
+        self.assertEqual(batches, [[0, 1], [2, 3], [4, 5]])
+    
+    def test_oversized_input_gets_own_batch(self):
+        """Test de que un input mayor que el límite va en un lote propio."""
+        batches = pack_batches([2, 50, 2], max_tokens=10, max_inputs=100)
+        
+        self.assertEqual(batches, [[0], [1], [2]])
+
+
+class RateLimitedError(Exception):
+    """Error simulado de la API con status 429 y Retry-After."""
+    
+    status_code = 429
+    
+    def __init__(self, retry_after: str):
+        """Inicializa el error con el header Retry-After indicado."""
+        super().__init__("rate limited")
+        self.response = Mock(headers={'retry-after': retry_after})
+
+
+class TestAsyncEmbeddingClient(unittest.TestCase):
+    """Tests para el cliente asíncrono de embeddings."""
+    
+    def _client(self, embed_batch, **overrides):
+        """Crea un cliente con límites holgados por defecto."""
+        options = dict(
+            concurrency=4,
+            requests_per_minute=60000,
+            tokens_per_minute=10000000,
+            max_retries=3,
+            backoff_base=0.01,
+            backoff_max=1.0
+        )
+        options.update(overrides)
+        return AsyncEmbeddingClient(embed_batch, **options)
+    
+    def test_embed_batches_preserves_order_with_concurrency(self):
+        """Test de orden de resultados con lotes concurrentes."""
+        in_flight = {'current': 0, 'max': 0}
+        
+        async def embed_batch(texts):
+            in_flight['current'] += 1
+            in_flight['max'] = max(in_flight['max'], in_flight['current'])
+            await asyncio.sleep(0.01 * (3 - len(texts[0])))
+            in_flight['current'] -= 1
+            return [[float(len(t))] for t in texts]
+        
+        client = self._client(embed_batch, concurrency=2)
+        results = client.embed_batches_sync([["a"], ["bb"], ["ccc"]])
+        
+        self.assertEqual(results, [[[1.0]], [[2.0]], [[3.0]]])
+        self.assertEqual(in_flight['max'], 2)
+    
+    def test_retries_honor_retry_after(self):
+        """Test de reintento ante 429 respetando Retry-After."""
+        attempts = []
+        
+        async def embed_batch(texts):
+            attempts.append(time.monotonic())
+            if len(attempts) == 1:
+                raise RateLimitedError(retry_after="0.2")
+            return [[1.0] for _ in texts]
+        
+        client = self._client(embed_batch)
+        results = client.embed_batches_sync([["texto"]])
+        
+        self.assertEqual(results, [[[1.0]]])
+        self.assertEqual(len(attempts), 2)
+        self.assertGreaterEqual(attempts[1] - attempts[0], 0.2)
+    
+    def test_non_retryable_errors_propagate(self):
+        """Test de que los errores no transitorios no se reintentan."""
+        embed_batch = AsyncMock(side_effect=ValueError("input inválido"))
+        client = self._client(embed_batch)
+        
+        with self.assertRaises(ValueError):
+            client.embed_batches_sync([["texto"]])
+        self.assertEqual(embed_batch.call_count, 1)
+    
+    def test_token_bucket_throttles_after_burst(self):
+        """Test de espera del token bucket al agotar la capacidad."""
+        async def consume():
+            bucket = AsyncTokenBucket(per_minute=600, capacity=1)
+            await bucket.acquire(1)
+            return await bucket.acquire(1)
+        
+        waited = run_sync(consume())
+        
+        self.assertGreater(waited, 0.05)
+
+
+class TestCachedEmbeddings(unittest.TestCase):
+    """Tests para el adaptador de embeddings de LangChain."""
+    
+    def setUp(self):
+        """Configuración inicial para cada test."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.manager = OpenAIEmbeddingManager(cache_dir=self.temp_dir)
+        self.manager.embeddings = Mock()
+        self.manager.embeddings.aembed_documents = AsyncMock(
+            side_effect=lambda batch, chunk_size=None: [[float(len(t))] for t in batch]
+        )
+        self.adapter = CachedEmbeddings(self.manager)
+    
+    def test_embed_documents_uses_cache(self):
+        """Test de que una segunda ingesta no vuelve a llamar a la API."""
+        texts = ["uno", "dos", "tres"]
+        
+        first = self.adapter.embed_documents(texts)
+        self.assertEqual(self.adapter.last_call_stats['cache_misses'], 3)
+        
+        second = self.adapter.embed_documents(texts)
+        self.assertEqual(first, second)
+        self.assertEqual(self.adapter.last_call_stats['cache_hits'], 3)
+        self.assertEqual(self.manager.embeddings.aembed_documents.call_count, 1)
+    
+    def test_embed_query_counts_hits_and_misses(self):
+        """Test de contadores acumulados para consultas."""
+        self.manager._save_to_cache("consulta", [0.5])
+        
+        self.assertEqual(self.adapter.embed_query("consulta"), [0.5])
+        self.adapter.embed_documents(["nuevo"])
+        
+        stats = self.adapter.get_stats()
+        self.assertEqual(stats['calls'], 2)
+        self.assertEqual(stats['cache_hits'], 1)
+        self.assertEqual(stats['cache_misses'], 1)
+        self.assertEqual(stats['cache_hit_rate'], 0.5)
+    
+    def tearDown(self):
+        """Limpieza después de cada test."""
+        import shutil
+        self.manager.cache_store.close()
         shutil.rmtree(self.temp_dir, ignore_errors=True)
 
 
@@ -1,14 +1,90 @@
 """
 Tests unitarios para el procesamiento de documentos.
 """
+import json
+import os
+import random
 import tempfile
+import time
 import unittest
 from pathlib import Path
+from typing import Optional
 from unittest.mock import Mock, patch
 
+import bson
+import tiktoken
+from langchain_core.documents import Document
+from pypdf import PdfWriter
+from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+from scripts.ingest import DocumentProcessor
 from src.loaders.pdf_loader import PDFDocumentLoader
-from src.loaders.json_loader import JSONDocumentLoader
+from src.loaders.json_loader import JSONDocumentLoader, iter_json_records
+from src.loaders.extractors import PDFExtractor, PyPDFExtractor, parse_extractor_rules, select_pdf_extractor
+from src.loaders.pdf_pool import PDFParsePool
+from src.loaders.text_cache import ParsedTextCache
+from src.utils.cdc_splitter import ContentDefinedTextSplitter
+from src.utils.checkpoint import IngestCheckpoint
+from src.utils.hashing import document_chunk_id
+from src.utils.manifest import IngestManifest, IngestPlan
+from src.utils.pipeline import Pipeline, Stage
 from src.utils.splitter import DocumentSplitter
+from src.utils.token_splitter import TokenBoundedTextSplitter
+from src.utils.tokenizer import TokenCounter
+from src.vectorstore.bulk import batch_by_bson_size, estimate_bson_size
+from src.vectorstore.mongodb_vectorstore import MongoDBVectorStore, settings
+
+
+def write_text_pdf(path: Path, texts):
+    """Escribe un PDF con una página de texto por elemento de ``texts``."""
+    writer = PdfWriter()
+    font = writer._add_object(DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica")
+    }))
+    for text in texts:
+        page = writer.add_blank_page(300, 200)
+        page[NameObject("/Resources")] = DictionaryObject({
+            NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})
+        })
+        content = DecodedStreamObject()
+        content.set_data(f"BT /F1 12 Tf 10 100 Td ({text}) Tj ET".encode())
+        page[NameObject("/Contents")] = writer._add_object(content)
+    with open(path, 'wb') as f:
+        writer.write(f)
+
+
+def faulty_extract_pages(path, start, end):
+    """Extractor que cae o se cuelga según el nombre del archivo."""
+    if "crash" in path:
+        os._exit(1)
+    if "hang" in path:
+        time.sleep(60)
+    return PyPDFExtractor().extract_pages(path, start, end)
+
+
+class RespawnFailingExtractor:
+    """Extractor que cae con ``crash``; solo inician los primeros ``workers`` procesos."""
+    
+    def __init__(self, started_dir: Path, workers: Optional[int] = None):
+        self.started_dir = str(started_dir)
+        self.workers = workers
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.workers is None:
+            return
+        started = Path(self.started_dir)
+        count = len(list(started.iterdir()))
+        (started / str(os.getpid())).touch()
+        if count >= self.workers:
+            os._exit(1)
+    
+    def __call__(self, path, start, end):
+        if "crash" in path:
+            os._exit(1)
+        return PyPDFExtractor().extract_pages(path, start, end)
 
 
 class TestPDFLoader(unittest.TestCase):
@@ -16,19 +92,17 @@ class TestPDFLoader(unittest.TestCase):
     
     def setUp(self):
         """Configuración inicial para cada test."""
-        self.loader = PDFDocumentLoader()
+        self.loader = PDFDocumentLoader(cache_dir=tempfile.mkdtemp())
     
     def test_pdf_loader_initialization(self):
         """Test de inicialización del cargador PDF."""
         self.assertIsInstance(self.loader, PDFDocumentLoader)
     
-    @patch('src.loaders.pdf_loader.PyPDFLoader')
-    def test_load_pdf_success(self, mock_pdf_loader):
+    @patch('src.loaders.extractors.PyPDFExtractor.extract_pages')
+    def test_load_pdf_success(self, mock_extract_pages):
         """Test de carga exitosa de PDF."""
-        # Mock del loader
-        mock_loader_instance = Mock()
-        mock_loader_instance.load.return_value = [Mock()]
-        mock_pdf_loader.return_value = mock_loader_instance
+        # Mock del extractor
+        mock_extract_pages.return_value = ([(0, "Texto de la página")], 1)
         
         # Crear archivo temporal
         with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_file:
@@ -38,7 +112,7 @@ class TestPDFLoader(unittest.TestCase):
             # Test
             documents = self.loader.load_pdf(temp_path)
             self.assertTrue(len(documents) > 0)
-            mock_pdf_loader.assert_called_once()
+            mock_extract_pages.assert_called_once()
             
         finally:
             # Limpiar
@@ -65,6 +139,199 @@ class TestPDFLoader(unittest.TestCase):
                 temp_path.unlink()
 
 
+class TestParallelPDFParsing(unittest.TestCase):
+    """Tests para el parseo de PDFs en procesos separados."""
+    
+    def setUp(self):
+        """Configuración inicial para cada test."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.book = self.temp_dir / "libro.pdf"
+        write_text_pdf(self.book, [f"Pagina {i}" for i in range(7)])
+        self.short = self.temp_dir / "corto.pdf"
+        write_text_pdf(self.short, ["Unica pagina"])
+    
+    def test_parallel_matches_sequential_order_and_metadata(self):
+        """Test de páginas y metadatos idénticos al parseo secuencial."""
+        # Sin caché de texto: ambas cargas parsean los archivos
+        with patch.object(settings, 'pdf_text_cache_enabled', False):
+            loader = PDFDocumentLoader()
+        files = [self.book, self.short]
+        loaded = []
+        
+        with patch.object(settings, 'pdf_parse_pages_per_task', 2):
+            parallel = loader.load_pdf_files(
+                files,
+                {'idioma': "es"},
+                on_loaded=lambda path, documents: loaded.append(path),
+                workers=3
+            )
+        sequential = loader.load_pdf_files(files, {'idioma': "es"}, workers=1)
+        
+        self.assertEqual(list(parallel), files)
+        self.assertEqual(sorted(loaded), sorted(files))
+        for path in files:
+            self.assertEqual(
+                [(doc.page_content, doc.metadata) for doc in parallel[path]],
+                [(doc.page_content, doc.metadata) for doc in sequential[path]]
+            )
+        self.assertEqual([doc.metadata['page'] for doc in parallel[self.book]], list(range(7)))
+    
+    def test_parallel_files_keep_input_order(self):
+        """Test de archivos entregados en orden aunque terminen desordenados."""
+        loader = PDFDocumentLoader(cache_dir=str(self.temp_dir / "parsed"))
+        cached = self.temp_dir / "cacheado.pdf"
+        write_text_pdf(cached, ["En cache"])
+        loader.load_pdf(cached)
+        files = [self.book, cached, self.short]
+        
+        with patch.object(settings, 'pdf_parse_pages_per_task', 1):
+            order = [path for path, _ in loader.iter_pdf_files(files, workers=2)]
+        pool = PDFParsePool(2, timeout_seconds=30, pages_per_task=1)
+        parsed = [path for path, _, _ in pool.parse(files, max_pending_files=1)]
+        
+        self.assertEqual(order, files)
+        self.assertEqual(parsed, files)
+    
+    def test_iter_pdf_pages_matches_load_pdf(self):
+        """Test de páginas generadas de a una, iguales a las de ``load_pdf``."""
+        with patch.object(settings, 'pdf_text_cache_enabled', False):
+            loader = PDFDocumentLoader()
+        
+        pages = loader.iter_pdf_pages(self.book, {'idioma': "es"})
+        first = next(pages)
+        
+        self.assertEqual(first.metadata['page'], 0)
+        self.assertEqual(
+            [(doc.page_content, doc.metadata) for doc in [first, *pages]],
+            [(doc.page_content, doc.metadata) for doc in loader.load_pdf(self.book, {'idioma': "es"})]
+        )
+    
+    def test_crash_and_timeout_only_fail_their_file(self):
+        """Test de aislamiento: un PDF que cae o se cuelga no afecta al resto."""
+        crash = self.temp_dir / "crash.pdf"
+        hang = self.temp_dir / "hang.pdf"
+        write_text_pdf(crash, ["x"])
+        write_text_pdf(hang, ["x"])
+        pool = PDFParsePool(2, timeout_seconds=2, pages_per_task=3, extract=faulty_extract_pages)
+        
+        results = {path: (pages, error) for path, pages, error in pool.parse(
+            [crash, self.book, hang, self.short]
+        )}
+        
+        self.assertIsNone(results[crash][0])
+        self.assertIn("exited", results[crash][1])
+        self.assertIsNone(results[hang][0])
+        self.assertIn("Timed out", results[hang][1])
+        self.assertEqual([page for page, _ in results[self.book][0]], list(range(7)))
+        self.assertEqual(results[self.short][0], [(0, "Unica pagina")])
+    
+    def test_failed_respawn_shrinks_pool(self):
+        """Test de reemplazos que no inician: solo falla el archivo que cayó."""
+        crash = self.temp_dir / "crash.pdf"
+        write_text_pdf(crash, ["x"])
+        files = [crash, self.book, self.short]
+        
+        def parse(workers):
+            started_dir = Path(tempfile.mkdtemp(dir=self.temp_dir))
+            pool = PDFParsePool(
+                workers, timeout_seconds=30, pages_per_task=3,
+                extract=RespawnFailingExtractor(started_dir, workers)
+            )
+            task_extractor = RespawnFailingExtractor(started_dir)
+            return {path: (pages, error) for path, pages, error in pool.parse(
+                files, extract_for=lambda path: task_extractor
+            )}
+        
+        shrunk, alone = parse(2), parse(1)
+        
+        self.assertIn("exited", shrunk[crash][1])
+        self.assertEqual([page for page, _ in shrunk[self.book][0]], list(range(7)))
+        self.assertEqual(shrunk[self.short][0], [(0, "Unica pagina")])
+        self.assertIn("exited", alone[crash][1])
+        self.assertEqual(alone[self.book], (None, "No PDF parse worker could start"))
+        self.assertEqual(list(alone), files)
+    
+    def test_extractor_selected_per_file_and_directory(self):
+        """Test de reglas de extractor por archivo o directorio, también en paralelo."""
+        rules = parse_extractor_rules("libros/=pypdf_layout; *corto*.pdf = pdfminer")
+        base_dir = self.temp_dir
+        
+        self.assertEqual(select_pdf_extractor(base_dir / "libros" / "a.pdf", rules, "pypdf", base_dir), "pypdf_layout")
+        self.assertEqual(select_pdf_extractor(base_dir / "corto.pdf", rules, "pypdf", base_dir), "pdfminer")
+        self.assertEqual(select_pdf_extractor(base_dir / "otro.pdf", rules, "pypdf", base_dir), "pypdf")
+        with self.assertRaises(ValueError):
+            parse_extractor_rules("libros/=desconocido")
+        
+        class PageCountOnly(PDFExtractor):
+            def page_count(self, path):
+                return 1
+        
+        with self.assertRaises(TypeError):
+            PageCountOnly()
+        
+        loader = PDFDocumentLoader(cache_dir=str(self.temp_dir / "parsed"))
+        loader.extractor_rules = parse_extractor_rules("libro.pdf=pypdf_layout")
+        parallel = loader.load_pdf_files([self.book, self.short], workers=2)
+        
+        self.assertEqual(loader.get_extractor(self.book).name, "pypdf_layout")
+        self.assertEqual(loader.get_extractor(self.short).name, "pypdf")
+        self.assertEqual(parallel[self.short][0].page_content, "Unica pagina")
+        self.assertEqual(parallel[self.book][0].page_content.strip(), "Pagina 0")
+        self.assertEqual(loader.get_text_cache_stats()['files'], 2)
+
+
+class TestParsedTextCache(unittest.TestCase):
+    """Tests para el caché de texto extraído de PDFs."""
+    
+    def setUp(self):
+        """Configuración inicial para cada test."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.book = self.temp_dir / "libro.pdf"
+        write_text_pdf(self.book, [f"Pagina {i}" for i in range(3)])
+    
+    def test_round_trip_and_lru_eviction(self):
+        """Test de lectura por hash y extractor, y desalojo de lo menos usado."""
+        cache = ParsedTextCache(self.temp_dir / "cache.sqlite3", max_bytes=10 ** 6)
+        pages = [({'page': 0}, "Texto"), ({'page': 1}, "Más texto")]
+        cache.put("a", "pypdf-1", pages)
+        
+        self.assertEqual(cache.get("a", "pypdf-1"), pages)
+        self.assertIsNone(cache.get("a", "pypdf-2"))
+        
+        cache.put("b", "pypdf-1", pages)
+        cache.get("a", "pypdf-1")
+        cache.max_bytes = cache.get_stats()['size_mb'] * 1024 * 1024 - 1
+        
+        self.assertEqual(cache.evict(), 1)
+        self.assertIsNone(cache.get("b", "pypdf-1"))
+        self.assertEqual(cache.get("a", "pypdf-1"), pages)
+    
+    def test_unchanged_pdf_is_not_parsed_again(self):
+        """Test de carga desde el caché, también con el archivo renombrado."""
+        loader = PDFDocumentLoader(cache_dir=str(self.temp_dir / "parsed"))
+        first = loader.load_pdf(self.book, {'idioma': "es"})
+        renamed = self.temp_dir / "renombrado.pdf"
+        self.book.rename(renamed)
+        
+        with patch.object(PyPDFExtractor, 'extract_pages') as mock_extract_pages, \
+                patch.object(PyPDFExtractor, 'iter_pages') as mock_iter_pages:
+            second = loader.load_pdf(renamed, {'idioma': "es"})
+            pages = list(loader.iter_pdf_pages(renamed))
+        
+        mock_extract_pages.assert_not_called()
+        mock_iter_pages.assert_not_called()
+        self.assertEqual(
+            [(doc.page_content, doc.metadata['page']) for doc in second],
+            [(doc.page_content, doc.metadata['page']) for doc in first]
+        )
+        self.assertEqual(second[0].metadata['source'], "renombrado.pdf")
+        self.assertEqual(pages[0].metadata['source'], str(renamed))
+        self.assertEqual(loader.get_text_cache_stats()['files'], 1)
+        self.assertIsNotNone(loader.text_cache.get(
+            first[0].metadata['file_hash'], loader.get_extractor(renamed).version
+        ))
+
+
 class TestJSONLoader(unittest.TestCase):
     """Tests para el cargador de JSON."""
     
@@ -98,6 +365,57 @@ class TestJSONLoader(unittest.TestCase):
             # Limpiar
             if temp_path.exists():
                 temp_path.unlink()
+    
+    def test_streaming_records_match_jq_loader(self):
+        """Test de lectura incremental de JSON y JSON Lines, igual a ``JSONLoader``."""
+        temp_dir = Path(tempfile.mkdtemp())
+        records = [
+            {'question': f"¿Pregunta {i}? [\"{i}\"]", 'answer': "respuesta " * i, 'id': i}
+            for i in range(40)
+        ]
+        faq = temp_dir / "faq.json"
+        faq.write_text(json.dumps(records, indent=2, ensure_ascii=False), encoding='utf-8')
+        lines = temp_dir / "faq.jsonl"
+        lines.write_text("\n".join(json.dumps(record) for record in records) + "\n", encoding='utf-8')
+        
+        # Bloques de lectura mínimos: cada registro queda partido entre bloques
+        with patch('src.loaders.json_loader._READ_SIZE', 3):
+            streamed = list(self.loader.iter_warren_buffet_faq(faq))
+            self.assertEqual(list(iter_json_records(faq)), records)
+        
+        self.assertEqual(list(iter_json_records(lines)), records)
+        self.assertEqual(
+            [(doc.page_content, doc.metadata) for doc in streamed],
+            [(doc.page_content, doc.metadata) for doc in self.loader.load_warren_buffet_faq(faq)]
+        )
+        documents = list(self.loader.iter_json_documents(lines, metadata_keys=['id']))
+        self.assertEqual([doc.metadata['seq_num'] for doc in documents], list(range(1, 41)))
+        self.assertEqual(documents[3].metadata['id'], 3)
+        self.assertEqual(json.loads(documents[3].page_content), records[3])
+        for metadata in (None, {'idioma': "es"}):
+            self.assertEqual(
+                [
+                    document_chunk_id(doc)
+                    for doc in self.loader.iter_json_documents(faq, metadata=metadata)
+                ],
+                [
+                    document_chunk_id(doc)
+                    for doc in self.loader.load_json(faq, '.[]', metadata=metadata)
+                ]
+            )
+    
+    def test_malformed_json_arrays_are_rejected(self):
+        """Test de comas faltantes, repetidas o finales en un arreglo JSON."""
+        temp_dir = Path(tempfile.mkdtemp())
+        path = temp_dir / "datos.json"
+        
+        for text, expected in (("[]", []), ("[ 1 , 2 ]", [1, 2]), ('[{"a": [1,2]},"x"]', [{'a': [1, 2]}, "x"])):
+            path.write_text(text, encoding='utf-8')
+            self.assertEqual(list(iter_json_records(path)), expected)
+        for text in ("[1 2]", "[1,,2]", "[1,]", "[,1]", "[1", "[1,"):
+            path.write_text(text, encoding='utf-8')
+            with self.assertRaises(ValueError, msg=text):
+                list(iter_json_records(path))
 
 
 class TestDocumentSplitter(unittest.TestCase):
@@ -113,6 +431,134 @@ class TestDocumentSplitter(unittest.TestCase):
         self.assertEqual(self.splitter.chunk_size, 100)
         self.assertEqual(self.splitter.chunk_overlap, 20)
     
+    def test_split_documents_assigns_deterministic_ids(self):
+        """Test de ids de chunk estables y dependientes del contenido."""
+        splitter = DocumentSplitter(chunk_size=40, chunk_overlap=5)
+        page = "Primera oración del texto. Segunda oración del texto. Tercera."
+        
+        def split(text):
+            return splitter.split_documents(
+                [Document(page_content=text, metadata={'file_hash': "abc", 'page': 0})]
+            )
+        
+        first, second = split(page), split(page)
+        
+        self.assertEqual([doc.id for doc in first], [doc.id for doc in second])
+        self.assertEqual(len({doc.id for doc in first}), len(first))
+        self.assertTrue(all('start_index' in doc.metadata for doc in first))
+        self.assertNotEqual(split(page + " Cambio.")[-1].id, first[-1].id)
+    
+    def test_content_defined_chunks_survive_edits(self):
+        """Test de límites estables ante una inserción al inicio."""
+        rng = random.Random(7)
+        words = [
+            "".join(rng.choice("abcdefghijklmnñopqrstuvwxyzáé") for _ in range(rng.randint(1, 10)))
+            for _ in range(500)
+        ]
+        text = " ".join(rng.choice(words) for _ in range(3000))
+        edited = text[:50] + " texto insertado al comienzo " + text[50:]
+        splitter = ContentDefinedTextSplitter(chunk_size=200, chunk_overlap=20)
+
+        original, changed = splitter.split_text(text), splitter.split_text(edited)
+
+        self.assertGreater(len(original), 10)
+        self.assertLessEqual(max(len(chunk) for chunk in original), 200)
+        self.assertLessEqual(len(set(original) - set(changed)), 3)
+
+    def test_content_defined_ids_ignore_position(self):
+        """Test de ids que no cambian al desplazarse el chunk."""
+        splitter = DocumentSplitter(chunk_size=80, chunk_overlap=10, strategy="content_defined")
+        text = " ".join(f"palabra{i}" for i in range(200))
+
+        def split(page):
+            return splitter.split_documents(
+                [Document(page_content=page, metadata={'source': "a.pdf", 'page': 0})]
+            )
+
+        original, edited = split(text), split("Inicio nuevo. " + text)
+
+        for doc in original:
+            self.assertTrue(text[doc.metadata['start_index']:].startswith(doc.page_content))
+        self.assertGreaterEqual(
+            len({doc.id for doc in original} & {doc.id for doc in edited}),
+            len(original) - 2
+        )
+        with self.assertRaises(ValueError):
+            DocumentSplitter(strategy="unknown")
+
+    def test_token_chunks_respect_token_limit(self):
+        """Test de chunks medidos en tokens, con una sola codificación por texto."""
+        # Codificación BPE mínima (bytes más algunas uniones), sin descargas
+        ranks = {bytes([i]): i for i in range(256)}
+        for merge in (b" d", b"de", b" de", b"la", b" la", b"es", b"en"):
+            ranks[merge] = len(ranks)
+        encoding = tiktoken.Encoding(
+            "test",
+            pat_str=r" ?\p{L}+| ?\p{N}+| ?[^\s\p{L}\p{N}]+|\s+(?!\S)|\s+",
+            mergeable_ranks=ranks,
+            special_tokens={}
+        )
+        with patch.object(TokenCounter, '_load_encoding', staticmethod(lambda model: encoding)):
+            counter = TokenCounter("test")
+        splitter = TokenBoundedTextSplitter(counter, chunk_size=60, chunk_overlap=8, add_start_index=True)
+        text = "\n\n".join(
+            f"Sección {i}. El presupuesto de la familia es de ${i * 1250:,}. Ahorro: {i}% — ñandú."
+            for i in range(40)
+        )
+        
+        with patch.object(counter.encoding, 'encode_ordinary', wraps=counter.encoding.encode_ordinary) as encode:
+            documents = splitter.create_documents([text])
+        
+        self.assertEqual(encode.call_count, 1)
+        self.assertGreater(len(documents), 5)
+        for doc in documents:
+            self.assertLessEqual(counter.count(doc.page_content), 60)
+            start = doc.metadata['start_index']
+            self.assertEqual(text[start:start + len(doc.page_content)], doc.page_content)
+        # Los chunks se llenan cerca del límite salvo el último
+        self.assertGreaterEqual(min(counter.count(doc.page_content) for doc in documents[:-1]), 40)
+        
+        splitter = DocumentSplitter(chunk_size=50, chunk_overlap=5, strategy="token")
+        chunks = splitter.split_documents([Document(page_content=text, metadata={'source': "a.pdf", 'page': 0})])
+        self.assertTrue(all(doc.id for doc in chunks))
+        self.assertTrue(all(
+            splitter.text_splitter.token_counter.count(doc.page_content) <= 50 for doc in chunks
+        ))
+
+    def test_iter_split_documents_matches_split_documents(self):
+        """Test de división en streaming y en procesos, con el mismo orden e ids."""
+        splitter = DocumentSplitter(chunk_size=60, chunk_overlap=10, strategy="content_defined")
+        pages = [
+            Document(
+                page_content=" ".join(f"palabra{page}_{i}" for i in range(40)),
+                metadata={'source': f"libro{page % 3}.pdf", 'page': page, 'idioma': "es"}
+            )
+            for page in range(12)
+        ]
+        consumed = []
+        
+        def source():
+            for page in pages:
+                consumed.append(page)
+                yield page
+        
+        expected = splitter.split_documents(pages, workers=1)
+        streamed = splitter.iter_split_documents(source(), workers=1)
+        first = next(streamed)
+        
+        # La primera página espera a la segunda para enlazarse con ella
+        self.assertEqual(len(consumed), 2)
+        self.assertEqual(
+            [(doc.id, doc.page_content, doc.metadata) for doc in [first, *streamed]],
+            [(doc.id, doc.page_content, doc.metadata) for doc in expected]
+        )
+        with patch.object(settings, 'split_batch_pages', 5):
+            parallel = list(splitter.iter_split_documents(iter(pages), workers=2))
+        self.assertEqual(
+            [(doc.id, doc.page_content, doc.metadata) for doc in parallel],
+            [(doc.id, doc.page_content, doc.metadata) for doc in expected]
+        )
+
     def test_split_text(self):
         """Test de división de texto."""
         text = "Este es un texto largo que debería ser dividido en chunks más pequeños. " * 10
@@ -141,5 +587,466 @@ class TestDocumentSplitter(unittest.TestCase):
         mock_splitter_instance.split_documents.assert_called_once_with(mock_documents)
 
 
+
+class TestBulkInsert(unittest.TestCase):
+    """Tests para la carga masiva en MongoDB."""
+    
+    def setUp(self):
+        """Configuración inicial para cada test."""
+        with patch('src.vectorstore.mongodb_vectorstore.MongoClient'), \
+                patch('src.vectorstore.mongodb_vectorstore.MongoDBAtlasVectorSearch'):
+            self.store = MongoDBVectorStore(embedding_manager=Mock())
+        self.store.collection = Mock()
+        self.store.collection.find.return_value = []
+    
+    def test_estimate_bson_size_matches_encoding(self):
+        """Test de que la estimación coincide con el tamaño BSON real."""
+        document = {
+            '_id': bson.ObjectId(),
+            'text': "Texto con acentos: inversión, año",
+            'embedding': [0.1] * 1536,
+            'source': "libro.pdf",
+            'page': 3
+        }
+        
+        self.assertEqual(estimate_bson_size(document), len(bson.encode(document)))
+    
+    def test_batch_by_bson_size(self):
+        """Test de lotes limitados por bytes, en orden."""
+        documents = [{'text': "x" * 100, 'embedding': [0.0] * 10} for _ in range(10)]
+        size = estimate_bson_size(documents[0])
+        
+        batches = list(batch_by_bson_size(documents, max_bytes=size * 3))
+        
+        self.assertEqual([len(batch) for batch in batches], [3, 3, 3, 1])
+        self.assertEqual(sum(batches, []), documents)
+    
+    def test_add_embedded_documents_unordered(self):
+        """Test de inserción no ordenada con el formato de LangChain."""
+        documents = [Document(page_content="uno", metadata={'source': "a.pdf"})]
+        
+        ids = self.store.add_embedded_documents(documents, [[0.5, 0.25]], bulk_load=False)
+        
+        records = [op._doc for op in self.store.collection.bulk_write.call_args.args[0]]
+        self.assertEqual(self.store.collection.bulk_write.call_args.kwargs, {'ordered': False})
+        self.assertEqual(ids, [str(records[0]['_id'])])
+        self.assertEqual(records[0]['text'], "uno")
+        self.assertEqual(records[0]['embedding'], [0.5, 0.25])
+        self.assertEqual(records[0]['source'], "a.pdf")
+        self.store.collection.with_options.assert_not_called()
+    
+    @patch('src.vectorstore.mongodb_vectorstore.time.sleep')
+    def test_bulk_load_verifies_and_repairs(self, mock_sleep):
+        """Test de escritura w=0 con verificación y reinserción de faltantes."""
+        unacknowledged = Mock()
+        self.store.collection.with_options.return_value = unacknowledged
+        documents = [Document(page_content=text) for text in ("uno", "dos")]
+        
+        def find(query, projection):
+            # El segundo documento nunca llega
+            return [{'_id': query['_id']['$in'][0]}] if len(query['_id']['$in']) == 2 else []
+        
+        self.store.collection.find.side_effect = find
+        
+        with patch.object(settings, 'mongodb_bulk_write_workers', 1):
+            ids = self.store.add_embedded_documents(documents, [[1.0], [2.0]], bulk_load=True)
+        
+        write_concern = self.store.collection.with_options.call_args.kwargs['write_concern']
+        self.assertEqual(write_concern.document, {'w': 0})
+        unacknowledged.bulk_write.assert_called_once()
+        repaired = self.store.collection.bulk_write.call_args.args[0]
+        self.assertEqual([str(op._filter['_id']) for op in repaired], ids[1:])
+    
+    def test_add_documents_pipelined(self):
+        """Test de ingesta con embeddings y escrituras superpuestas."""
+        self.store.embeddings = Mock()
+        self.store.embeddings.embed_documents.side_effect = lambda texts: [[1.0] for _ in texts]
+        self.store.embeddings.last_call_stats = {}
+        self.store.embeddings.get_stats.return_value = {}
+        documents = [Document(page_content=f"doc {i}") for i in range(7)]
+        
+        committed = []
+        
+        with patch.object(settings, 'mongodb_bulk_batch_bytes', 1):
+            ids = self.store.add_documents(
+                documents,
+                batch_size=2,
+                bulk_load=False,
+                pipelined=True,
+                on_commit=committed.append
+            )
+        
+        written = [
+            op._doc
+            for call in self.store.collection.bulk_write.call_args_list
+            for op in call.args[0]
+        ]
+        self.assertEqual(len(ids), 7)
+        self.assertEqual(sorted(ids), sorted(str(record['_id']) for record in written))
+        self.assertEqual(self.store.embeddings.embed_documents.call_count, 4)
+        self.assertEqual(sorted(sum(committed, [])), sorted(ids))
+        stages = {stats['stage']: stats for stats in self.store.last_pipeline_stats}
+        self.assertEqual(stages['embed']['units'], 7)
+        self.assertEqual(stages['write']['units'], 7)
+    
+    def test_ingestion_stages_stream_and_skip_existing(self):
+        """Test de etapas de ingesta alimentadas por un generador de lotes."""
+        self.store.embeddings = Mock()
+        self.store.embeddings.embed_documents.side_effect = lambda texts: [[1.0] for _ in texts]
+        self.store.embeddings.last_call_stats = {}
+        self.store.collection.find.side_effect = lambda query, projection: (
+            [{'_id': "chunk-0"}] if "chunk-0" in query['_id']['$in'] else []
+        )
+        committed = []
+        
+        def batches():
+            for number in range(3):
+                yield number + 1, [
+                    Document(page_content=f"t{number}{i}", id=f"chunk-{number * 2 + i}")
+                    for i in range(2)
+                ]
+        
+        with patch.object(settings, 'mongodb_bulk_batch_bytes', 1):
+            written = Pipeline(
+                self.store.ingestion_stages(
+                    bulk_load=False,
+                    on_commit=committed.append,
+                    filter_existing=True
+                ),
+                queue_size=1
+            ).run(batches())
+        
+        written_ids = sorted(doc_id for _, ids in written for doc_id in ids)
+        self.assertEqual(written_ids, [f"chunk-{i}" for i in range(1, 6)])
+        self.assertEqual(sorted(sum(committed, [])), written_ids)
+        self.assertEqual(self.store.embeddings.embed_documents.call_count, 3)
+    
+    def test_expand_with_neighbors_stitches_contiguous_chunks(self):
+        """Test de contexto de los chunks vecinos leído en una sola consulta."""
+        page = " ".join(f"palabra{i}" for i in range(60))
+        chunks = DocumentSplitter(chunk_size=60, chunk_overlap=0).split_page(
+            Document(page_content=page, metadata={'source': "a.pdf", 'page': 0})
+        )
+        records = self.store._build_records(chunks, [[0.0]] * len(chunks))
+        by_id = {record['_id']: record for record in records}
+        self.store.collection.find.side_effect = lambda query, projection: [
+            {key: value for key, value in by_id[oid].items() if key != 'embedding'}
+            for oid in query['_id']['$in']
+        ]
+        # Resultados con el formato de MongoDBAtlasVectorSearch (id en ``_id``)
+        hits = [
+            Document(page_content=chunk.page_content, metadata={**chunk.metadata, '_id': chunk.id})
+            for chunk in (chunks[0], chunks[3])
+        ]
+        
+        first, middle = self.store.expand_with_neighbors(hits)
+        
+        self.store.collection.find.assert_called_once()
+        self.assertEqual(chunks[3].metadata['chunk_seq'], 3)
+        self.assertEqual(first.page_content, page[:chunks[1].metadata['end_index']])
+        self.assertEqual(
+            middle.page_content,
+            page[chunks[2].metadata['start_index']:chunks[4].metadata['end_index']]
+        )
+        self.assertEqual(middle.metadata['context_chunk_ids'], [chunk.id for chunk in chunks[2:5]])
+        self.assertEqual(middle.metadata['context_start_index'], chunks[2].metadata['start_index'])
+    
+    def test_neighbors_link_across_pdf_pages(self):
+        """Test de enlaces entre páginas sucesivas, también en streaming."""
+        splitter = DocumentSplitter(chunk_size=60, chunk_overlap=0)
+        pages = [
+            Document(
+                page_content=" ".join(f"p{page}w{i}" for i in range(20)),
+                metadata={'source': "a.pdf", 'page': page}
+            )
+            for page in range(3)
+        ]
+        pages.insert(2, Document(page_content="", metadata={'source': "a.pdf", 'page': 9}))
+        records = [Document(page_content="Pregunta y respuesta", metadata={'source': "faq.json", 'seq_num': n}) for n in (1, 2)]
+        
+        chunks = splitter.split_documents(pages + records)
+        streamed = [chunk for page in splitter.iter_split_pages(pages + records, workers=1) for chunk in page]
+        by_page = [[chunk for chunk in chunks if chunk.metadata.get('page') == page] for page in (0, 1)]
+        
+        self.assertEqual(
+            [chunk.metadata for chunk in streamed],
+            [chunk.metadata for chunk in chunks]
+        )
+        self.assertEqual(by_page[0][-1].metadata['next_chunk_id'], by_page[1][0].id)
+        self.assertEqual(by_page[1][0].metadata['prev_chunk_id'], by_page[0][-1].id)
+        self.assertIsNone(chunks[-1].metadata['prev_chunk_id'])
+        
+        records = self.store._build_records(chunks, [[0.0]] * len(chunks))
+        by_id = {record['_id']: record for record in records}
+        self.store.collection.find.side_effect = lambda query, projection: [
+            {key: value for key, value in by_id[oid].items() if key != 'embedding'}
+            for oid in query['_id']['$in']
+        ]
+        hit = by_page[1][0]
+        
+        expanded, = self.store.expand_with_neighbors([
+            Document(page_content=hit.page_content, metadata={**hit.metadata, '_id': hit.id})
+        ])
+        
+        self.assertEqual(
+            expanded.page_content,
+            "\n".join([by_page[0][-1].page_content, f"{hit.page_content} {by_page[1][1].page_content}"])
+        )
+        self.assertEqual(
+            (expanded.metadata['context_start_page'], expanded.metadata['context_end_page']),
+            (0, 1)
+        )
+    
+    def test_add_documents_skips_existing_chunks(self):
+        """Test de reingesta: los chunks existentes no se embeben ni escriben."""
+        self.store.embeddings = Mock()
+        self.store.embeddings.embed_documents.side_effect = lambda texts: [[1.0] for _ in texts]
+        self.store.embeddings.last_call_stats = {}
+        self.store.embeddings.get_stats.return_value = {}
+        documents = [Document(page_content=text, id=f"chunk-{text}") for text in ("a", "b", "a")]
+        self.store.collection.find.side_effect = lambda query, projection: (
+            [{'_id': "chunk-a"}] if "chunk-a" in query['_id']['$in'] else []
+        )
+        
+        ids = self.store.add_documents(documents, bulk_load=False)
+        
+        self.assertEqual(ids, ["chunk-a", "chunk-b", "chunk-a"])
+        self.store.embeddings.embed_documents.assert_called_once_with(["b"])
+        ops = self.store.collection.bulk_write.call_args.args[0]
+        self.assertEqual([op._filter for op in ops], [{'_id': "chunk-b"}])
+        self.assertTrue(ops[0]._upsert)
+
+
+class TestIngestManifest(unittest.TestCase):
+    """Tests para el manifest de ingesta incremental."""
+    
+    def setUp(self):
+        """Configuración inicial para cada test."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.state_dir = self.temp_dir / "state"
+        self.config = {'chunk_size': 512}
+        self.files = {}
+        for name in ("a.pdf", "b.pdf", "c.pdf"):
+            path = self.temp_dir / name
+            path.write_bytes(name.encode())
+            self.files[name] = path
+        
+        manifest = IngestManifest(self.state_dir, self.config)
+        for name, path in self.files.items():
+            manifest.record(name, path, [f"{name}-1", f"{name}-2"])
+        manifest.save()
+    
+    def test_plan_detects_new_changed_unchanged_and_deleted(self):
+        """Test de clasificación de archivos frente al manifest."""
+        os.utime(self.files["a.pdf"], (0, 0))  # Solo cambia la fecha
+        self.files["b.pdf"].write_bytes(b"contenido nuevo")
+        new_path = self.temp_dir / "d.pdf"
+        new_path.write_bytes(b"d")
+        files = {"a.pdf": self.files["a.pdf"], "b.pdf": self.files["b.pdf"], "d.pdf": new_path}
+        
+        plan = IngestManifest(self.state_dir, self.config).plan(files)
+        
+        self.assertEqual(plan.new, ["d.pdf"])
+        self.assertEqual(plan.changed, ["b.pdf"])
+        self.assertEqual(plan.unchanged, ["a.pdf"])
+        self.assertEqual(plan.deleted, ["c.pdf"])
+    
+    def test_config_change_reprocesses_everything(self):
+        """Test de reingesta completa al cambiar la configuración."""
+        manifest = IngestManifest(self.state_dir, {'chunk_size': 256})
+        
+        plan = manifest.plan(self.files)
+        
+        self.assertEqual(sorted(plan.changed), sorted(self.files))
+        self.assertEqual(manifest.chunk_ids("a.pdf"), ["a.pdf-1", "a.pdf-2"])
+    
+    def test_save_and_reload(self):
+        """Test de persistencia del manifest."""
+        manifest = IngestManifest(self.state_dir, self.config)
+        manifest.remove("c.pdf")
+        manifest.save()
+        
+        reloaded = IngestManifest(self.state_dir, self.config)
+        
+        self.assertEqual(sorted(reloaded.files), ["a.pdf", "b.pdf"])
+        self.assertEqual(reloaded.plan(self.files).unchanged, ["a.pdf", "b.pdf"])
+        self.assertEqual(reloaded.plan(self.files).new, ["c.pdf"])
+
+
+class TestIngestCheckpoint(unittest.TestCase):
+    """Tests para el checkpoint de ingesta reanudable."""
+    
+    def setUp(self):
+        """Configuración inicial para cada test."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.config = {'chunk_size': 512}
+        self.path = self.temp_dir / "a.pdf"
+        self.path.write_bytes(b"a")
+        self.plan = IngestPlan()
+        self.plan.new = ["a.pdf", "b.pdf"]
+        self.plan.unchanged = ["c.pdf"]
+    
+    def test_resume_restores_plan_parsed_files_and_commits(self):
+        """Test de reanudación con páginas parseadas y lotes escritos."""
+        checkpoint = IngestCheckpoint(self.temp_dir, self.config)
+        checkpoint.start(self.plan)
+        page = Document(page_content="página", metadata={'source': "a.pdf", 'page': 0})
+        checkpoint.record_parsed("a.pdf", self.path, [page])
+        checkpoint.record_committed(["id-1", "id-2"])
+        checkpoint.record_committed(["id-3"])
+        # Una interrupción a mitad de escritura deja una línea incompleta
+        with open(checkpoint.path / "committed.jsonl", 'a', encoding='utf-8') as f:
+            f.write('{"ids": ["id-')
+        
+        resumed = IngestCheckpoint(self.temp_dir, self.config)
+        
+        self.assertTrue(resumed.load())
+        self.assertEqual(resumed.plan.to_process, ["a.pdf", "b.pdf"])
+        self.assertEqual(resumed.plan.unchanged, ["c.pdf"])
+        self.assertEqual(resumed.committed_ids(), {"id-1", "id-2", "id-3"})
+        self.assertEqual(resumed.parsed_files({"a.pdf": self.path}), ["a.pdf"])
+        parsed = resumed.load_parsed("a.pdf")
+        self.assertEqual([(doc.page_content, doc.metadata) for doc in parsed], [(page.page_content, page.metadata)])
+        
+        # Un archivo modificado desde que se parseó se vuelve a parsear
+        os.utime(self.path, (0, 0))
+        self.assertEqual(resumed.parsed_files({"a.pdf": self.path}), [])
+    
+    def test_resume_reads_parsed_files_from_checkpoint(self):
+        """Test de reanudación: los PDFs ya parseados se leen del checkpoint."""
+        files = {"a.pdf": self.path, "b.pdf": self.temp_dir / "b.pdf"}
+        files["b.pdf"].write_bytes(b"b")
+        
+        def load_pdf_files(pdf_files, metadata, on_loaded):
+            loaded = {}
+            for path in pdf_files:
+                loaded[path] = [Document(page_content=f"texto de {path.name}", metadata={'source': path.name, 'page': 0})]
+                on_loaded(path, loaded[path])
+            return loaded
+        
+        processor = DocumentProcessor.__new__(DocumentProcessor)
+        processor.pdf_loader = Mock()
+        processor.pdf_loader.load_pdf_files.side_effect = load_pdf_files
+        processor.checkpoint = IngestCheckpoint(self.temp_dir, self.config)
+        processor.checkpoint.start(self.plan)
+        loaded = processor._load_pdf_files(self.plan, files)
+        
+        processor.checkpoint = IngestCheckpoint(self.temp_dir, self.config)
+        self.assertTrue(processor.checkpoint.load())
+        resumed = processor._load_pdf_files(self.plan, files)
+        
+        # Ningún archivo se vuelve a cargar
+        self.assertEqual(processor.pdf_loader.load_pdf_files.call_args.args[0], [])
+        self.assertEqual(list(resumed), [self.path, files["b.pdf"]])
+        self.assertEqual(
+            [(doc.page_content, doc.metadata) for documents in resumed.values() for doc in documents],
+            [(doc.page_content, doc.metadata) for documents in loaded.values() for doc in documents]
+        )
+        
+        # Las páginas se eliminan con el checkpoint
+        processor.checkpoint.clear()
+        self.assertFalse((self.temp_dir / IngestCheckpoint.DIRNAME / "pages").exists())
+    
+    def test_resume_does_not_parse_again_without_text_cache(self):
+        """Test de reanudación sin caché de texto: los PDFs ya parseados no se vuelven a parsear."""
+        files = {}
+        for name, texts in (("a.pdf", ["Uno", "Dos"]), ("b.pdf", ["Tres"])):
+            files[name] = self.temp_dir / name
+            write_text_pdf(files[name], texts)
+        processor = DocumentProcessor.__new__(DocumentProcessor)
+        with patch.object(settings, 'pdf_text_cache_enabled', False):
+            processor.pdf_loader = PDFDocumentLoader()
+        processor.checkpoint = IngestCheckpoint(self.temp_dir, self.config)
+        processor.checkpoint.start(self.plan)
+        
+        with patch.object(settings, 'pdf_parse_workers', 1):
+            file_hashes = {}
+            pages = list(processor._iter_streaming_pages(self.plan, files, file_hashes))
+            
+            processor.checkpoint = IngestCheckpoint(self.temp_dir, self.config)
+            self.assertTrue(processor.checkpoint.load())
+            resumed_hashes = {}
+            with patch.object(PyPDFExtractor, 'iter_pages') as iter_pages, \
+                    patch.object(PyPDFExtractor, 'extract_pages') as extract_pages:
+                resumed = list(processor._iter_streaming_pages(self.plan, files, resumed_hashes))
+        
+        iter_pages.assert_not_called()
+        extract_pages.assert_not_called()
+        self.assertEqual(
+            [(doc.page_content, doc.metadata) for doc in resumed],
+            [(doc.page_content, doc.metadata) for doc in pages]
+        )
+        self.assertEqual([doc.page_content for doc in resumed], ["Uno", "Dos", "Tres"])
+        self.assertEqual(resumed_hashes, file_hashes)
+    
+    def test_config_change_and_clear_discard_checkpoint(self):
+        """Test de checkpoints que no se pueden reanudar."""
+        checkpoint = IngestCheckpoint(self.temp_dir, self.config)
+        checkpoint.start(self.plan)
+        
+        self.assertFalse(IngestCheckpoint(self.temp_dir, {'chunk_size': 256}).load())
+        
+        checkpoint.clear()
+        self.assertFalse(checkpoint.path.exists())
+        self.assertFalse(IngestCheckpoint(self.temp_dir, self.config).load())
+
+
+class TestPipeline(unittest.TestCase):
+    """Tests para el pipeline de etapas con colas acotadas."""
+    
+    def test_stages_and_flush(self):
+        """Test de encadenamiento de etapas y vaciado final."""
+        buffer = []
+        
+        def group(item):
+            buffer.append(item)
+            if len(buffer) == 2:
+                out = [list(buffer)]
+                buffer.clear()
+                return out
+            return []
+        
+        pipeline = Pipeline([
+            Stage('double', lambda item: [item * 2]),
+            Stage('group', group, flush=lambda: [list(buffer)] if buffer else []),
+        ])
+        
+        self.assertEqual(pipeline.run(range(5)), [[0, 2], [4, 6], [8]])
+        self.assertEqual([stats['stage'] for stats in pipeline.stats], ['source', 'double', 'group'])
+        self.assertEqual(pipeline.stats[2]['outputs'], 3)
+    
+    def test_backpressure_bounds_queued_items(self):
+        """Test de que una etapa lenta frena a las anteriores."""
+        produced = []
+        
+        def source():
+            for i in range(20):
+                produced.append(i)
+                yield i
+        
+        def slow(item):
+            # Como mucho: cola de 1 + el elemento en curso + el que espera en put
+            self.assertLessEqual(len(produced) - item, 4)
+            time.sleep(0.01)
+            return [item]
+        
+        pipeline = Pipeline([Stage('slow', slow)], queue_size=1)
+        
+        self.assertEqual(pipeline.run(source()), list(range(20)))
+        self.assertGreater(pipeline.stats[0]['blocked_seconds'], 0)
+    
+    def test_error_stops_pipeline(self):
+        """Test de propagación del error de una etapa."""
+        def fail(item):
+            if item == 3:
+                raise RuntimeError("fallo")
+            return [item]
+        
+        pipeline = Pipeline([Stage('fail', fail), Stage('next', lambda item: [item], workers=2)])
+        
+        with self.assertRaises(RuntimeError):
+            pipeline.run(iter(range(1000)))
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file